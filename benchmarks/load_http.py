@@ -0,0 +1,117 @@
+"""Keep-alive load generator for the HTTP conversion service.
+
+Usage:
+    python convert-service.py --port 8502 &
+    python benchmarks/load_http.py --port 8502 --connections 32 --seconds 10
+    python benchmarks/load_http.py --spawn            # start a server subprocess itself
+
+Each connection sends GET /convert requests back to back over one socket and
+reads the Content-Length framed responses. Reports requests/s and p50/p99.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A mix of table, alias and affine conversions
+TARGETS = [
+    "/convert?value=5&from=km&to=mi",
+    "/convert?value=20&from=Celsius&to=Fahrenheit&category=Temperature",
+    "/convert?value=1.5&from=GB&to=MB",
+    "/convert?value=3&from=Feet&to=Meters&category=Length",
+]
+
+
+async def _connection(host, port, deadline, latencies, pipeline):
+    reader, writer = await asyncio.open_connection(host, port)
+    requests = [f"GET {t} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode() for t in TARGETS]
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(b"".join(requests[(i + k) % len(requests)] for k in range(pipeline)))
+            i += pipeline
+            for _ in range(pipeline):
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ", 1)[1].split(b"\r\n", 1)[0])
+                await reader.readexactly(length)
+                if not head.startswith(b"HTTP/1.1 200"):
+                    raise RuntimeError(head.split(b"\r\n", 1)[0].decode())
+            latencies.append((time.perf_counter() - start) / pipeline)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, connections=32, seconds=5.0, pipeline=1):
+    """Return {"rps", "p50_ms", "p99_ms", "requests"} for a fixed-duration run"""
+    latencies = []
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(_connection(host, port, deadline, latencies, pipeline) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    requests = len(latencies) * pipeline
+    return {
+        "requests": requests,
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1e3,
+        "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1e3,
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(port, workers=1):
+    """Start convert-service.py in a subprocess and wait until it accepts connections"""
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "convert-service.py"),
+                             "--port", str(port), "--workers", str(workers)],
+                            cwd=ROOT, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("Service didn't start")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the HTTP conversion service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--pipeline", type=int, default=1, help="Requests in flight per connection")
+    parser.add_argument("--spawn", action="store_true", help="Start the service on a free port first")
+    parser.add_argument("--workers", type=int, default=1, help="Service processes with --spawn")
+    args = parser.parse_args(argv)
+
+    proc = None
+    if args.spawn:
+        args.port = free_port()
+        proc = spawn_server(args.port, args.workers)
+    try:
+        stats = asyncio.run(run_load(args.host, args.port, args.connections, args.seconds, args.pipeline))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    print(f"{stats['requests']} requests in {args.seconds:g}s over {args.connections} keep-alive connections: "
+          f"{stats['rps']:.0f} req/s, p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,352 @@
+"""Micro-benchmarks and load tests with regression thresholds.
+
+Usage:
+    python benchmarks/run.py                       # run, compare to baseline.json
+    python benchmarks/run.py --quick               # smaller sizes, for CI
+    python benchmarks/run.py --update-baseline     # store results as the new baseline
+    python benchmarks/run.py --output results.json --threshold 0.25
+
+Exits 1 when any metric is more than --threshold (default 20%) worse than the
+baseline. Metrics missing on either side (e.g. the load tests when Streamlit
+isn't installed) are reported but never fail the run.
+
+Timings only mean something against the same hardware, so the gate is only
+enforced when the baseline's host (OS, CPU architecture and count, Python) and
+--quick setting match this run. Otherwise the comparison is printed for
+information. To gate a machine or CI runner, record its own baseline first:
+
+    python benchmarks/run.py --quick --update-baseline   # once, on that machine
+    python benchmarks/run.py --quick                     # later runs are gated
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+
+from components.engine import ENGINE  # noqa: E402
+from components.unit_index import INDEX  # noqa: E402
+from components.cache import ResponseCache, prompt_key  # noqa: E402
+from components.prompt_cache import SimilarPromptCache  # noqa: E402
+from components import bulk  # noqa: E402
+from components.llm import LLMClient  # noqa: E402
+from stub_client import StubCohereClient  # noqa: E402
+import load_http  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def per_call_us(func, number):
+    """Best of 5 runs of number calls, in microseconds per call"""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best / number * 1e6
+
+
+def bench_scalar(results, quick):
+    n = 20000 if quick else 200000
+    results["scalar_convert_us"] = (per_call_us(
+        lambda: ENGINE.convert(1.5, "Meters", "Feet", "Length"), n), "lower")
+    results["scalar_convert_affine_us"] = (per_call_us(
+        lambda: ENGINE.convert(20.0, "Celsius", "Fahrenheit", "Temperature"), n), "lower")
+    results["fan_out_row_us"] = (per_call_us(
+        lambda: ENGINE.convert_all(3.5, "Hours", "Time"), n), "lower")
+
+
+def bench_convert_many(results, quick):
+    sizes = (10 ** 3, 10 ** 5, 10 ** 6) if quick else (10 ** 3, 10 ** 5, 10 ** 7)
+    for size in sizes:
+        values = np.random.default_rng(0).random(size)
+        out = np.empty_like(values)
+        repeat = max(1, 10 ** 6 // size)
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                ENGINE.convert_many(values, "Celsius", "Kelvin", "Temperature", out=out)
+            best = min(best, (time.perf_counter() - start) / repeat)
+        results[f"convert_many_{size}_mvals_s"] = (size / best / 1e6, "higher")
+
+
+def bench_resolution(results, quick):
+    n = 20000 if quick else 200000
+    results["resolve_exact_us"] = (per_call_us(lambda: INDEX.resolve("km"), n), "lower")
+    results["resolve_fuzzy_us"] = (per_call_us(lambda: INDEX.resolve("kilomters"), n // 20), "lower")
+
+
+def bench_bulk(results, quick):
+    rows = 100000 if quick else 1000000
+    text = "id,value\n" + "".join(f"{i},{i * 0.5}\n" for i in range(rows))
+    best = float("inf")
+    for _ in range(3):
+        out = io.StringIO()
+        start = time.perf_counter()
+        bulk.convert_csv(io.StringIO(text), out, "Length", "Meters", "Feet")
+        best = min(best, time.perf_counter() - start)
+    results["bulk_csv_mb_s"] = (len(text) / best / 1e6, "higher")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = os.path.join(tmp, "in.f64"), os.path.join(tmp, "out.f64")
+        np.random.default_rng(0).random(rows * 4).tofile(src)
+        start = time.perf_counter()
+        bulk.convert_binary(src, dst, "Pressure", "PSI", "Bar")
+        seconds = time.perf_counter() - start
+        results["bulk_binary_mb_s"] = (os.path.getsize(src) / seconds / 1e6, "higher")
+
+
+def bench_cache(results, quick):
+    cache = ResponseCache(maxsize=1024)
+    key = prompt_key("What is 1 km in miles?")
+    cache.set(key, "0.621371")
+    n = 20000 if quick else 200000
+    results["cache_hit_us"] = (per_call_us(lambda: cache.get(key), n), "lower")
+    results["cache_hit_with_key_us"] = (per_call_us(
+        lambda: cache.get(prompt_key("What is 1 km in miles?")), n), "lower")
+
+    # Scripted chats asking the same questions in different orders, each followed by a
+    # follow-up: how many prompts the exact cache answers once the context keeps growing
+    chats = ResponseCache(maxsize=1024)
+    questions = ["What is a Kelvin?", "How many feet are in a mile?", "What is a nautical mile?",
+                 "Why does the US use Fahrenheit?", "What is the SI unit of pressure?"]
+    served = total = 0
+    for session in range(5):
+        context = ""
+        for question in questions[session:] + questions[:session]:
+            for prompt in (question, "and in metric?"):
+                key = prompt_key(prompt, context)
+                total += 1
+                if chats.get(key) is not None:
+                    served += 1
+                else:
+                    chats.set(key, "answer")
+                context += f"User: {prompt}\nAssistant: answer\n"
+    results["chat_cache_served_pct"] = (100.0 * served / total, "higher")
+
+    # Reworded FAQ prompts: how many the near-duplicate cache answers, and what a lookup costs
+    similar = SimilarPromptCache(maxsize=1024)
+    faq = ["What is a Kelvin?", "How do I convert Celsius to Fahrenheit?", "What is 1 km in miles?"]
+    reworded = ["what's a kelvin", "Whats a Kelvin??", "what is kelvin", "how to convert celsius into fahrenheit",
+                "How do you convert Celsius to Fahrenheit", "what's 1 km in mi", "What is 1 kilometer in miles",
+                "what is a meter", "What is 2 km in miles?"]
+    for prompt in faq:
+        similar.set(prompt, "answer")
+    served = sum(similar.get(prompt) is not None for prompt in reworded)
+    results["similar_cache_served_pct"] = (100.0 * served / len(reworded), "higher")
+    results["similar_cache_lookup_us"] = (per_call_us(
+        lambda: similar.get("what's the Kelvin"), n // 10), "lower")
+
+
+def bench_http(results, quick):
+    """Keep-alive GET /convert throughput against a spawned service process"""
+    port = load_http.free_port()
+    proc = load_http.spawn_server(port)
+    try:
+        stats = asyncio.run(load_http.run_load("127.0.0.1", port, connections=16, seconds=2 if quick else 10))
+    finally:
+        proc.terminate()
+        proc.wait()
+    results["http_convert_rps"] = (stats["rps"], "higher")
+    results["http_convert_p99_ms"] = (stats["p99_ms"], "lower")
+
+
+def import_ms(module):
+    """Cold import time of a module in a fresh interpreter, best of 3 (None if it can't import)"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    best = None
+    for _ in range(3):
+        proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode:
+            return None
+        seconds = float(proc.stdout.strip().splitlines()[-1])
+        best = seconds if best is None else min(best, seconds)
+    return best * 1e3
+
+
+def bench_startup(results, quick):
+    for module in ("components.intent", "components.converter"):
+        ms = import_ms(module)
+        if ms is None:
+            print(f"Skipping import time of {module} (import failed)", file=sys.stderr)
+            continue
+        results[f"import_{module.split('.')[-1]}_ms"] = (ms, "lower")
+
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError as e:
+        print(f"Skipping rerun benchmark ({e})", file=sys.stderr)
+        return
+    app = AppTest.from_file(os.path.join(ROOT, "unit-converter.py"), default_timeout=60)
+    start = time.perf_counter()
+    app.run()
+    results["app_first_run_ms"] = ((time.perf_counter() - start) * 1e3, "lower")
+    best = float("inf")
+    for _ in range(3 if quick else 10):
+        start = time.perf_counter()
+        app.run()
+        best = min(best, time.perf_counter() - start)
+    results["app_rerun_ms"] = (best * 1e3, "lower")
+
+
+def run_load(results, name, calls, concurrency, stub):
+    """Fire calls from concurrency threads, record throughput, p50/p95 and upstream usage"""
+    stub.calls = stub.rate_limited = 0
+    latencies = []
+
+    def timed(call):
+        start = time.perf_counter()
+        try:
+            call()
+        except Exception:
+            # Retries exhausted; still counts as a (slow) request
+            pass
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, calls))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    results[f"load_{name}_rps"] = (len(calls) / elapsed, "higher")
+    results[f"load_{name}_p50_ms"] = (statistics.median(latencies) * 1e3, "lower")
+    results[f"load_{name}_p95_ms"] = (latencies[max(0, int(len(latencies) * 0.95) - 1)] * 1e3, "lower")
+    results[f"load_{name}_upstream_calls"] = (stub.calls, "lower")
+    results[f"load_{name}_429s"] = (stub.rate_limited, "info")
+
+
+def load_test(results, quick, latency, rate_limit_ratio, concurrency):
+    """Concurrent LLM traffic against the stub client, through the async layer and the app"""
+    stub = StubCohereClient(latency=latency, jitter=latency / 2, rate_limit_ratio=rate_limit_ratio, seed=0)
+    requests = 100 if quick else 1000
+    # A realistic mix: popular questions repeat, so coalescing and the cache matter
+    prompts = [f"Tell me about measurement system #{i % (requests // 4)}" for i in range(requests)]
+
+    llm = LLMClient(stub, max_concurrency=8, timeout=10.0, retries=3, backoff=0.05)
+    run_load(results, "llm", [lambda p=p: llm.chat(p) for p in prompts], concurrency, stub)
+    ttft = []
+    for p in prompts[:20]:
+        start = time.perf_counter()
+        next(iter(llm.stream(p)))
+        ttft.append(time.perf_counter() - start)
+    results["load_llm_ttft_p50_ms"] = (statistics.median(ttft) * 1e3, "lower")
+
+    # The app-level clients go through the shared rate limiter; don't let it cap the benchmark
+    os.environ.setdefault("LLM_RATE_PER_MINUTE", "1000000")
+    os.environ.setdefault("LLM_BURST", "1000")
+    try:
+        from components.chat import ChatInterface
+        from components.converter import UnitConverter
+        from components.cache import RESPONSE_CACHE
+    except ImportError as e:
+        print(f"Skipping app-level load tests ({e})", file=sys.stderr)
+        return
+    RESPONSE_CACHE.clear()
+    chat = ChatInterface(stub)
+    converter = UnitConverter(stub)
+    conversions = [(i % 50, "Smoots", "Meters") for i in range(requests)]
+    run_load(results, "chat", [lambda p=p: chat.get_response(p) for p in prompts], concurrency, stub)
+    run_load(results, "llm_convert",
+             [lambda c=c: converter.convert(c[0], c[1], c[2], "Length") for c in conversions], concurrency, stub)
+
+
+def compare(results, baseline, threshold):
+    """Return the list of regressions beyond threshold"""
+    regressions = []
+    for name, entry in sorted(results.items()):
+        value, direction = entry["value"], entry["direction"]
+        base = baseline.get(name, {}).get("value")
+        if base is None or direction == "info" or not base:
+            status = "new" if base is None else "info"
+        else:
+            change = (value - base) / base if direction == "higher" else (base - value) / base
+            # change < 0 means worse
+            status = f"{change:+.1%}"
+            if change < -threshold:
+                regressions.append(name)
+                status += "  REGRESSION"
+        print(f"{name:36s} {value:14.3f}  {status}")
+    return regressions
+
+
+def host():
+    """What a baseline has to match before its timings are comparable"""
+    return {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run conversion benchmarks and load tests")
+    parser.add_argument("--quick", action="store_true", help="Smaller sizes and fewer requests")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Save results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Allowed regression (fraction)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub LLM latency in seconds")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.05, help="Share of stub calls that 429")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent load-test clients")
+    parser.add_argument("--skip-load", action="store_true", help="Skip the stub LLM load tests")
+    args = parser.parse_args(argv)
+
+    raw = {}
+    for bench in (bench_scalar, bench_convert_many, bench_resolution, bench_bulk, bench_cache, bench_startup,
+                  bench_http):
+        bench(raw, args.quick)
+    if not args.skip_load:
+        load_test(raw, args.quick, args.latency, args.rate_limit_ratio, args.concurrency)
+
+    results = {name: {"value": value, "direction": direction} for name, (value, direction) in raw.items()}
+    report = {
+        "host": host(),
+        "quick": args.quick,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    baseline, enforced = {}, False
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline = stored.get("results", {})
+        enforced = stored.get("host") == report["host"] and stored.get("quick") == args.quick
+        if not enforced:
+            print(f"Note: {args.baseline} was recorded on {stored.get('host')} (quick={stored.get('quick')}), "
+                  f"this is {report['host']} (quick={args.quick}); comparing for information only. "
+                  "Run with --update-baseline to record one for this machine.", file=sys.stderr)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if regressions and enforced:
+        print(f"{len(regressions)} metric(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+# Local stand-in for cohere.Client: configurable latency and 429 injection
+
+import random
+import threading
+import time
+
+
+class StubRateLimitError(Exception):
+    """Mimics the SDK's 429 error"""
+    http_status = 429
+
+    def __init__(self):
+        super().__init__("429 Too Many Requests (stub)")
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubStreamEvent:
+    event_type = "text-generation"
+
+    def __init__(self, text):
+        self.text = text
+
+
+class StubCohereClient:
+    """Answers chat() after a delay, failing a fraction of calls with a 429
+
+    latency is in seconds (jitter adds up to that much more at random), and
+    rate_limit_ratio is the probability of a 429. Counters are thread-safe.
+    """
+    def __init__(self, latency=0.2, jitter=0.0, rate_limit_ratio=0.0, tokens=20, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.tokens = tokens
+        self.calls = 0
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _delay_or_fail(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._random.random() < self.rate_limit_ratio
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if fail:
+                self.rate_limited += 1
+        time.sleep(delay if not fail else delay / 10)
+        if fail:
+            raise StubRateLimitError()
+
+    def chat(self, message, model="command", temperature=0.7, stream=False, **kwargs):
+        self._delay_or_fail()
+        if "Return ONLY the numerical value" in message:
+            return StubResponse("1.2345")
+        if stream:
+            return (StubStreamEvent(f"token{i} ") for i in range(self.tokens))
+        return StubResponse("stub " * self.tokens)
@@ -0,0 +1,12 @@
+"""Headless bulk converter, no Streamlit needed.
+
+Examples:
+    python bulk-convert.py readings.csv --category Temperature --from Celsius --to Kelvin
+    cat dump.jsonl | python bulk-convert.py --format jsonl --category Length --from Meters --to Millimeters
+    python bulk-convert.py pressure.f32 --category Pressure --from PSI --to Bar --output bar.npy
+"""
+import sys
+from components.bulk import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,55 @@
 import os
+import threading
+import uuid
 from dotenv import load_dotenv
 import streamlit as st
 import cohere
+from .ratelimit import get_limiter
+
+# One Cohere client per process, shared by every session and rerun
+_client_lock = threading.Lock()
+_clients = {}
+_env_loaded = False
+
+def load_env():
+    """Read .env once per process instead of on every rerun"""
+    global _env_loaded
+    if not _env_loaded:
+        load_dotenv()
+        _env_loaded = True
+
+def get_client_settings():
+    """Client tuning from the environment: pool size, timeout (s) and retries"""
+    load_env()
+    return {
+        'num_workers': int(os.getenv('COHERE_POOL_SIZE', '16')),
+        'timeout': float(os.getenv('COHERE_TIMEOUT', '30')),
+        # 429s are retried by LLMClient (llm.py); SDK retries on top would multiply attempts
+        'max_retries': int(os.getenv('COHERE_MAX_RETRIES', '0')),
+    }
+
+def get_client(api_key, **settings):
+    """Return the process-wide client for this key, creating it on first use"""
+    settings = {**get_client_settings(), **settings}
+    key = (api_key, tuple(sorted(settings.items())))
+    client = _clients.get(key)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(key)
+            if client is None:
+                # The key is validated once here, not on every rerun
+                client = cohere.Client(api_key, **settings)
+                _clients[key] = client
+    return client
+
+def get_user_id():
+    """Stable id for this browser session, used for fair-share rate limiting"""
+    if 'user_id' not in st.session_state:
+        st.session_state.user_id = uuid.uuid4().hex
+    return st.session_state.user_id
 
 def get_api_key():
-    load_dotenv()
+    load_env()
     api_key = os.getenv('COHERE_API_KEY')
     if not api_key:
         st.error("CoHERE API key not found in .env file!")
@@ -13,13 +58,16 @@ def get_api_key():
 def setup_sidebar():
     with st.sidebar:
         st.title("ℹ️ About Us")
-        if st.session_state.get('api_calls', 0) > 0:
-            daily_limit = 60
-            usage_percent = (st.session_state.api_calls / daily_limit) * 100
+        used, daily_limit = get_limiter().usage()
+        if daily_limit:
+            # Shared budget of the whole app, not just this session
+            usage_percent = (used / daily_limit) * 100
             st.markdown("### 📊 API Usage Today")
             if usage_percent > 80:
-                st.warning("⚠️ API limit almost reached!")
+                st.warning("⚠️ API limit almost reached! Built-in units keep working.")
             st.progress(min(usage_percent / 100, 1.0), text=f"{usage_percent:.1f}%")
+        if st.session_state.get('api_calls', 0) > 0:
+            st.caption(f"Your AI requests this session: {st.session_state.api_calls}")
         st.markdown("""
         ### 👨‍💻 Developer
         Muhammad Huzaifa
@@ -43,7 +91,7 @@ def setup_model():
         api_key = get_api_key()
         if not api_key:
             return None
-        co = cohere.Client(api_key)
+        co = get_client(api_key)
         st.session_state['cohere_client'] = co
         setup_sidebar()
         return co
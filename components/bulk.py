@@ -0,0 +1,238 @@
+# Headless bulk conversion of CSV / JSONL streams and binary columns (no Streamlit import)
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from itertools import islice
+
+import numpy as np
+
+from .conversion import resolve_units
+from .engine import ENGINE, UnknownUnitError
+
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_BLOCK_SIZE = 1 << 20  # elements per block for binary columns
+
+# Raw column files are little-endian, the dtype comes from the extension or --format
+BINARY_DTYPES = {"f32": np.dtype("<f4"), "f64": np.dtype("<f8")}
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of at most size items, so memory stays bounded"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def to_floats(items):
+    """Parse a chunk of values into a float64 block, invalid values become NaN"""
+    try:
+        return np.array(items, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.empty(len(items), dtype=np.float64)
+        for i, item in enumerate(items):
+            try:
+                out[i] = float(item)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+def convert_csv(infile, outfile, category, from_unit, to_unit, column="value",
+                header=True, output_column=None, chunk_size=DEFAULT_CHUNK_SIZE, engine=ENGINE):
+    """Stream a CSV file, converting one column chunk by chunk. Returns the row count."""
+    reader = csv.reader(infile)
+    writer = csv.writer(outfile, lineterminator="\n")
+    if header:
+        names = next(reader, None)
+        if names is None:
+            return 0
+        if column not in names:
+            raise ValueError(f"Column '{column}' not found in CSV header")
+        index = names.index(column)
+        if output_column:
+            names.append(output_column)
+        writer.writerow(names)
+    else:
+        if not str(column).isdigit():
+            raise ValueError(f"Without a header the column must be a 0-based index, not '{column}'")
+        index = int(column)
+
+    rows = 0
+    for chunk in iter_chunks(reader, chunk_size):
+        values = to_floats([row[index] if index < len(row) else "" for row in chunk])
+        engine.convert_many(values, from_unit, to_unit, category, out=values)
+        for row, result in zip(chunk, values.tolist()):
+            text = "" if math.isnan(result) else repr(result)
+            if output_column:
+                row.append(text)
+            elif index < len(row):
+                row[index] = text
+        writer.writerows(chunk)
+        rows += len(chunk)
+    return rows
+
+
+def convert_jsonl(infile, outfile, category, from_unit, to_unit, column="value",
+                  output_column=None, chunk_size=DEFAULT_CHUNK_SIZE, engine=ENGINE):
+    """Stream a JSONL file, converting one field chunk by chunk. Returns the record count."""
+    target = output_column or column
+    rows = 0
+    for chunk in iter_chunks((line for line in infile if line.strip()), chunk_size):
+        # A line that isn't an object ([1, 2], "x") is a bad value: it comes out as {target: null}
+        records = [record if isinstance(record, dict) else {}
+                   for record in (json.loads(line) for line in chunk)]
+        values = to_floats([record.get(column) for record in records])
+        engine.convert_many(values, from_unit, to_unit, category, out=values)
+        outfile.write("".join(
+            json.dumps(dict(record, **{target: None if math.isnan(result) else result})) + "\n"
+            for record, result in zip(records, values.tolist())
+        ))
+        rows += len(chunk)
+    return rows
+
+
+def open_column(path, dtype=None):
+    """Memory-map a .npy or raw little-endian float column read-only"""
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    return np.memmap(path, dtype=np.dtype(dtype or "<f8"), mode="r")
+
+
+def create_column(path, shape, dtype):
+    """Create a writable memory-mapped output column (.npy or raw)"""
+    if path.lower().endswith(".npy"):
+        return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+    return np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+
+
+def convert_binary(input_path, output_path, category, from_unit, to_unit, dtype=None,
+                   out_dtype=None, block_size=DEFAULT_BLOCK_SIZE, engine=ENGINE, converter=None):
+    """Convert a memory-mapped float column block by block. Returns the element count.
+
+    Neither file is ever loaded as a whole, so files larger than RAM work.
+    Pass a ParallelConverter to spread each block over several cores.
+    """
+    src = open_column(input_path, dtype)
+    # Validate the pair before creating the output file
+    engine.pair(from_unit, to_unit, category)
+    dst = create_column(output_path, src.shape, np.dtype(out_dtype) if out_dtype else src.dtype)
+    flat_src, flat_dst = src.reshape(-1), dst.reshape(-1)
+    for start in range(0, flat_src.size, block_size):
+        stop = start + block_size
+        if converter is not None:
+            converter.convert(flat_src[start:stop], from_unit, to_unit, category, out=flat_dst[start:stop])
+        else:
+            engine.convert_many(flat_src[start:stop], from_unit, to_unit, category, out=flat_dst[start:stop])
+    dst.flush()
+    return flat_src.size
+
+
+def detect_format(path):
+    """Guess the input format from the file extension"""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext in ("jsonl", "ndjson"):
+        return "jsonl"
+    if ext in ("npy", "f32", "f64"):
+        return ext
+    return "csv"
+
+
+def _convert_binary_parallel(args, fmt):
+    """Binary conversion across a worker pool, reports throughput and speedup on stderr"""
+    from .parallel import ParallelConverter, measure_speedup
+
+    block_size = args.chunk_size or DEFAULT_BLOCK_SIZE * args.workers
+    try:
+        with ParallelConverter(args.workers, mode=args.pool) as converter:
+            size = convert_binary(args.input, args.output, args.category, args.from_unit, args.to_unit,
+                                  dtype=BINARY_DTYPES.get(fmt), out_dtype=BINARY_DTYPES.get(args.out_dtype),
+                                  block_size=block_size, converter=converter)
+            sample = open_column(args.input, BINARY_DTYPES.get(fmt)).reshape(-1)[:block_size]
+            serial, parallel, speedup = measure_speedup(converter, sample, args.from_unit, args.to_unit, args.category)
+            seconds = converter.seconds
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    rate = size / seconds / 1e6 if seconds else float("inf")
+    print(f"Converted {size} values in {seconds:.3f}s ({rate:.1f} M values/s) with {args.workers} "
+          f"{args.pool} workers, {speedup:.2f}x vs 1 worker ({serial * 1e3:.2f}ms vs {parallel * 1e3:.2f}ms "
+          f"on a {sample.size}-value block)", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Convert a column of values in a CSV/JSONL stream or a binary float column")
+    parser.add_argument("input", nargs="?", default="-", help="Input file, '-' for stdin")
+    parser.add_argument("--category", help='Unit category, e.g. "Length" (default: inferred from the units)')
+    parser.add_argument("--from", dest="from_unit", required=True, help='Source unit or alias, e.g. "Meters" or "m"')
+    parser.add_argument("--to", dest="to_unit", required=True, help='Target unit or alias, e.g. "Millimeters" or "mm"')
+    parser.add_argument("--format", choices=["csv", "jsonl", "npy", "f32", "f64"],
+                        help="Input format (default: from file extension, else csv)")
+    parser.add_argument("--output", help="Output file, required for binary formats (.npy or raw)")
+    parser.add_argument("--out-dtype", choices=["f32", "f64"], help="Output dtype for binary formats (default: input dtype)")
+    parser.add_argument("--column", help='Column / field holding the values (default "value", '
+                                         '0-based index with --no-header)')
+    parser.add_argument("--output-column", help="Write results to a new column instead of replacing the input")
+    parser.add_argument("--no-header", action="store_true", help="CSV input has no header row")
+    parser.add_argument("--chunk-size", type=int, help="Rows (or binary elements) per block")
+    parser.add_argument("--workers", type=int, default=1, help="Worker count for binary formats (default: 1)")
+    parser.add_argument("--pool", choices=["thread", "process"], default="thread",
+                        help="Threads (NumPy releases the GIL) or processes over shared memory")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fmt = args.format or detect_format(args.input)
+
+    resolved = resolve_units(args.from_unit, args.to_unit, args.category)
+    if resolved is None or not ENGINE.can_convert(resolved[1], resolved[2], resolved[0]):
+        where = f" in {args.category}" if args.category else ""
+        print(f"Error: cannot convert {args.from_unit} to {args.to_unit}{where}", file=sys.stderr)
+        return 2
+    args.category, args.from_unit, args.to_unit = resolved
+
+    if fmt == "csv" and args.no_header and not (args.column or "").isdigit():
+        print("Error: --no-header needs a numeric --column (0-based index)", file=sys.stderr)
+        return 2
+    args.column = args.column or "value"
+
+    if fmt in ("npy", "f32", "f64"):
+        if args.input == "-" or not args.output:
+            print("Error: binary formats need an input file and --output", file=sys.stderr)
+            return 2
+        if args.workers > 1:
+            return _convert_binary_parallel(args, fmt)
+        try:
+            convert_binary(args.input, args.output, args.category, args.from_unit, args.to_unit,
+                           dtype=BINARY_DTYPES.get(fmt), out_dtype=BINARY_DTYPES.get(args.out_dtype),
+                           block_size=args.chunk_size or DEFAULT_BLOCK_SIZE)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    chunk_size = args.chunk_size or DEFAULT_CHUNK_SIZE
+    infile = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    try:
+        if fmt == "jsonl":
+            convert_jsonl(infile, sys.stdout, args.category, args.from_unit, args.to_unit,
+                          column=args.column, output_column=args.output_column, chunk_size=chunk_size)
+        else:
+            convert_csv(infile, sys.stdout, args.category, args.from_unit, args.to_unit,
+                        column=args.column, header=not args.no_header,
+                        output_column=args.output_column, chunk_size=chunk_size)
+    except (ValueError, UnknownUnitError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+    return 0
@@ -0,0 +1,176 @@
+# Process-wide LRU/TTL cache for LLM responses, optionally backed by SQLite
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .metrics import METRICS
+
+
+def conversion_key(value, from_unit, to_unit):
+    """Normalized cache key for a conversion"""
+    return f"convert:{float(value)!r}:{from_unit.strip().lower()}:{to_unit.strip().lower()}"
+
+
+# Prompts that lean on earlier turns: "and in feet?", "convert it to grams", "what about that one"
+FOLLOW_UP_RE = re.compile(
+    r"^\s*(and|or|but|also|so|then|what about|how about)\b"
+    r"|\b(it|its|that|this|these|those|them|they|same|again|instead|previous|above|earlier|last)\b",
+    re.IGNORECASE,
+)
+
+
+def context_digest(context):
+    """Short stable digest of the chat context sent with a prompt ('' for none)"""
+    return hashlib.sha1(context.encode("utf-8")).hexdigest()[:16] if context else ""
+
+
+def is_follow_up(prompt):
+    """True when the prompt only makes sense with the earlier turns (very short ones count too)"""
+    return bool(FOLLOW_UP_RE.search(prompt)) or len(prompt.split()) <= 2
+
+
+def cache_scope(prompt, context=""):
+    """Context digest for follow-ups, '' for self-contained prompts
+
+    The context changes every turn, so keying every prompt on it would make the
+    cache useless after the first message. A self-contained question ("what is a
+    kelvin?") is shared across conversations; the trade-off is that its cached
+    answer doesn't reflect earlier turns.
+    """
+    return context_digest(context) if context and is_follow_up(prompt) else ""
+
+
+def prompt_key(prompt, context=""):
+    """Normalized cache key for a chat prompt (case and whitespace insensitive)
+
+    Follow-ups ("and in feet?") depend on the conversation, so for those the
+    context digest is part of the key (see cache_scope).
+    """
+    key = "chat:" + " ".join(prompt.lower().split())
+    scope = cache_scope(prompt, context)
+    if scope:
+        key += "|" + scope
+    return key
+
+
+class ResponseCache:
+    """Bounded, thread-safe LRU cache with a TTL
+
+    With a path, entries are also written to SQLite so they survive reloads and
+    are shared between processes. Memory misses fall through to the database.
+    """
+    def __init__(self, maxsize=1024, ttl=24 * 3600, path=None, disk_maxsize=100000):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_maxsize = disk_maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writes = 0
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)"
+            )
+
+    def get(self, key, default=None):
+        """Return the stored value, or default if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Store a JSON-serializable value"""
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store(key, value, expires)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires)
+                )
+                self._writes += 1
+                if self._writes % 1000 == 0:
+                    self._prune_disk()
+
+    def _store(self, key, value, expires):
+        self._data[key] = (value, expires)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def _prune_disk(self):
+        self._db.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        self._db.execute(
+            "DELETE FROM cache WHERE key NOT IN "
+            "(SELECT key FROM cache ORDER BY expires DESC LIMIT ?)", (self.disk_maxsize,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Shared by every session in the process. Set UNIT_CONVERTER_CACHE_DB to persist it.
+RESPONSE_CACHE = ResponseCache(
+    maxsize=int(os.getenv("UNIT_CONVERTER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("UNIT_CONVERTER_CACHE_TTL", str(24 * 3600))),
+    path=os.getenv("UNIT_CONVERTER_CACHE_DB"),
+)
+
+
+def _cache_metrics():
+    stats = RESPONSE_CACHE.stats()
+    return [
+        ("unit_converter_cache_hits_total", "counter", "Response cache hits", stats["hits"]),
+        ("unit_converter_cache_misses_total", "counter", "Response cache misses", stats["misses"]),
+        ("unit_converter_cache_hit_ratio", "gauge", "Response cache hit rate since start", stats["hit_rate"]),
+        ("unit_converter_cache_entries", "gauge", "Entries in the in-memory response cache", stats["size"]),
+    ]
+
+
+METRICS.register_collector(_cache_metrics)
@@ -1,71 +1,156 @@
 import streamlit as st
-from .api_config import get_api_key
+from .api_config import get_api_key, get_user_id
+from .cache import RESPONSE_CACHE, cache_scope, prompt_key
+from .history import ChatHistory
+from .llm import get_llm
+from .prompt_cache import PROMPT_CACHE
+from .ratelimit import BudgetExceeded
+from .styles import CHAT_STYLE
+from . import intent
+
+BUSY_MESSAGE = ("The AI assistant is at capacity right now. Conversions like "
+                "'5 km in miles' still work instantly, or try again in a minute.")
+
+SYSTEM_PROMPT = """You are a friendly and helpful AI assistant who specializes in unit conversions and measurements. 
+            When asked about units or conversions, provide accurate technical information. 
+            For general conversation, respond naturally while occasionally relating to measurement concepts when relevant."""
+
+
+def get_history():
+    """This session's bounded chat history"""
+    if 'chat_history' not in st.session_state:
+        st.session_state.chat_history = ChatHistory()
+    return st.session_state.chat_history
+
+
+def render_history(history):
+    """Show the latest page of messages, older pages only on request"""
+    if history.pages() > 1:
+        with st.expander("Older messages"):
+            older = st.number_input("Page", min_value=1, max_value=history.pages() - 1, value=1,
+                                    help="1 is the page just before the latest messages")
+            for message in history.page(older):
+                with st.chat_message(message["role"]):
+                    st.markdown(message["content"])
+            if history.summary:
+                st.caption(f"Earlier topics: {history.summary}")
+    for message in history.page(0):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
 
 class ChatInterface:
-    def __init__(self, model):
+    def __init__(self, model, cache=RESPONSE_CACHE, similar=PROMPT_CACHE):
         self.model = model
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
-        if "response_cache" not in st.session_state:
-            st.session_state.response_cache = {}
+        self.llm = get_llm(model) if model else None
+        self.cache = cache
+        self.similar = similar
+
+    def cached(self, prompt, context):
+        """Answer from the exact cache, else from a near-duplicate of the prompt, else None"""
+        cached = self.cache.get(prompt_key(prompt, context))
+        if cached is None:
+            cached = self.similar.get(prompt, cache_scope(prompt, context))
+        return cached
+
+    def remember(self, prompt, context, response):
+        self.cache.set(prompt_key(prompt, context), response)
+        self.similar.set(prompt, response, cache_scope(prompt, context))
+
+    def context(self):
+        """Recent turns (and a summary of dropped ones) that fit the prompt token budget"""
+        summary, recent = get_history().context()
+        lines = [f"(Earlier the user asked about: {summary})"] if summary else []
+        lines += [f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in recent]
+        return "".join(line + "\n" for line in lines)
+
+    def build_prompt(self, prompt, context=""):
+        return f"{SYSTEM_PROMPT}\n\n{context}User: {prompt}\nAssistant:"
 
     def get_response(self, prompt):
-        """Get AI response for user input, only responds the first time"""
-        # Check if prompt has been processed before
-        if prompt.lower() in st.session_state.response_cache:
-            return None
+        """Get AI response for user input, repeated prompts are served from the shared cache"""
+        local = intent.answer(prompt)
+        if local is not None:
+            return local
+        context = self.context()
+        cached = self.cached(prompt, context)
+        if cached is not None:
+            return cached
         
         try:
-            system_prompt = """You are a friendly and helpful AI assistant who specializes in unit conversions and measurements. 
-            When asked about units or conversions, provide accurate technical information. 
-            For general conversation, respond naturally while occasionally relating to measurement concepts when relevant."""
-            
-            full_prompt = f"{system_prompt}\n\nUser: {prompt}\nAssistant:"
-            
-            response = self.model.chat(
+            response = self.llm.chat(
                 model='command',
-                message=full_prompt,
-                temperature=0.7
+                message=self.build_prompt(prompt, context),
+                temperature=0.7,
+                user=get_user_id()
             )
             
             response_text = response.text.strip()
             
-            # Mark prompt as processed in cache (case-insensitive)
-            st.session_state.response_cache[prompt.lower()] = True
+            self.remember(prompt, context, response_text)
             if 'api_calls' in st.session_state:
                 st.session_state.api_calls += 1
             return response_text
             
+        except BudgetExceeded:
+            return BUSY_MESSAGE
         except Exception as e:
             st.error(f"API Error: {str(e)}")
             return "I'm having temporary connection issues. Please try again!"
 
+    def stream_response(self, prompt):
+        """Yield the AI response token by token, cached and local answers come back in one piece"""
+        local = intent.answer(prompt)
+        if local is not None:
+            yield local
+            return
+        context = self.context()
+        cached = self.cached(prompt, context)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        ttft = []
+        try:
+            for chunk in self.llm.stream(model='command', message=self.build_prompt(prompt, context),
+                                         temperature=0.7, user=get_user_id(), on_ttft=ttft.append):
+                parts.append(chunk)
+                yield chunk
+        except BudgetExceeded:
+            if not parts:
+                yield BUSY_MESSAGE
+            return
+        except Exception as e:
+            st.error(f"API Error: {str(e)}")
+            if not parts:
+                yield "I'm having temporary connection issues. Please try again!"
+            return
+
+        if ttft:
+            st.session_state['last_ttft'] = ttft[0]
+        self.remember(prompt, context, "".join(parts).strip())
+        if 'api_calls' in st.session_state:
+            st.session_state.api_calls += 1
+
+    def respond(self, prompt):
+        """Show the user message and stream the assistant reply into the chat, then store both"""
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        with st.chat_message("assistant"):
+            response = st.write_stream(self.stream_response(prompt))
+        history = get_history()
+        history.append("user", prompt)
+        if response:
+            history.append("assistant", response)
+        return response
+
     def render(self):
-        st.markdown("""
-            <style>
-            .chat-container {max-width: 800px; margin: 0 auto;}
-            .chat-message {padding: 0.8rem; margin: 0.5rem 0; border-radius: 12px; word-wrap: break-word;}
-            .user-message {background: #e3f2fd; margin-left: 1rem; margin-right: 0;}
-            .assistant-message {background: #f5f5f5; margin-right: 1rem; margin-left: 0;}
-            @media (max-width: 768px) {
-                .chat-message {margin: 0.5rem; font-size: 0.9rem;}
-                .chat-input {padding: 0.5rem;}
-            }
-            </style>
-        """, unsafe_allow_html=True)
+        st.markdown(CHAT_STYLE, unsafe_allow_html=True)
         
         st.subheader("Chat with Unit Conversion Expert")
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
+        # The interface is shared across sessions, so history lives in the session
+        render_history(get_history())
 
         if prompt := st.chat_input("Ask anything about units, conversions, or just chat!"):
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            with st.chat_message("user"):
-                st.markdown(prompt)
-            with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
-                    response = self.get_response(prompt)
-                    if response:
-                        st.markdown(response)
-                        st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
+            self.respond(prompt)
@@ -0,0 +1,187 @@
+"""Column adapters: a pandas `.units` accessor and Arrow compute helpers
+
+Importing this module registers the accessor when pandas is installed:
+
+    import components.columns
+    df.units.convert("height", "ft", "m")                 # replace the column
+    df.units.convert("height", "ft", "cm", into="height_cm")
+    df["temp"].units.convert("Celsius", "Fahrenheit")     # Series -> new Series
+
+    table = convert_table(table, "height", "ft", "m")     # pyarrow.Table
+    register_arrow_function()                             # pc.call_function("convert_units", ...)
+
+Unit names and aliases resolve through the registry built from unit_config.py.
+Values go straight from the column buffers into one vectorized multiply-add, no
+Python objects per row. Nulls and NaNs stay null / NaN. With record=True the target
+unit is kept in DataFrame/Series.attrs or the Arrow field metadata, and a later
+convert without from_unit reads it from there.
+"""
+
+import numpy as np
+
+from .conversion import resolve_units
+from .engine import ENGINE, UnknownUnitError
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = pc = None
+
+UNIT_KEY = "unit"
+CATEGORY_KEY = "category"
+
+
+def resolve_pair(from_unit, to_unit, category=None, engine=ENGINE):
+    """Canonical (category, from_unit, to_unit, scale, shift) for a unit pair"""
+    resolved = resolve_units(from_unit, to_unit, category) if from_unit and to_unit else None
+    if resolved is None or not engine.can_convert(resolved[1], resolved[2], resolved[0]):
+        where = f" in '{category}'" if category else ""
+        raise UnknownUnitError(f"Can't convert '{from_unit}' to '{to_unit}'{where}")
+    category, from_unit, to_unit = resolved
+    scale, shift = engine.pair(from_unit, to_unit, category)
+    return category, from_unit, to_unit, scale, shift
+
+
+def _masked(values):
+    """True for pandas nullable dtypes (Float64, Int64, ...) that use pd.NA"""
+    return isinstance(values.dtype, pd.api.extensions.ExtensionDtype) and values.dtype.kind in "fiu"
+
+
+def convert_series(series, from_unit=None, to_unit=None, category=None, record=True, engine=ENGINE):
+    """Converted copy of a numeric Series; from_unit defaults to series.attrs["unit"]"""
+    from_unit = from_unit or series.attrs.get(UNIT_KEY)
+    category = category or series.attrs.get(CATEGORY_KEY)
+    category, from_unit, to_unit, _, _ = resolve_pair(from_unit, to_unit, category, engine)
+    # float64 columns are read without a copy; other dtypes are cast once, NA -> NaN
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    result = engine.convert_many(values, from_unit, to_unit, category)
+    if _masked(series):
+        result = pd.array(result, dtype="Float64")
+    out = pd.Series(result, index=series.index, name=series.name, copy=False)
+    out.attrs.update(series.attrs)
+    if record:
+        out.attrs[UNIT_KEY], out.attrs[CATEGORY_KEY] = to_unit, category
+    return out
+
+
+if pd is not None:
+    @pd.api.extensions.register_series_accessor("units")
+    class SeriesUnitsAccessor:
+        """series.units: unit of the Series and conversion to another unit"""
+        def __init__(self, series):
+            self._series = series
+
+        @property
+        def unit(self):
+            return self._series.attrs.get(UNIT_KEY)
+
+        def convert(self, from_unit=None, to_unit=None, category=None, record=True):
+            """Converted copy; call as convert("ft", "m") or convert(to_unit="m") when the unit is recorded"""
+            return convert_series(self._series, from_unit, to_unit, category, record)
+
+    @pd.api.extensions.register_dataframe_accessor("units")
+    class DataFrameUnitsAccessor:
+        """df.units: per-column units (kept in df.attrs["units"]) and column conversion"""
+        def __init__(self, frame):
+            self._frame = frame
+
+        def unit_of(self, column):
+            return self._frame.attrs.get("units", {}).get(column, {}).get(UNIT_KEY)
+
+        def convert(self, column, from_unit=None, to_unit=None, category=None, into=None, record=True):
+            """Convert a column in place (or into a new column) and return the DataFrame
+
+            from_unit defaults to the unit recorded for the column.
+            """
+            recorded = self._frame.attrs.get("units", {}).get(column, {})
+            converted = convert_series(self._frame[column], from_unit or recorded.get(UNIT_KEY), to_unit,
+                                       category or recorded.get(CATEGORY_KEY), record=True)
+            target = into or column
+            self._frame[target] = converted
+            if record:
+                self._frame.attrs.setdefault("units", {})[target] = {
+                    UNIT_KEY: converted.attrs[UNIT_KEY], CATEGORY_KEY: converted.attrs[CATEGORY_KEY]}
+            return self._frame
+
+
+def _field_units(field):
+    """(unit, category) recorded in an Arrow field's metadata, or (None, None)"""
+    metadata = field.metadata or {}
+    unit, category = metadata.get(UNIT_KEY.encode()), metadata.get(CATEGORY_KEY.encode())
+    return (unit.decode() if unit else None), (category.decode() if category else None)
+
+
+def convert_arrow(values, from_unit, to_unit, category=None, engine=ENGINE, memory_pool=None):
+    """Convert a pyarrow Array or ChunkedArray with Arrow compute kernels
+
+    The kernels run over the column buffers chunk by chunk and keep the validity
+    bitmap, so nulls stay null. Integer and float32 columns come back as float64.
+    """
+    if pa is None:
+        raise RuntimeError("Install 'pyarrow' to convert Arrow columns")
+    _, _, _, scale, shift = resolve_pair(from_unit, to_unit, category, engine)
+    if values.type != pa.float64():
+        values = pc.cast(values, pa.float64(), memory_pool=memory_pool)
+    result = pc.multiply(values, pa.scalar(scale), memory_pool=memory_pool)
+    if shift:
+        result = pc.add(result, pa.scalar(shift), memory_pool=memory_pool)
+    return result
+
+
+def convert_table(table, column, from_unit=None, to_unit=None, category=None, into=None,
+                  record=True, engine=ENGINE):
+    """New Table with column converted (replaced, or added as into); units go in the field metadata"""
+    index = table.schema.get_field_index(column)
+    if index < 0:
+        raise KeyError(f"Column '{column}' not found")
+    recorded_unit, recorded_category = _field_units(table.schema.field(index))
+    category, from_unit, to_unit, _, _ = resolve_pair(
+        from_unit or recorded_unit, to_unit, category or recorded_category, engine)
+    result = convert_arrow(table.column(index), from_unit, to_unit, category, engine)
+    field = pa.field(into or column, pa.float64())
+    if record:
+        field = field.with_metadata({UNIT_KEY: to_unit, CATEGORY_KEY: category})
+    if into and into != column:
+        existing = table.schema.get_field_index(into)
+        if existing < 0:
+            return table.append_column(field, result)
+        index = existing
+    return table.set_column(index, field, result)
+
+
+def register_arrow_function(name="convert_units", engine=ENGINE):
+    """Register an Arrow compute function: pc.call_function(name, [values, from_unit, to_unit, category])
+
+    The unit arguments must be string scalars; pass "" as category to infer it.
+    Registering the same name twice is a no-op. Returns the function name.
+    """
+    if pa is None:
+        raise RuntimeError("Install 'pyarrow' to register Arrow compute functions")
+    try:
+        pc.get_function(name)
+        return name
+    except KeyError:
+        pass
+
+    def kernel(ctx, values, from_unit, to_unit, category):
+        units = []
+        for arg in (from_unit, to_unit, category):
+            if not isinstance(arg, pa.Scalar):
+                raise ValueError("Unit and category arguments must be scalars")
+            units.append(arg.as_py() or None)
+        return convert_arrow(values, *units, engine=engine, memory_pool=ctx.memory_pool)
+
+    pc.register_scalar_function(
+        kernel, name,
+        {"summary": "Convert values between units",
+         "description": "Multiply-add conversion between two units of the unit registry; nulls stay null."},
+        {"values": pa.float64(), "from_unit": pa.string(), "to_unit": pa.string(), "category": pa.string()},
+        pa.float64(),
+    )
+    return name
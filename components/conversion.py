@@ -0,0 +1,66 @@
+# Streamlit-free conversion front end shared by the UI and the HTTP service
+
+from collections import namedtuple
+
+from .engine import ENGINE, UnknownUnitError
+from .expressions import CUSTOM_CATEGORY, DimensionError, convert_expression, overrides_registry
+from .unit_index import INDEX
+
+# path says how it was answered: "table", "alias", "exact" or "expression"
+Conversion = namedtuple("Conversion", "result path category from_unit to_unit")
+
+
+def resolve_units(from_unit, to_unit, category=None, index=INDEX):
+    """Canonical (category, from_unit, to_unit) for unit names or aliases, or None"""
+    if category:
+        category = next((name for name in index.units if name.lower() == category.lower()), category)
+        from_ref = index.resolve(from_unit, category)
+        to_ref = index.resolve(to_unit, category)
+        pair = (from_ref, to_ref) if from_ref and to_ref else None
+    else:
+        pair = index.resolve_pair(from_unit, to_unit)
+    # "Mb" and "Mm" are megabits and megameters, not the "mb"/"mm" aliases
+    if pair is None or overrides_registry(from_unit) or overrides_registry(to_unit):
+        return None
+    return pair[0].category, pair[0].unit, pair[1].unit
+
+
+def convert_local(value, from_unit, to_unit, category=None, exact=False, engine=ENGINE):
+    """Convert without the LLM: factor tables, then aliases/typos, then unit expressions
+
+    Without a category it is inferred from the units. exact=True returns a Fraction.
+    Raises UnknownUnitError when nothing local knows the units, DimensionError for
+    bad or mismatched expressions and ValueError for values that aren't numbers.
+    """
+    if category == CUSTOM_CATEGORY:
+        return Conversion(convert_expression(value, from_unit, to_unit), "expression",
+                          CUSTOM_CATEGORY, from_unit, to_unit)
+    path = "table"
+    if not (category and engine.can_convert(from_unit, to_unit, category)):
+        resolved = resolve_units(from_unit, to_unit, category)
+        if resolved is None and category is None:
+            # Not registry units; maybe compound expressions like "kWh/100km"
+            try:
+                return convert_local(value, from_unit, to_unit, CUSTOM_CATEGORY)
+            except DimensionError:
+                pass
+        if resolved is None:
+            raise UnknownUnitError(f"Can't convert '{from_unit}' to '{to_unit}'"
+                                   + (f" in '{category}'" if category else ""))
+        path = "alias" if category else "table"
+        category, from_unit, to_unit = resolved
+    if exact:
+        result = engine.convert_exact(value, from_unit, to_unit, category)
+        return Conversion(result, "exact", category, from_unit, to_unit)
+    return Conversion(engine.convert(value, from_unit, to_unit, category), path, category, from_unit, to_unit)
+
+
+def convert_all_local(value, from_unit, category=None, engine=ENGINE, index=INDEX):
+    """value in every unit of from_unit's category; returns (category, from_unit, units, results)"""
+    if not (category and from_unit in engine.get_category(category).ids):
+        ref = index.resolve(from_unit, category)
+        if ref is None:
+            raise UnknownUnitError(f"Unknown unit '{from_unit}'" + (f" in '{category}'" if category else ""))
+        category, from_unit = ref.category, ref.unit
+    units, results = engine.convert_all(value, from_unit, category)
+    return category, from_unit, units, results
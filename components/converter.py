@@ -1,50 +1,65 @@
 import streamlit as st
 import re
-from streamlit_webrtc import webrtc_streamer, AudioProcessorBase, WebRtcMode
-import speech_recognition as sr
+import time
 from .ui_components import UIComponents
-from .unit_config import UnitCategories
-from .chat import ChatInterface
+from .registry import get_registry
+from .chat import ChatInterface, get_history, render_history
+from .engine import ENGINE, UnknownUnitError, to_fraction
+from .cache import RESPONSE_CACHE, conversion_key
+from .llm import get_llm
+from .ratelimit import PRIORITY_CONVERSION, BudgetExceeded
+from .api_config import get_user_id
+from . import intent
+from .unit_index import INDEX
+from .expressions import CUSTOM_CATEGORY, DimensionError
+from .conversion import convert_all_local, convert_local
+from .formatting import format_significant
+from .metrics import CONVERSION_SECONDS
+
+# How often the page checks for new voice transcripts while the speech worker runs
+VOICE_POLL_SECONDS = 0.5
 
 class VoiceInterface:
     def __init__(self, converter):
         self.converter = converter
 
     def render_voice_button(self):
-        st.markdown("""
-            <style>
-            .stButton > button {
-                width: 38px !important;
-                height: 38px !important;
-                border-radius: 50% !important;
-                border: 2px solid #FF6B00 !important;
-                background: transparent !important;
-                padding: 0 !important;
-                transition: all 0.3s ease !important;
-                display: flex !important;
-                align-items: center !important;
-                justify-content: center !important;
-                font-size: 18px !important;
-                color: #FF6B00 !important;
-                line-height: 38px !important;
-            }
-            .stButton > button:hover {
-                background: rgba(255, 107, 0, 0.1) !important;
-            }
-            </style>
-        """, unsafe_allow_html=True)
-        if st.button("⏺", key="voice_button", help="Click to speak"):
-            text = self.listen_and_transcribe()
-            if text:
-                self.process_voice_command(text)
+        active = st.session_state.get('voice_active', False)
+        st.button("⏹" if active else "⏺", key="voice_button", on_click=self.toggle_listening,
+                  help="Stop listening" if active else "Click to speak")
+        if active:
+            self.listen()
+        pipeline = st.session_state.get('speech_pipeline')
+        if pipeline is None:
+            return
+        for text in st.session_state.pop('voice_transcripts', []) + pipeline.poll():
+            self.process_voice_command(text)
+        # Transcripts arrive from the speech worker in the background. While it runs (including
+        # the last utterance after stop), a fragment checks for them and reruns the app.
+        if active or pipeline.running:
+            st.fragment(run_every=VOICE_POLL_SECONDS)(self.watch_transcripts)()
+
+    def watch_transcripts(self):
+        pipeline = st.session_state.get('speech_pipeline')
+        texts = pipeline.poll() if pipeline is not None else []
+        if texts:
+            st.session_state['voice_transcripts'] = st.session_state.get('voice_transcripts', []) + texts
+            st.rerun()
+
+    def toggle_listening(self):
+        active = not st.session_state.get('voice_active', False)
+        st.session_state['voice_active'] = active
+        pipeline = st.session_state.get('speech_pipeline')
+        if not active and pipeline is not None:
+            # Doesn't wait; the worker decodes the last utterance and the fragment picks it up
+            pipeline.stop()
 
     def process_voice_command(self, text):
         """Handle conversion requests aur chat response trigger karo"""
         # Conversion handling
         conversion_data = self.parse_conversion_request(text)
         if conversion_data:
-            value, from_unit, to_unit = conversion_data
-            category = self.detect_category(from_unit)
+            value, from_unit, to_unit, category = conversion_data
             if category:
                 result = self.converter.convert(value, from_unit, to_unit, category)
                 if result is not None:
@@ -55,104 +70,142 @@ class VoiceInterface:
                         'result': result
                     }
 
-        # Chat response ke liye voice input process karo
-        if self.converter.chat:
-            response = self.converter.chat.get_response(text)
-            if response:
-                st.session_state.setdefault('messages', []).extend([
-                    {"role": "user", "content": text},
-                    {"role": "assistant", "content": response}
-                ])
-            else:
-                st.write("Debug: Voice input ke liye LLM se response nahi mila")
-        else:
+        # Chat response right column mein stream hota hai
+        if not self.converter.chat:
             st.error("Chat interface initialize nahi hua - .env mein API key check karo")
 
         st.session_state['voice_input'] = text
         st.write(f"Debug: Voice input saved - {text}")
 
     def detect_category(self, unit):
-        categories = UnitCategories.get_categories()
-        for cat, data in categories.items():
-            if unit in [u.lower() for u in data['units']]:
-                return cat
-        return None
+        return INDEX.category_of(unit)
 
     def parse_conversion_request(self, text):
-        try:
-            pattern = r"convert (\d+\.?\d*) (\w+) to (\w+)"
-            match = re.search(pattern, text.lower())
-            if match:
-                return float(match.group(1)), match.group(2), match.group(3)
-        except Exception:
-            pass
-        return None, None, None
-
-    def listen_and_transcribe(self):
-        class AudioProcessor(AudioProcessorBase):
-            def __init__(self):
-                self.recognizer = sr.Recognizer()
-
-            def recv(self, frame):
-                audio_data = frame.to_ndarray()
-                try:
-                    with sr.AudioFile(audio_data) as source:
-                        audio = self.recognizer.record(source)
-                        text = self.recognizer.recognize_google(audio)
-                        return text.lower()
-                except Exception:
-                    return None
-
-        ctx = webrtc_streamer(
-            key="audio",
-            audio_processor_factory=AudioProcessor,
+        """Return (value, from_unit, to_unit, category) for conversion requests, else None"""
+        return intent.parse_query(text)
+
+    def get_pipeline(self):
+        """This session's speech pipeline, or None (with a message) if no local recognizer is set up"""
+        pipeline = st.session_state.get('speech_pipeline')
+        if pipeline is None:
+            # Voice stack (vosk, webrtcvad, models) loads on first use, not at app start
+            from .speech import RecognizerUnavailable, SpeechPipeline, get_recognizer
+
+            try:
+                pipeline = SpeechPipeline(get_recognizer())
+            except RecognizerUnavailable as e:
+                st.error(f"🎙️ Voice input is unavailable: {e}")
+                return None
+            st.session_state['speech_pipeline'] = pipeline
+        return pipeline
+
+    def listen(self):
+        """Stream microphone audio into the speech pipeline; never waits for audio itself"""
+        pipeline = self.get_pipeline()
+        if pipeline is None:
+            return
+        from streamlit_webrtc import webrtc_streamer, WebRtcMode
+
+        webrtc_streamer(
+            key="voice",
             mode=WebRtcMode.SENDONLY,
-            media_stream_constraints={"audio": True, "video": False}
+            audio_frame_callback=pipeline.push_frame,
+            media_stream_constraints={"audio": True, "video": False},
+            async_processing=True
         )
-        if ctx.audio_receiver:
-            try:
-                audio_frame = ctx.audio_receiver.get_frame(timeout=5)
-                if audio_frame:
-                    recognizer = sr.Recognizer()
-                    audio = recognizer.record(audio_frame.to_audio_data())
-                    text = recognizer.recognize_google(audio)
-                    if text:
-                        st.session_state['voice_input'] = text.lower()
-                        return text.lower()
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
-        return None
 
 class UnitConverter:
     def __init__(self, model):
         self.model = model
-        self.categories = UnitCategories.get_categories()
-        self.ui = UIComponents(self.categories)
+        self.categories = get_registry().categories
+        self.engine = ENGINE
+        self.ui = UIComponents({**self.categories, CUSTOM_CATEGORY: {"units": [], "icon": "🧮"}})
         self.chat = ChatInterface(model) if model else None
         self.voice = VoiceInterface(self)
 
-    def convert(self, value, from_unit, to_unit, category):
+    def convert(self, value, from_unit, to_unit, category, exact=False):
+        """Convert locally from the factor tables, LLM only for unknown units
+
+        exact=True returns a Fraction from the precomputed exact pair factors.
+        """
+        start = time.perf_counter()
+        path, result = self._convert(value, from_unit, to_unit, category, exact)
+        CONVERSION_SECONDS.observe(time.perf_counter() - start, path=path)
+        return result
+
+    def _convert(self, value, from_unit, to_unit, category, exact):
+        # Returns (path, result); path labels the latency histogram
+        try:
+            conversion = convert_local(value, from_unit, to_unit, category, exact=exact, engine=self.engine)
+            return conversion.path, conversion.result
+        except UnknownUnitError:
+            if not self.model:
+                st.error(f"Conversion Error: {from_unit} to {to_unit} is not supported")
+                return "error", None
+            return "llm", self.convert_with_model(value, from_unit, to_unit, category)
+        except DimensionError as e:
+            st.error(f"Conversion Error: {str(e)}")
+            return "error", None
+        except (ValueError, ZeroDivisionError):
+            st.error(f"Conversion Error: '{value}' is not a number")
+            return "error", None
+
+    def convert_all(self, value, from_unit, category):
+        """(units, results) for value in every unit of the category, one vectorized pass"""
+        _, _, units, results = convert_all_local(value, from_unit, category, engine=self.engine)
+        return units, results
+
+    def render_all_units(self, value, from_unit, category, digits):
+        """Table of the value in every unit of the category"""
+        try:
+            units, results = self.convert_all(float(to_fraction(value)), from_unit, category)
+        except (ValueError, ZeroDivisionError):
+            return
+        rows = [
+            {"Unit": f"➜ {unit}" if unit == from_unit else unit, "Value": format_significant(result, digits)}
+            for unit, result in zip(units, results.tolist())
+        ]
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
+    def convert_many(self, values, from_unit, to_unit, category, out=None):
+        """Vectorized batch conversion, returns a NumPy array"""
+        return self.engine.convert_many(values, from_unit, to_unit, category, out=out)
+
+    def convert_with_model(self, value, from_unit, to_unit, category):
+        """Fallback conversion through the LLM for units the tables don't know"""
+        key = conversion_key(value, from_unit, to_unit)
+        cached = RESPONSE_CACHE.get(key)
+        if cached is not None:
+            return cached
         try:
             prompt = f"""Convert {value} {from_unit} to {to_unit}. 
             Return ONLY the numerical value without ANY text or explanations.
             Example: If converting 1 kilometer to miles, return 0.621371
             """
             
-            response = self.model.chat(
+            # Conversion fallbacks go ahead of chat when the rate limiter is busy
+            response = get_llm(self.model).chat(
                 model='command',
                 message=prompt,
-                temperature=0
+                temperature=0,
+                user=get_user_id(),
+                priority=PRIORITY_CONVERSION
             )
             
-            match = re.search(r"\d+\.?\d*", response.text)
+            match = re.search(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?", response.text)
             if not match:
                 raise ValueError("Response mein numerical value nahi mila")
             
             result = float(match.group())
+            RESPONSE_CACHE.set(key, result)
             if 'api_calls' in st.session_state:
                 st.session_state.api_calls += 1
             return result
             
+        except BudgetExceeded:
+            st.warning(f"⏳ AI conversions are paused for now. {from_unit} to {to_unit} isn't a built-in "
+                       "conversion, but all built-in units keep working.", icon="⌛")
+            return None
         except Exception as e:
             if "429" in str(e):
                 st.warning("⏳ Too many requests! Please wait.", icon="⌛")
@@ -161,91 +214,7 @@ class UnitConverter:
             return None
 
     def render(self):
-        st.markdown("""
-            <style>
-            #MainMenu {visibility: hidden;}
-            footer {visibility: hidden;}
-            header {visibility: hidden;}
-            .stApp {background-color: #1E1E1E !important;}
-            .main-header {
-                color: #FF6B00;
-                font-size: min(2.8rem, 8vw);
-                text-align: center;
-                margin-bottom: 2rem;
-                padding: 1.5rem;
-                background: #1E1E1E;
-                border-radius: 12px;
-                border: 2px solid #FF6B00;
-            }
-            .converter-container, .chat-container {
-                background: #1E1E1E;
-                padding: clamp(1rem, 3vw, 2rem);
-                border-radius: 12px;
-                border: 2px solid #FF6B00;
-                margin-bottom: 1rem;
-                width: 100%;
-            }
-            .voice-button {
-                background-color: transparent !important;
-                border: 2px solid #FF6B00 !important;
-                border-radius: 50% !important;
-                color: #FF6B00 !important;
-                width: 40px !important;
-                height: 40px !important;
-                line-height: 40px !important;
-                text-align: center !important;
-                cursor: pointer !important;
-                transition: all 0.3s ease !important;
-            }
-            .voice-button:hover {
-                background-color: rgba(255, 107, 0, 0.1) !important;
-                transform: scale(1.05);
-            }
-            .stButton > button {
-                background-color: #FF6B00;
-                color: #FFFFFF !important;
-                font-size: clamp(1rem, 2.5vw, 1.3rem) !important;
-                font-weight: 700 !important;
-                padding: clamp(0.5rem, 2vw, 0.8rem) clamp(1rem, 4vw, 2rem);
-                border-radius: 8px;
-                border: none;
-                width: 100%;
-            }
-            h3 {
-                font-size: clamp(1.1rem, 3vw, 1.3rem) !important;
-                margin-bottom: clamp(0.5rem, 2vw, 1rem);
-            }
-            .stSelectbox > div > div > div {
-                font-size: clamp(0.9rem, 2.5vw, 1.1rem);
-            }
-            .stNumberInput input {
-                font-size: clamp(0.9rem, 2.5vw, 1.1rem);
-            }
-            .stMarkdown ul {
-                list-style: none;
-                padding-left: 0;
-            }
-            .stMarkdown li {
-                color: #FF6B00 !important;
-                padding: clamp(0.3rem, 1.5vw, 0.5rem) 0;
-                font-size: clamp(0.9rem, 2.5vw, 1rem);
-                cursor: pointer;
-            }
-            @media (max-width: 768px) {
-                .main .block-container {padding: 1rem;}
-                [data-testid="column"] {width: 100% !important; flex: 1 1 auto !important; min-width: 100% !important;}
-                .stButton > button {margin-top: 1rem;}
-                .result-container {margin-top: 1rem;}
-                .chat-container {margin-top: 1rem;}
-            }
-            @media (max-width: 480px) {
-                .main-header {padding: 1rem; margin-bottom: 1rem;}
-                .converter-container, .chat-container {padding: 0.8rem;}
-                h3 {margin-bottom: 0.5rem;}
-            }
-            </style>
-        """, unsafe_allow_html=True)
-
+        # Styles are emitted once per rerun by the page (styles.PAGE_STYLE)
         st.markdown("<h1 class='main-header'>🈲 Unit Converter</h1>", unsafe_allow_html=True)
 
         left_col, right_col = st.columns([1, 1], gap="large")
@@ -256,55 +225,39 @@ class UnitConverter:
             category = self.ui.render_category_selector()
             st.markdown("### 🈴 Choose Units")
             col1, col2 = st.columns(2)
-            with col1:
-                from_unit = st.selectbox("From", self.categories[category]["units"])
-            with col2:
-                to_unit = st.selectbox("To", self.categories[category]["units"])
+            if category == CUSTOM_CATEGORY:
+                # Compound expressions like kg·m/s², kWh/100km, MB/s or L/min
+                with col1:
+                    from_unit = st.text_input("From", value="kWh/100km")
+                with col2:
+                    to_unit = st.text_input("To", value="Wh/km")
+            else:
+                with col1:
+                    from_unit = st.selectbox("From", self.categories[category]["units"])
+                with col2:
+                    to_unit = st.selectbox("To", self.categories[category]["units"])
             st.markdown("### 📝 Enter Value")
-            value = st.number_input("", value=1.0, format="%f", step=0.1)
-            st.markdown("""
-            <style>
-            .convert-button {
-                background-color: #FF6B00 !important;
-                color: white !important;
-                border-radius: 8px !important;
-                padding: 0.5rem 2rem !important;
-                font-size: 1.2rem !important;
-                font-weight: 600 !important;
-                border: none !important;
-                width: 100% !important;
-                cursor: pointer !important;
-                transition: all 0.3s ease !important;
-                margin-top: 1rem !important;
-                text-align: center !important;
-            }
-            .convert-button:hover {
-                background-color: #FF8533 !important;
-                transform: translateY(-2px);
-                box-shadow: 0 4px 12px rgba(255, 107, 0, 0.2);
-            }
-            .convert-button:active {transform: translateY(0);}
-            .result-container {text-align: center; padding: 1rem 0; animation: fadeIn 0.5s ease;}
-            .from-value {font-size: 1.4rem; color: #FFFFFF; font-weight: 500; letter-spacing: 0.5px;}
-            .arrow {font-size: 1.6rem; color: #FF6B00; margin: 0.8rem 0; font-weight: bold;}
-            .to-value {font-size: 2.2rem; color: #FF6B00; font-weight: 700; letter-spacing: 1px;}
-            @keyframes fadeIn {from {opacity: 0; transform: translateY(10px);} to {opacity: 1; transform: translateY(0);}}
-            </style>
-            """, unsafe_allow_html=True)
+            exact = category != CUSTOM_CATEGORY and st.toggle(
+                "Exact mode", help="Rational arithmetic, no floating-point rounding")
+            if exact:
+                # Text keeps the decimal exactly as typed ("0.1" stays 1/10)
+                value = st.text_input("Value", value="1")
+            else:
+                value = st.number_input("", value=1.0, format="%f", step=0.1)
+            digits = st.slider("Significant figures", 1, 30 if exact else 15, 6)
             if st.markdown('<button class="convert-button">Convert ➜</button>', unsafe_allow_html=True):
-                with st.spinner("Converting..."):
-                    if self.model:
-                        result = self.convert(value, from_unit, to_unit, category)
-                        if result is not None:
-                            st.markdown(f"""
-                            <div class="result-container">
-                                <div class="from-value">{value} {from_unit}</div>
-                                <div class="arrow">↓</div>
-                                <div class="to-value">{result:.4f} {to_unit}</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                    else:
-                        st.error("CoHERE model initialize nahi hua - .env mein API key check karo")
+                result = self.convert(value, from_unit, to_unit, category, exact=exact)
+                if result is not None:
+                    st.markdown(f"""
+                    <div class="result-container">
+                        <div class="from-value">{value} {from_unit}</div>
+                        <div class="arrow">↓</div>
+                        <div class="to-value">{format_significant(result, digits)} {to_unit}</div>
+                    </div>
+                    """, unsafe_allow_html=True)
+            if category != CUSTOM_CATEGORY and st.toggle(
+                    "Show in all units", help="The value in every unit of this category, computed in one pass"):
+                self.render_all_units(value, from_unit, category, digits)
 
         with right_col:
             st.markdown("<div class='chat-container'>", unsafe_allow_html=True)
@@ -322,35 +275,21 @@ class UnitConverter:
             with voice_col:
                 self.voice.render_voice_button()
 
+            # Chat history display karo (new replies are streamed below it)
+            render_history(get_history())
+
             # Voice input handle karo
             if 'voice_input' in st.session_state:
                 voice_prompt = st.session_state.pop('voice_input')
                 st.write(f"Debug: Voice input received - {voice_prompt}")
                 if self.chat:
-                    with st.spinner("Thinking..."):
-                        response = self.chat.get_response(voice_prompt)
-                        if response:
-                            st.session_state.setdefault('messages', []).extend([
-                                {"role": "user", "content": voice_prompt},
-                                {"role": "assistant", "content": response}
-                            ])
+                    self.chat.respond(voice_prompt)
 
             # Text input handle karo
             if prompt and 'voice_input' not in st.session_state:
                 st.write(f"Debug: Text input received - {prompt}")
                 if self.chat:
-                    with st.spinner("Thinking..."):
-                        response = self.chat.get_response(prompt)
-                        if response:
-                            st.session_state.setdefault('messages', []).extend([
-                                {"role": "user", "content": prompt},
-                                {"role": "assistant", "content": response}
-                            ])
-
-            # Chat history display karo
-            for message in st.session_state.get('messages', []):
-                with st.chat_message(message["role"]):
-                    st.markdown(message["content"])
+                    self.chat.respond(prompt)
 
             if 'last_conversion' in st.session_state:
                 conv = st.session_state['last_conversion']
@@ -358,7 +297,7 @@ class UnitConverter:
                 <div class="result-container">
                     <div class="from-value">{conv['value']} {conv['from_unit']}</div>
                     <div class="arrow">↓</div>
-                    <div class="to-value">{conv['result']:.4f} {conv['to_unit']}</div>
+                    <div class="to-value">{format_significant(conv['result'])} {conv['to_unit']}</div>
                 </div>
                 """, unsafe_allow_html=True)
 
@@ -0,0 +1,152 @@
+# Local, table-driven conversion engine (no network, no Streamlit)
+
+import numpy as np
+from decimal import Decimal, getcontext
+from fractions import Fraction
+
+from .registry import exact_factor, get_registry
+
+
+class UnknownUnitError(ValueError):
+    """Raised when a unit or category is not in the factor tables"""
+
+
+class CompiledCategory:
+    """Dense N×N scale/shift matrices for one category
+
+    Unit names are interned to integer ids, so converting between units i and j
+    is value * scale[i][j] + shift[i][j]. The matrices are built from exact
+    rationals, so each float entry is the correctly rounded pair factor and the
+    exact ones are kept for precision mode.
+    """
+    def __init__(self, name, data):
+        self.name = name
+        factors = data.get("factors", {})
+        offsets = data.get("offsets", {})
+        self.units = tuple(u for u in data["units"] if u in factors)
+        self.ids = {unit: i for i, unit in enumerate(self.units)}
+        f = [exact_factor(factors[u]) for u in self.units]
+        o = [exact_factor(offsets.get(u, 0)) for u in self.units]
+        # base = (x + o_i) * f_i  and  y = base / f_j - o_j
+        self.exact_scale = [[fi / fj for fj in f] for fi in f]
+        self.exact_shift = [[oi * fi / fj - oj for fj, oj in zip(f, o)] for fi, oi in zip(f, o)]
+        self.scale = [[float(x) for x in row] for row in self.exact_scale]
+        self.shift = [[float(x) for x in row] for row in self.exact_shift]
+        # Same matrices as arrays, so a whole row (one unit to all units) is one multiply-add
+        self.scale_matrix = np.array(self.scale, dtype=np.float64)
+        self.shift_matrix = np.array(self.shift, dtype=np.float64)
+
+    def unit_id(self, unit):
+        """Return the integer id of a unit"""
+        try:
+            return self.ids[unit]
+        except KeyError:
+            raise UnknownUnitError(f"Unknown unit '{unit}' in category '{self.name}'") from None
+
+    def pair(self, from_id, to_id):
+        """Return (scale, shift) for a pair of unit ids"""
+        return self.scale[from_id][to_id], self.shift[from_id][to_id]
+
+    def exact_pair(self, from_id, to_id):
+        """Return the exact (scale, shift) Fractions for a pair of unit ids"""
+        return self.exact_scale[from_id][to_id], self.exact_shift[from_id][to_id]
+
+    def convert_ids(self, value, from_id, to_id):
+        """Hot path: one lookup and one multiply-add"""
+        return value * self.scale[from_id][to_id] + self.shift[from_id][to_id]
+
+    def convert_row(self, value, from_id):
+        """value in every unit of the category, as an array ordered like self.units"""
+        return value * self.scale_matrix[from_id] + self.shift_matrix[from_id]
+
+
+def to_fraction(value):
+    """Exact Fraction for a user-supplied value"""
+    if isinstance(value, (Fraction, int)):
+        return Fraction(value)
+    if isinstance(value, float):
+        return Fraction(repr(value))
+    if isinstance(value, Decimal):
+        return Fraction(value)
+    return Fraction(str(value).strip().replace(",", ""))
+
+
+class ConversionEngine:
+    """Converts values using the factor tables of the unit registry
+
+    Categories are compiled on first use and kept for the life of the process.
+    """
+    def __init__(self, categories=None):
+        self.categories = categories if categories is not None else get_registry().categories
+        self.compiled = {}
+
+    def get_category(self, category):
+        """Return the compiled matrices for a category"""
+        compiled = self.compiled.get(category)
+        if compiled is None:
+            try:
+                data = self.categories[category]
+            except KeyError:
+                raise UnknownUnitError(f"Unknown category '{category}'") from None
+            compiled = self.compiled.setdefault(category, CompiledCategory(category, data))
+        return compiled
+
+    def can_convert(self, from_unit, to_unit, category):
+        """Check whether both units are known for the category"""
+        if category not in self.categories:
+            return False
+        compiled = self.get_category(category)
+        return from_unit in compiled.ids and to_unit in compiled.ids
+
+    def pair(self, from_unit, to_unit, category):
+        """Return (scale, shift) for a unit pair, for callers converting many values"""
+        compiled = self.get_category(category)
+        return compiled.pair(compiled.unit_id(from_unit), compiled.unit_id(to_unit))
+
+    def convert(self, value, from_unit, to_unit, category):
+        """Convert value between two units of the same category"""
+        compiled = self.get_category(category)
+        return compiled.convert_ids(value, compiled.unit_id(from_unit), compiled.unit_id(to_unit))
+
+    def convert_all(self, value, from_unit, category):
+        """Fan-out: value converted to every unit of the category in one vectorized pass
+
+        Returns (units, results) with results a NumPy array in the same order as units.
+        """
+        compiled = self.get_category(category)
+        return compiled.units, compiled.convert_row(value, compiled.unit_id(from_unit))
+
+    def convert_exact(self, value, from_unit, to_unit, category):
+        """Exact conversion with Fractions; value may be an int, Fraction, Decimal or a string like "0.1"
+
+        Floats are taken at their shortest decimal repr, so 0.1 means 1/10.
+        """
+        compiled = self.get_category(category)
+        scale, shift = compiled.exact_pair(compiled.unit_id(from_unit), compiled.unit_id(to_unit))
+        return to_fraction(value) * scale + shift
+
+    def convert_decimal(self, value, from_unit, to_unit, category, context=None):
+        """Exact conversion rounded once to a Decimal under context (default: the current context)"""
+        result = self.convert_exact(value, from_unit, to_unit, category)
+        context = context or getcontext()
+        return context.divide(Decimal(result.numerator), Decimal(result.denominator))
+
+    def convert_many(self, values, from_unit, to_unit, category, out=None):
+        """Convert a list, array.array or NumPy array in one vectorized multiply-add
+
+        Pass out= (which may be the input array itself) to write the result in place.
+        """
+        scale, shift = self.pair(from_unit, to_unit, category)
+        values = np.asarray(values, dtype=out.dtype if out is not None else np.float64)
+        if out is None:
+            out = np.empty(values.shape, dtype=np.float64)
+        elif out.shape != values.shape:
+            raise ValueError(f"out has shape {out.shape}, expected {values.shape}")
+        np.multiply(values, scale, out=out)
+        if shift:
+            np.add(out, shift, out=out)
+        return out
+
+
+# Shared by every session, categories compile on first use
+ENGINE = ConversionEngine()
@@ -0,0 +1,314 @@
+# Compound unit expressions (kg·m/s², kWh/100km, MB/s) with dimensional analysis
+
+import math
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from .registry import exact_factor, get_registry
+from .unit_index import INDEX
+
+CUSTOM_CATEGORY = "Custom expression"
+
+# Exponents of the base dimensions, in this order
+DIMENSIONS = ("m", "kg", "s", "A", "K", "mol", "cd", "bit")
+NONE = (0,) * len(DIMENSIONS)
+
+Quantity = namedtuple("Quantity", "factor dims")
+
+
+class DimensionError(ValueError):
+    """Raised when an expression can't be parsed or two expressions don't match"""
+
+
+def _dim(**exponents):
+    return tuple(exponents.get(name, 0) for name in DIMENSIONS)
+
+
+L, M, T, I, TEMP, N, J, INFO = (_dim(**{name: 1}) for name in DIMENSIONS)
+
+
+def _mul(a, b):
+    return tuple(x + y for x, y in zip(a, b))
+
+
+def _pow(a, n):
+    return tuple(x * n for x in a)
+
+
+VELOCITY = _mul(L, _pow(T, -1))
+FORCE = _mul(M, _mul(L, _pow(T, -2)))
+ENERGY = _mul(FORCE, L)
+POWER = _mul(ENERGY, _pow(T, -1))
+PRESSURE = _mul(FORCE, _pow(L, -2))
+CHARGE = _mul(I, T)
+
+# Symbols that take SI prefixes, as (factor in coherent SI units, dimensions)
+PREFIXABLE = {
+    "m": (1, L), "g": (1e-3, M), "s": (1, T), "A": (1, I), "K": (1, TEMP),
+    "mol": (1, N), "cd": (1, J), "B": (8, INFO), "b": (1, INFO), "bit": (1, INFO),
+    "L": (1e-3, _pow(L, 3)), "l": (1e-3, _pow(L, 3)), "Hz": (1, _pow(T, -1)),
+    "N": (1, FORCE), "J": (1, ENERGY), "W": (1, POWER), "Wh": (3600, ENERGY),
+    "Pa": (1, PRESSURE), "bar": (1e5, PRESSURE), "C": (1, CHARGE),
+    "V": (1, _mul(POWER, _pow(I, -1))), "eV": (1.602176634e-19, ENERGY),
+    "cal": (4.184, ENERGY), "bps": (1, _mul(INFO, _pow(T, -1))),
+}
+
+# Symbols used as-is
+PLAIN = {
+    "min": (60, T), "h": (3600, T), "hr": (3600, T), "d": (86400, T), "wk": (604800, T),
+    "yr": (31556952, T), "in": (0.0254, L), "ft": (0.3048, L), "yd": (0.9144, L),
+    "mi": (1609.344, L), "nmi": (1852, L), "lb": (0.45359237, M), "lbs": (0.45359237, M),
+    "oz": (0.028349523125, M), "t": (1000, M), "gal": (3.785411784e-3, _pow(L, 3)),
+    "ha": (1e4, _pow(L, 2)), "psi": (6894.757293168361, PRESSURE), "atm": (101325, PRESSURE),
+    "mph": (0.44704, VELOCITY), "kn": (1852 / 3600, VELOCITY), "kph": (1 / 3.6, VELOCITY),
+    "%": (0.01, NONE),
+}
+
+PREFIXES = {
+    "Y": 1e24, "Z": 1e21, "E": 1e18, "P": 1e15, "T": 1e12, "G": 1e9, "M": 1e6, "k": 1e3,
+    "h": 1e2, "da": 1e1, "d": 1e-1, "c": 1e-2, "m": 1e-3, "µ": 1e-6, "μ": 1e-6, "u": 1e-6,
+    "n": 1e-9, "p": 1e-12, "f": 1e-15, "a": 1e-18,
+    "Ki": 1024, "Mi": 1024 ** 2, "Gi": 1024 ** 3, "Ti": 1024 ** 4, "Pi": 1024 ** 5,
+}
+
+# Bits and bytes only take multiples. Bits (and bps) are decimal, Ki/Mi/... always binary;
+# bytes use binary multiples like the Digital Storage category
+BYTE_PREFIXES = {"k": 1024, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4,
+                 "P": 1024 ** 5, "E": 1024 ** 6}
+BIT_PREFIXES = {"k": 1e3, "K": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18}
+BINARY_ONLY = ("Ki", "Mi", "Gi", "Ti", "Pi")
+DATA_ATOMS = ("B", "b", "bit", "bps")
+
+# Registry categories usable inside expressions: (base unit in coherent SI units, dimensions)
+CATEGORY_DIMENSIONS = {
+    "Length": (1, L), "Weight/Mass": (1, M), "Time": (1, T), "Area": (1, _pow(L, 2)),
+    "Volume": (1, _pow(L, 3)), "Digital Storage": (8, INFO), "Speed": (1, VELOCITY),
+    "Pressure": (1, PRESSURE), "Energy": (1, ENERGY),
+}
+
+_SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻", "0123456789-")
+# Digits glued to a unit name are its exponent: "m2" is m^2, "cm3" is cm^3
+_GLUED_EXPONENT = re.compile(r"\d+(?:\.\d+)?")
+_TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<number>\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+    | (?P<power>(?:\^|\*\*)\s*[-+]?\d+)
+    | (?P<super>[⁰¹²³⁴⁵⁶⁷⁸⁹⁻]+)
+    | (?P<op>[*·×/()]|\.(?!\d))
+    | (?P<name>[A-Za-zµμ°%_][A-Za-zµμ°%_\-]*)
+    )""", re.VERBOSE)
+
+
+def _prefixed(name):
+    """Quantity of a prefixed symbol like "km", "MB" or "Gbps" (exact case), else None"""
+    for size in (2, 1):
+        prefix, atom = name[:size], name[size:]
+        if prefix in PREFIXES and atom in PREFIXABLE:
+            factor, dims = PREFIXABLE[atom]
+            if atom not in DATA_ATOMS or prefix in BINARY_ONLY:
+                return Quantity(PREFIXES[prefix] * factor, dims)
+            multiples = BYTE_PREFIXES if atom == "B" else BIT_PREFIXES
+            if prefix in multiples:
+                return Quantity(multiples[prefix] * factor, dims)
+    return None
+
+
+def _symbol(name):
+    """Quantity of an exact-case symbol, else None"""
+    if name in PLAIN:
+        return Quantity(*PLAIN[name])
+    if name in PREFIXABLE:
+        return Quantity(*PREFIXABLE[name])
+    return _prefixed(name)
+
+
+def _registry_ref(name):
+    ref = INDEX.resolve(name.replace("_", " "), fuzzy=False)
+    return ref if ref is not None and ref.category in CATEGORY_DIMENSIONS else None
+
+
+def overrides_registry(name):
+    """True when name's case makes it a different unit than its registry alias
+
+    Registry aliases are case-insensitive, symbols aren't: "Mb" is megabits and
+    "Mm" megameters, while the aliases "mb" and "mm" are Megabytes and Millimeters.
+    """
+    name = name.strip()
+    if name == name.lower():
+        return False
+    q = _symbol(name)
+    ref = _registry_ref(name)
+    if q is None or ref is None:
+        return False
+    r = _registry_quantity(ref)
+    return r.dims != q.dims or not math.isclose(r.factor, q.factor, rel_tol=1e-9)
+
+
+def resolve_symbol(name):
+    """Return the Quantity of a single unit symbol or name
+
+    Symbols with capitals match case-sensitively first ("Mb", "MB", "Mm"); all
+    lowercase names go to the registry aliases first, so "mb" means Megabytes
+    here as everywhere else.
+    """
+    if name in PLAIN:
+        return Quantity(*PLAIN[name])
+    if name in PREFIXABLE:
+        return Quantity(*PREFIXABLE[name])
+    q = _prefixed(name) if name != name.lower() else None
+    if q is not None:
+        return q
+    ref = _registry_ref(name)
+    if ref is not None:
+        return _registry_quantity(ref)
+    q = _prefixed(name)
+    if q is not None:
+        return q
+    raise DimensionError(f"Unknown unit '{name}'")
+
+
+def _registry_quantity(ref):
+    base, dims = CATEGORY_DIMENSIONS[ref.category]
+    return Quantity(base * float(exact_factor(get_registry().categories[ref.category]["factors"][ref.unit])), dims)
+
+
+def _tokenize(text):
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise DimensionError(f"Can't parse '{text[pos:]}'")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "super":
+            tokens.append(("power", value.translate(_SUPERSCRIPTS)))
+        elif kind == "name" and value == "per":
+            tokens.append(("op", "/"))
+        else:
+            tokens.append((kind, value))
+        pos = match.end()
+        glued = _GLUED_EXPONENT.match(text, pos) if kind == "name" else None
+        if glued:
+            if "." in glued.group():
+                raise DimensionError(f"Bad exponent '{glued.group()}' after '{value}'")
+            tokens.append(("power", glued.group()))
+            pos = glued.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser for unit expressions
+
+    expr    := product (('*' | '/') product)*
+    product := term (('·' | '.' | juxtaposition) term)*
+    term    := number | name | '(' expr ')', optionally raised to an integer power
+
+    Juxtaposition binds tighter than '/', so 'kWh/100km' is kWh / (100 km).
+    """
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expr(self):
+        factor, dims = self.product()
+        while self.peek() in (("op", "*"), ("op", "/")):
+            _, op = self.take()
+            q = self.product()
+            if op == "*":
+                factor, dims = factor * q.factor, _mul(dims, q.dims)
+            else:
+                factor, dims = factor / q.factor, _mul(dims, _pow(q.dims, -1))
+        return Quantity(factor, dims)
+
+    def product(self):
+        factor, dims = self.term()
+        while True:
+            kind, value = self.peek()
+            if kind == "op" and value in "·×.":
+                self.take()
+            elif not (kind in ("name", "number") or (kind, value) == ("op", "(")):
+                return Quantity(factor, dims)
+            q = self.term()
+            factor, dims = factor * q.factor, _mul(dims, q.dims)
+
+    def term(self):
+        kind, value = self.take()
+        if kind == "number":
+            q = Quantity(float(value), NONE)
+        elif kind == "name":
+            q = resolve_symbol(value)
+        elif kind == "op" and value == "(":
+            q = self.expr()
+            if self.take() != ("op", ")"):
+                raise DimensionError("Missing ')'")
+        else:
+            raise DimensionError(f"Unexpected '{value}'" if value else "Unexpected end of expression")
+        if self.peek()[0] == "power":
+            exponent = self.take()[1].lstrip("^*").strip()
+            try:
+                n = int(exponent)
+            except ValueError:
+                raise DimensionError(f"Bad exponent '{exponent}'") from None
+            q = Quantity(q.factor ** n, _pow(q.dims, n))
+        return q
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(text):
+    """Parse and reduce a unit expression to a Quantity (cached per expression)"""
+    ref = _registry_ref(text)
+    if ref is not None and not overrides_registry(text):
+        return _registry_quantity(ref)
+    parser = _Parser(_tokenize(text))
+    try:
+        q = parser.expr()
+    except ZeroDivisionError:
+        raise DimensionError(f"Division by zero in '{text}'") from None
+    except OverflowError:
+        raise DimensionError(f"'{text}' is too large") from None
+    if parser.pos != len(parser.tokens):
+        raise DimensionError(f"Unexpected '{parser.peek()[1]}' in '{text}'")
+    # Products can still overflow to inf or underflow to 0 without raising
+    if not math.isfinite(q.factor) or q.factor == 0:
+        raise DimensionError(f"'{text}' is too large or too small")
+    return q
+
+
+def describe(dims):
+    """Human readable dimensions, e.g. 'kg·m/s^2'"""
+    num = [f"{n}^{e}" if e != 1 else n for n, e in zip(DIMENSIONS, dims) if e > 0]
+    den = [f"{n}^{-e}" if e != -1 else n for n, e in zip(DIMENSIONS, dims) if e < 0]
+    text = "·".join(num) or "1"
+    return f"{text}/{'·'.join(den)}" if den else text
+
+
+@lru_cache(maxsize=1024)
+def conversion_factor(from_expr, to_expr):
+    """Factor from one expression to another, after checking their dimensions match"""
+    src, dst = compile_expression(from_expr), compile_expression(to_expr)
+    if src.dims != dst.dims:
+        raise DimensionError(
+            f"Incompatible units: {from_expr} is {describe(src.dims)}, {to_expr} is {describe(dst.dims)}"
+        )
+    factor = src.factor / dst.factor
+    if not math.isfinite(factor) or factor == 0:
+        raise DimensionError(f"{from_expr} to {to_expr} is out of range")
+    return factor
+
+
+def convert_expression(value, from_expr, to_expr):
+    """Convert value between two compound unit expressions"""
+    result = value * conversion_factor(from_expr, to_expr)
+    if math.isinf(result) and not math.isinf(value):
+        raise DimensionError(f"{value} {from_expr} is out of range in {to_expr}")
+    return result
@@ -0,0 +1,33 @@
+# Number formatting shared by the UI and the chat fast path
+
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+
+def to_decimal(value, digits):
+    """Round a float, Fraction or Decimal to digits significant figures"""
+    with localcontext() as ctx:
+        ctx.prec = digits
+        if isinstance(value, Fraction):
+            return ctx.divide(Decimal(value.numerator), Decimal(value.denominator))
+        if isinstance(value, float):
+            # The shortest repr, so 211.99999999999997 reads as the 212 it rounds to
+            value = Decimal(repr(value))
+        return +Decimal(value)
+
+
+def format_significant(value, digits=6):
+    """Significant-figure formatting: fixed notation for ordinary magnitudes, scientific otherwise"""
+    d = to_decimal(value, digits)
+    if not d.is_finite():
+        return str(d)
+    if d == 0:
+        return "0"
+    exponent = d.adjusted()
+    if -5 <= exponent < 15:
+        text = f"{d:,.{max(digits - exponent - 1, 0)}f}"
+        return text.rstrip("0").rstrip(".") if "." in text else text
+    mantissa, exp = f"{d:.{digits - 1}e}".split("e")
+    if "." in mantissa:
+        mantissa = mantissa.rstrip("0").rstrip(".")
+    return f"{mantissa}e{int(exp)}"
@@ -0,0 +1,97 @@
+# Bounded chat history: ring buffer of recent turns plus a compact summary of dropped ones
+
+import os
+from collections import deque
+
+HISTORY_SIZE = int(os.getenv("CHAT_HISTORY_SIZE", "50"))
+CONTEXT_TOKENS = int(os.getenv("CHAT_CONTEXT_TOKENS", "800"))
+SUMMARY_TOKENS = int(os.getenv("CHAT_SUMMARY_TOKENS", "150"))
+PAGE_SIZE = 10
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for English), good enough for budgeting"""
+    return max(1, (len(text) + 3) // 4)
+
+
+def _gist(text, limit=80):
+    """First sentence of a turn, clipped, for the running summary"""
+    text = " ".join(text.split())
+    for end in (". ", "? ", "! ", "\n"):
+        cut = text.find(end)
+        if 0 < cut < limit:
+            return text[:cut + 1]
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+class ChatHistory:
+    """Keeps the last maxlen messages; older ones are folded into a short summary
+
+    The summary is extractive (the gist of each dropped user question), so
+    compacting never costs an LLM call. It is itself capped at summary_tokens.
+    """
+    def __init__(self, maxlen=HISTORY_SIZE, summary_tokens=SUMMARY_TOKENS):
+        self.messages = deque(maxlen=maxlen)
+        self.summary_tokens = summary_tokens
+        self._summary = deque()
+        self.total = 0
+
+    def append(self, role, content):
+        if len(self.messages) == self.messages.maxlen:
+            self._compact(self.messages[0])
+        self.messages.append({"role": role, "content": content})
+        self.total += 1
+
+    def _compact(self, message):
+        if message["role"] != "user":
+            return
+        self._summary.append(_gist(message["content"]))
+        while len(self._summary) > 1 and estimate_tokens("; ".join(self._summary)) > self.summary_tokens:
+            self._summary.popleft()
+
+    @property
+    def summary(self):
+        """What earlier, no longer kept turns were about ('' if nothing was dropped)"""
+        return "; ".join(self._summary)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def pages(self, size=PAGE_SIZE):
+        """Number of pages of kept messages"""
+        return max(1, -(-len(self.messages) // size))
+
+    def page(self, number=0, size=PAGE_SIZE):
+        """Messages of one page, oldest first; page 0 is the most recent"""
+        end = len(self.messages) - number * size
+        if end <= 0:
+            return []
+        start = max(0, end - size)
+        return [self.messages[i] for i in range(start, end)]
+
+    def context(self, budget=CONTEXT_TOKENS):
+        """(summary, recent messages) fitting in about budget tokens, newest turns kept first"""
+        recent, used = [], 0
+        for message in reversed(self.messages):
+            cost = estimate_tokens(message["content"]) + 2
+            if used + cost > budget:
+                break
+            recent.append(message)
+            used += cost
+        # Start on a user turn so the model doesn't see an answer without its question
+        while recent and recent[-1]["role"] != "user":
+            used -= estimate_tokens(recent.pop()["content"]) + 2
+        recent.reverse()
+        # The summary of dropped turns goes in only if it still fits
+        summary = self.summary
+        if summary and used + estimate_tokens(summary) > budget:
+            summary = ""
+        return summary, recent
+
+    def clear(self):
+        self.messages.clear()
+        self._summary.clear()
+        self.total = 0
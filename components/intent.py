@@ -0,0 +1,102 @@
+# Local fast path: answer conversion questions from the engine without calling the LLM
+
+import re
+from collections import namedtuple
+
+from .engine import ENGINE
+from .unit_index import INDEX
+from .expressions import CUSTOM_CATEGORY, DimensionError, conversion_factor, convert_expression, overrides_registry
+from .formatting import format_significant
+
+ConversionQuery = namedtuple("ConversionQuery", "value from_unit to_unit category")
+
+# Bare "c" / "f" only mean Celsius / Fahrenheit next to another temperature ("100 F in C", "32 f to k");
+# elsewhere "C" is a coulomb and "f" a femto prefix
+BARE_TEMPERATURES = {"c": "Celsius", "f": "Fahrenheit", "°c": "Celsius", "°f": "Fahrenheit"}
+
+# Any short phrase that doesn't start with a digit; the unit index decides what it means
+_UNIT = r"[^\d\s][^?!]{0,39}?"
+# Never empty: at least one digit, or a/an/one
+_NUMBER = r"(?:an?|one)(?=\s)|[-+]?(?:(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|\.\d+)(?:e[-+]?\d+)?"
+_LEAD = r"(?:please\s+)?(?:convert\s+|change\s+|what\s+is\s+|what's\s+|how\s+much\s+is\s+)?"
+_END = r"\s*[?.!]?\s*$"
+
+# Compiled once at import. Anchored, and both units must resolve, so free-form
+# questions fall through to the LLM.
+_VALUE_TO_UNIT = re.compile(
+    rf"^{_LEAD}(?P<num>{_NUMBER})\s*(?P<src>{_UNIT})\s+(?:to|in|into|as)\s+(?P<dst>{_UNIT}){_END}",
+    re.IGNORECASE
+)
+_HOW_MANY = re.compile(
+    rf"^how\s+many\s+(?P<dst>{_UNIT})\s+(?:are\s+)?(?:there\s+)?(?:in|per)\s+"
+    rf"(?:(?P<num>{_NUMBER})\s*)?(?P<src>{_UNIT}){_END}",
+    re.IGNORECASE
+)
+
+
+def parse_number(text):
+    """Parse '1,234.5', '-3', '2.5e3', 'a' / 'one' into a float"""
+    if text is None or text.lower() in ("", "a", "an", "one"):
+        return 1.0
+    return float(text.replace(",", ""))
+
+
+def temperature_pair(src, dst):
+    """(from_unit, to_unit) when one side is a bare c/f and the other a temperature, else None"""
+    if not any(unit.lower() in BARE_TEMPERATURES for unit in (src, dst)):
+        return None
+    units = []
+    for unit in (src, dst):
+        name = BARE_TEMPERATURES.get(unit.lower())
+        if name is None:
+            ref = INDEX.resolve(unit, "Temperature", fuzzy=False)
+            if ref is None:
+                return None
+            name = ref.unit
+        units.append(name)
+    return tuple(units)
+
+
+def parse_query(text):
+    """Return a ConversionQuery for conversion-shaped text, else None"""
+    # Case is kept for expressions (MB vs Mb), unit lookups ignore it
+    text = " ".join(text.replace("−", "-").split())
+    for pattern in (_VALUE_TO_UNIT, _HOW_MANY):
+        match = pattern.match(text)
+        if not match:
+            continue
+        try:
+            value = parse_number(match.group("num"))
+        except ValueError:
+            continue
+        src, dst = match.group("src"), match.group("dst")
+        temperatures = temperature_pair(src, dst)
+        if temperatures:
+            return ConversionQuery(value, temperatures[0], temperatures[1], "Temperature")
+        pair = INDEX.resolve_pair(src, dst)
+        if pair and not (overrides_registry(src) or overrides_registry(dst)):
+            from_ref, to_ref = pair
+            return ConversionQuery(value, from_ref.unit, to_ref.unit, from_ref.category)
+        try:
+            conversion_factor(src, dst)
+            return ConversionQuery(value, src, dst, CUSTOM_CATEGORY)
+        except DimensionError:
+            pass
+    return None
+
+
+def answer(text, engine=ENGINE):
+    """Answer a conversion question locally, or return None to let the LLM handle it"""
+    query = parse_query(text)
+    if query is None:
+        return None
+    if query.category == CUSTOM_CATEGORY:
+        try:
+            result = convert_expression(query.value, query.from_unit, query.to_unit)
+        except DimensionError:
+            return None
+    elif engine.can_convert(query.from_unit, query.to_unit, query.category):
+        result = engine.convert(query.value, query.from_unit, query.to_unit, query.category)
+    else:
+        return None
+    return f"{format_significant(query.value)} {query.from_unit} = {format_significant(result)} {query.to_unit}"
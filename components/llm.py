@@ -0,0 +1,238 @@
+# Async client layer in front of the blocking Cohere chat calls
+
+import asyncio
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from .metrics import LLM_COALESCED, LLM_REQUEST_SECONDS, LLM_REQUESTS, LLM_TTFT_SECONDS
+from .ratelimit import PRIORITY_CHAT, get_limiter
+
+_loop = None
+_loop_lock = threading.Lock()
+_clients = {}
+_DONE = object()
+
+
+def get_loop():
+    """Return the process-wide event loop, started on a daemon thread on first use"""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def status_code(error):
+    """HTTP status of an SDK error (http_status in cohere 4, status_code in later SDKs), or None"""
+    for source in (error, getattr(error, "response", None)):
+        for name in ("http_status", "status_code"):
+            status = getattr(source, name, None)
+            if isinstance(status, int):
+                return status
+    return None
+
+
+def is_rate_limited(error):
+    """True for HTTP 429 errors"""
+    return status_code(error) == 429
+
+
+def outcome_of(error):
+    """Metric label for a failed upstream attempt"""
+    if is_rate_limited(error):
+        return "rate_limited"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    return "error"
+
+
+class LLMClient:
+    """Concurrency-limited, retrying, single-flight wrapper around model.chat
+
+    All calls run on one background event loop. A semaphore caps the number of
+    upstream requests in flight, each attempt has a timeout, 429s are retried with
+    exponential backoff, and identical in-flight requests share one upstream call.
+    With a limiter, every attempt first waits for a token from it (see ratelimit.py).
+    """
+    def __init__(self, model, max_concurrency=8, timeout=30.0, retries=3, backoff=0.5, limiter=None):
+        self.model = model
+        self.limiter = limiter
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.coalesced = 0
+        # Recent time-to-first-token samples (seconds) of streamed responses
+        self.ttft = deque(maxlen=1000)
+        self._semaphore = None
+        self._inflight = {}
+
+    async def chat_async(self, message, model="command", temperature=0.7, user=None,
+                         priority=PRIORITY_CHAT, **kwargs):
+        """Awaitable chat call, must run on the loop returned by get_loop()
+
+        user and priority only affect rate limiting, they aren't sent upstream.
+        """
+        key = (message, model, temperature, tuple(sorted(kwargs.items())))
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            LLM_COALESCED.inc()
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._call_with_retries(message, user, priority, model=model,
+                                                   temperature=temperature, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _run_blocking(self, func, timeout=None):
+        """Run a blocking SDK call on the executor under the concurrency cap
+
+        The slot is released when the thread finishes, not when we stop waiting:
+        a timed-out call keeps running upstream, so it keeps counting.
+        """
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(None, func)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        def finished(f):
+            semaphore.release()
+            if not f.cancelled():
+                f.exception()  # retrieved, even if nobody waits for it any more
+
+        future.add_done_callback(finished)
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def _acquire(self, user, priority):
+        if self.limiter is not None:
+            await self.limiter.acquire(user, priority)
+
+    async def _throttle(self, error):
+        # The provider disagrees with our bucket; stop everyone for a moment
+        if self.limiter is not None and is_rate_limited(error):
+            await self.limiter.drain()
+
+    async def _call_with_retries(self, message, user, priority, **kwargs):
+        for attempt in range(self.retries + 1):
+            await self._acquire(user, priority)
+            try:
+                start = time.perf_counter()
+                try:
+                    result = await self._run_blocking(partial(self.model.chat, message=message, **kwargs),
+                                                      self.timeout)
+                finally:
+                    LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, kind="chat")
+                LLM_REQUESTS.inc(kind="chat", outcome="ok")
+                return result
+            except Exception as e:
+                LLM_REQUESTS.inc(kind="chat", outcome=outcome_of(e))
+                await self._throttle(e)
+                if not is_rate_limited(e) or attempt == self.retries:
+                    raise
+                delay = self.backoff * (2 ** attempt)
+                await asyncio.sleep(delay + random.uniform(0, delay))
+
+    def chat(self, message, **kwargs):
+        """Blocking call for the Streamlit script thread"""
+        future = asyncio.run_coroutine_threadsafe(self.chat_async(message, **kwargs), get_loop())
+        return future.result()
+
+    def stream(self, message, user=None, priority=PRIORITY_CHAT, on_ttft=None, **kwargs):
+        """Yield text chunks as the model generates them, records time-to-first-token
+
+        Streams share the concurrency limit. A 429 is retried only before the
+        first chunk has been delivered. on_ttft(seconds) is called with this
+        call's time-to-first-token (self.ttft is shared by every session).
+        """
+        chunks = queue.Queue()
+        start = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(self._stream_async(message, chunks, user, priority, kwargs), get_loop())
+        first = True
+        while True:
+            item = chunks.get()
+            if item is _DONE:
+                break
+            if first:
+                ttft = time.perf_counter() - start
+                self.ttft.append(ttft)
+                LLM_TTFT_SECONDS.observe(ttft)
+                if on_ttft is not None:
+                    on_ttft(ttft)
+                first = False
+            yield item
+        future.result()
+
+    async def _stream_async(self, message, chunks, user, priority, kwargs):
+        started = []
+        try:
+            for attempt in range(self.retries + 1):
+                await self._acquire(user, priority)
+                try:
+                    start = time.perf_counter()
+                    try:
+                        await self._run_blocking(partial(self._pump, message, chunks, started, kwargs))
+                    finally:
+                        LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, kind="stream")
+                    LLM_REQUESTS.inc(kind="stream", outcome="ok")
+                    return
+                except Exception as e:
+                    LLM_REQUESTS.inc(kind="stream", outcome=outcome_of(e))
+                    await self._throttle(e)
+                    if started or not is_rate_limited(e) or attempt == self.retries:
+                        raise
+                    delay = self.backoff * (2 ** attempt)
+                    await asyncio.sleep(delay + random.uniform(0, delay))
+        finally:
+            chunks.put(_DONE)
+
+    def _pump(self, message, chunks, started, kwargs):
+        # Runs on an executor thread, iterating the SDK's blocking event stream
+        for event in self.model.chat(message=message, stream=True, **kwargs):
+            if getattr(event, "event_type", None) == "text-generation" and event.text:
+                started.append(True)
+                chunks.put(event.text)
+
+
+def get_llm(model):
+    """Return the shared LLMClient for a model, so limits apply across sessions"""
+    client = _clients.get(id(model))
+    if client is None or client.model is not model:
+        with _loop_lock:
+            client = _clients.get(id(model))
+            if client is None or client.model is not model:
+                client = LLMClient(
+                    model,
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+                    timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+                    retries=int(os.getenv("LLM_RETRIES", "3")),
+                    limiter=get_limiter(),
+                )
+                _clients[id(model)] = client
+    return client
@@ -0,0 +1,235 @@
+# Process-wide counters and latency histograms, exported in Prometheus text format
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; spans sub-millisecond table lookups up to slow LLM calls
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values"""
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, "") for name in self.labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _label_text(self.labels, key), value) for key, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, optionally split by label values"""
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts plus +Inf, then the running sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels.get(name, "") for name in self.labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        samples = []
+        for key, (counts, total) in items:
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                labels = _label_text(self.labels + ("le",), key + (_number(bound),))
+                samples.append((self.name + "_bucket", labels, running))
+            labels = _label_text(self.labels, key)
+            samples.append((self.name + "_sum", labels, total))
+            samples.append((self.name + "_count", labels, running))
+        return samples
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that report gauges (e.g. cache stats) at scrape time"""
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._get(Counter, name, help, labels=labels)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, labels=labels, buckets=buckets)
+
+    def register_collector(self, collect):
+        """collect() returns [(name, kind, help, value)] read when metrics are exported"""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        """Everything in Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in metric.samples())
+        for collect in collectors:
+            for name, kind, help, value in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """Atomically write the current metrics to a file (for node_exporter's textfile collector)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+METRICS = MetricsRegistry()
+
+CONVERSION_SECONDS = METRICS.histogram(
+    "unit_converter_conversion_seconds", "Time to answer a conversion, by how it was answered", ("path",))
+LLM_REQUEST_SECONDS = METRICS.histogram(
+    "unit_converter_llm_request_seconds", "Upstream LLM request latency per attempt", ("kind",))
+LLM_TTFT_SECONDS = METRICS.histogram(
+    "unit_converter_llm_ttft_seconds", "Time to first streamed token")
+LLM_REQUESTS = METRICS.counter(
+    "unit_converter_llm_requests_total", "Upstream LLM attempts by outcome", ("kind", "outcome"))
+LLM_COALESCED = METRICS.counter(
+    "unit_converter_llm_coalesced_total", "Requests that joined an identical in-flight call")
+LLM_QUEUE_SECONDS = METRICS.histogram(
+    "unit_converter_llm_queue_seconds", "Time spent waiting for a rate limiter token")
+LLM_THROTTLED = METRICS.counter(
+    "unit_converter_llm_throttled_total", "Requests refused by the rate limiter", ("reason",))
+SPEECH_SECONDS = METRICS.histogram(
+    "unit_converter_speech_recognition_seconds", "Speech-to-text latency", ("outcome",))
+RERUN_SECONDS = METRICS.histogram(
+    "unit_converter_script_run_seconds", "Full Streamlit script run time")
+
+
+class _Exporter(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = METRICS.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def start_exporter(port=None, path=None, interval=None):
+    """Serve /metrics on a local port and/or dump to a file periodically, once per process
+
+    Defaults come from UNIT_CONVERTER_METRICS_PORT, UNIT_CONVERTER_METRICS_FILE and
+    UNIT_CONVERTER_METRICS_INTERVAL (seconds, default 15). Does nothing when neither is set.
+    """
+    global _exporter_started
+    if _exporter_started:
+        return
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+        port = port or os.getenv("UNIT_CONVERTER_METRICS_PORT")
+        path = path or os.getenv("UNIT_CONVERTER_METRICS_FILE")
+        interval = interval or float(os.getenv("UNIT_CONVERTER_METRICS_INTERVAL", "15"))
+        if port:
+            try:
+                server = ThreadingHTTPServer(("127.0.0.1", int(port)), _Exporter)
+            except OSError as e:
+                # Port taken, e.g. by another Streamlit process; the app runs on without the exporter
+                print(f"Metrics exporter not started on port {port}: {e}", file=sys.stderr)
+            else:
+                threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        if path:
+            def dump_forever():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        METRICS.dump(path)
+                    except OSError:
+                        pass
+            threading.Thread(target=dump_forever, name="metrics-dump", daemon=True).start()
@@ -0,0 +1,154 @@
+# Multi-core bulk conversion with a thread pool or a process pool over shared memory
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .engine import ENGINE
+
+# Below this many elements per worker, splitting costs more than it saves
+MIN_CHUNK = 1 << 16
+
+# Shared memory blocks attached by a worker process, keyed by name
+_attached = {}
+
+
+def _attach(*names):
+    """Attach the current job's blocks, closing any left from earlier jobs
+
+    The parent replaces its blocks when they grow or the converter closes, so a
+    worker only ever needs the pair it is working on.
+    """
+    for name in list(_attached):
+        if name not in names:
+            _attached.pop(name).close()
+    for name in names:
+        if name not in _attached:
+            _attached[name] = shared_memory.SharedMemory(name=name)
+    return [_attached[name] for name in names]
+
+
+def _convert_shared(in_name, out_name, dtype, start, stop, from_unit, to_unit, category):
+    """Worker: convert elements [start, stop) between two shared memory blocks"""
+    itemsize = np.dtype(dtype).itemsize
+    shm_in, shm_out = _attach(in_name, out_name)
+    src = np.ndarray(stop - start, dtype=dtype, buffer=shm_in.buf, offset=start * itemsize)
+    dst = np.ndarray(stop - start, dtype=dtype, buffer=shm_out.buf, offset=start * itemsize)
+    ENGINE.convert_many(src, from_unit, to_unit, category, out=dst)
+    return stop - start
+
+
+def split(size, workers, min_chunk=MIN_CHUNK):
+    """Return ordered (start, stop) ranges covering size elements"""
+    count = max(1, min(workers, size // min_chunk or 1))
+    bounds = np.linspace(0, size, count + 1).astype(int)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+class ParallelConverter:
+    """Splits arrays into chunks and converts them across a worker pool
+
+    mode="thread" relies on NumPy releasing the GIL. mode="process" passes chunks
+    through multiprocessing.shared_memory instead of pickling them. Output order
+    always matches input order.
+    """
+    def __init__(self, workers=None, mode="thread"):
+        self.workers = workers or os.cpu_count() or 1
+        self.mode = mode
+        self.elements = 0
+        self.seconds = 0.0
+        if mode == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        elif mode == "process":
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            raise ValueError(f"Unknown mode '{mode}', expected 'thread' or 'process'")
+        self._shm_in = self._shm_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+        for shm in (self._shm_in, self._shm_out):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._shm_in = self._shm_out = None
+
+    def _buffers(self, nbytes):
+        # Reuse the shared blocks across calls, growing them when needed
+        if self._shm_in is None or self._shm_in.size < nbytes:
+            for shm in (self._shm_in, self._shm_out):
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+            self._shm_in = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._shm_out = shared_memory.SharedMemory(create=True, size=nbytes)
+        return self._shm_in, self._shm_out
+
+    def convert(self, values, from_unit, to_unit, category, out=None):
+        """Convert values across the pool, returns out (allocated if not given)
+
+        out must be a writable, C-contiguous float array with as many elements as
+        values; anything else would make reshape() hand back a copy and lose the results.
+        """
+        ENGINE.pair(from_unit, to_unit, category)
+        if out is not None and (out.dtype.kind != "f" or not out.flags.c_contiguous or not out.flags.writeable):
+            raise ValueError("out must be a writable C-contiguous float array")
+        values = np.asarray(values, dtype=out.dtype if out is not None else np.float64).reshape(-1)
+        if out is None:
+            out = np.empty(values.shape, dtype=np.float64)
+        elif out.size != values.size:
+            raise ValueError(f"out has {out.size} elements, expected {values.size}")
+        flat_out = out.reshape(-1)
+        start_time = time.perf_counter()
+        ranges = split(values.size, self.workers)
+
+        if self.mode == "thread":
+            futures = [
+                self.executor.submit(ENGINE.convert_many, values[a:b], from_unit, to_unit, category, out=flat_out[a:b])
+                for a, b in ranges
+            ]
+            for future in futures:
+                future.result()
+        else:
+            shm_in, shm_out = self._buffers(values.nbytes)
+            dtype = values.dtype.str
+            np.ndarray(values.shape, dtype=values.dtype, buffer=shm_in.buf)[:] = values
+            futures = [
+                self.executor.submit(_convert_shared, shm_in.name, shm_out.name, dtype, a, b,
+                                     from_unit, to_unit, category)
+                for a, b in ranges
+            ]
+            for future in futures:
+                future.result()
+            flat_out[:] = np.ndarray(values.shape, dtype=values.dtype, buffer=shm_out.buf)
+
+        self.seconds += time.perf_counter() - start_time
+        self.elements += values.size
+        return out
+
+
+def measure_speedup(converter, sample, from_unit, to_unit, category, repeat=3):
+    """Time one worker against the pool on the same sample, returns (serial_s, parallel_s, speedup)"""
+    sample = np.ascontiguousarray(sample, dtype=np.float64)
+    out = np.empty_like(sample)
+    serial = min(_timed(ENGINE.convert_many, sample, from_unit, to_unit, category, out) for _ in range(repeat))
+    elements, seconds = converter.elements, converter.seconds
+    parallel = min(_timed(converter.convert, sample, from_unit, to_unit, category, out) for _ in range(repeat))
+    # Keep the benchmark out of the converter's running totals
+    converter.elements, converter.seconds = elements, seconds
+    return serial, parallel, serial / parallel if parallel else float("inf")
+
+
+def _timed(func, sample, from_unit, to_unit, category, out):
+    start = time.perf_counter()
+    func(sample, from_unit, to_unit, category, out=out)
+    return time.perf_counter() - start
@@ -0,0 +1,218 @@
+# Near-duplicate chat prompt cache: normalized prompts, MinHash/LSH lookup, no embedding service
+
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from .metrics import METRICS
+from .unit_index import INDEX
+
+CONTRACTIONS = [
+    ("n't", " not"), ("'re", " are"), ("'m", " am"), ("'ll", " will"),
+    ("'ve", " have"), ("'d", " would"), ("'s", " is"),
+]
+# Filler that doesn't change what is being asked; question words and "not" are kept
+STOP_WORDS = frozenset("""
+    a an the is are am was were be been do does did can could would will should
+    please tell me you your i we us my our just kindly hey hi hello
+    to into in from as for about actually exactly convert
+""".split())
+# Contractions typed without the apostrophe
+BARE_CONTRACTIONS = {"whats": "what", "hows": "how", "wheres": "where", "whos": "who", "thats": "that",
+                     "dont": "not", "doesnt": "not", "cant": "not", "isnt": "not", "wont": "not"}
+TOKEN_RE = re.compile(r"\d+(?:\.\d+)?|[a-z]+")
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?$")
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands of 4 rows: pairs with Jaccard 0.8 collide with p > 0.999
+_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 29, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, NUM_PERM).astype(np.uint64)
+
+Entry = namedtuple("Entry", "shingles numbers units bands value expires")
+
+
+def normalize_prompt(prompt, index=INDEX):
+    """Canonical token string: contractions expanded, punctuation and filler dropped, units canonical
+
+    "What's a Kelvin?" and "what is kelvin" both become "what kelvin";
+    "5 km in mi" becomes "5 kilometers miles".
+    """
+    return " ".join(_tokens(prompt, index)[0])
+
+
+def _tokens(prompt, index=INDEX):
+    """(normalized tokens, the unit tokens among them in order)"""
+    text = prompt.lower().replace("’", "'")
+    for short, full in CONTRACTIONS:
+        text = text.replace(short, full)
+    words = [BARE_CONTRACTIONS.get(w, w) for w in TOKEN_RE.findall(text.replace(",", ""))]
+    tokens, units = [], []
+    i = 0
+    while i < len(words):
+        after_number = bool(tokens) and NUMBER_RE.match(tokens[-1])
+        # Two-word units first ("square feet"), single letters only right after a number ("5 m")
+        for size in (2, 1):
+            alias = " ".join(words[i:i + size])
+            refs = index.lookup(alias) if len(words[i:i + size]) == size else ()
+            if refs and (after_number or (len(alias) > 1 and alias not in STOP_WORDS)):
+                tokens.append(refs[0].unit.lower())
+                units.append(tokens[-1])
+                i += size
+                break
+        else:
+            if words[i] not in STOP_WORDS:
+                tokens.append(words[i])
+            i += 1
+    return tokens, tuple(units)
+
+
+def shingles(text, size=3):
+    """Character n-grams of the normalized text"""
+    padded = f" {text} "
+    return frozenset(padded[i:i + size] for i in range(max(1, len(padded) - size + 1)))
+
+
+def minhash(grams):
+    """NUM_PERM-value MinHash signature of a set of strings"""
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class SimilarPromptCache:
+    """Bounded LRU/TTL cache that also answers prompts worded slightly differently
+
+    Lookups try the exact normalized text first, then LSH buckets over MinHash
+    signatures; candidates are checked with the exact Jaccard similarity of
+    their character trigrams and must contain the same numbers and the same units
+    in the same order (trigrams don't see order, and "fahrenheit to celsius" is
+    not "celsius to fahrenheit"). scope (the
+    chat context digest for follow-ups, see cache.cache_scope) keeps answers
+    to follow-ups apart.
+    """
+    def __init__(self, maxsize=2048, threshold=0.85, ttl=24 * 3600, index=INDEX):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        self.index = index
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _key(self, prompt, scope):
+        tokens, units = _tokens(prompt, self.index)
+        text = " ".join(tokens)
+        grams = shingles(text)
+        rows = NUM_PERM // BANDS
+        signature = minhash(grams)
+        bands = tuple((scope, b, signature[b * rows:(b + 1) * rows].tobytes()) for b in range(BANDS))
+        numbers = tuple(sorted(t for t in text.split() if NUMBER_RE.match(t)))
+        return text, grams, numbers, units, bands
+
+    def get(self, prompt, scope="", default=None):
+        """Stored answer for prompt or a near-duplicate of it, else default"""
+        text, grams, numbers, units, bands = self._key(prompt, scope)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((scope, text))
+            if entry is not None and entry.expires > now:
+                self._entries.move_to_end((scope, text))
+                self.hits += 1
+                return entry.value
+            best, best_score = None, self.threshold
+            for band in bands:
+                for key in self._buckets.get(band, ()):
+                    candidate = self._entries[key]
+                    if candidate.numbers != numbers or candidate.units != units or candidate.expires <= now:
+                        continue
+                    score = jaccard(grams, candidate.shingles)
+                    if score >= best_score:
+                        best, best_score = key, score
+            if best is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(best)
+            self.near_hits += 1
+            return self._entries[best].value
+
+    def set(self, prompt, value, scope="", ttl=None):
+        text, grams, numbers, units, bands = self._key(prompt, scope)
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        key = (scope, text)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = Entry(grams, numbers, units, bands, value, expires)
+            for band in bands:
+                self._buckets.setdefault(band, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self):
+        """Exact and near-duplicate hits, misses, hit rate and size"""
+        with self._lock:
+            total = self.hits + self.near_hits + self.misses
+            return {
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.near_hits) / total if total else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Shared by every session in the process. CHAT_SIMILARITY_THRESHOLD above 1 disables near matches.
+PROMPT_CACHE = SimilarPromptCache(
+    maxsize=int(os.getenv("CHAT_SIMILAR_CACHE_SIZE", "2048")),
+    threshold=float(os.getenv("CHAT_SIMILARITY_THRESHOLD", "0.85")),
+    ttl=float(os.getenv("UNIT_CONVERTER_CACHE_TTL", str(24 * 3600))),
+)
+
+
+def _prompt_cache_metrics():
+    stats = PROMPT_CACHE.stats()
+    return [
+        ("unit_converter_prompt_cache_hits_total", "counter", "Prompt cache exact hits", stats["hits"]),
+        ("unit_converter_prompt_cache_near_hits_total", "counter", "Prompt cache near-duplicate hits",
+         stats["near_hits"]),
+        ("unit_converter_prompt_cache_misses_total", "counter", "Prompt cache misses", stats["misses"]),
+        ("unit_converter_prompt_cache_evictions_total", "counter", "Prompt cache LRU evictions", stats["evictions"]),
+        ("unit_converter_prompt_cache_entries", "gauge", "Entries in the prompt cache", stats["size"]),
+    ]
+
+
+METRICS.register_collector(_prompt_cache_metrics)
@@ -0,0 +1,288 @@
+# Process-wide token bucket, daily quota and fair-share scheduling for LLM calls
+
+import asyncio
+import datetime
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from .metrics import LLM_QUEUE_SECONDS, LLM_THROTTLED
+
+# Lower number = served first
+PRIORITY_CONVERSION = 0
+PRIORITY_CHAT = 1
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised when the LLM budget is used up or a request waited too long for a token"""
+
+
+def _connect(path):
+    db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+    db.execute("PRAGMA journal_mode=WAL")
+    return db
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, up to capacity
+
+    With a path the bucket state lives in SQLite, so every process on the host
+    shares one budget.
+    """
+    def __init__(self, rate, capacity, path=None, name="llm"):
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._tokens = capacity
+        self._updated = time.time()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = _connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL, updated REAL)"
+            )
+            self._db.execute(
+                "INSERT OR IGNORE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (name, capacity, self._updated)
+            )
+
+    @property
+    def shared(self):
+        """True when the state is in SQLite (calls may block on the database)"""
+        return self._db is not None
+
+    def _refill(self, tokens, updated, now):
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def take(self):
+        """Take one token; returns 0.0 on success, else the seconds until one is available"""
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                self._tokens = self._refill(self._tokens, self._updated, now)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return 0.0
+                return (1 - self._tokens) / self.rate
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                tokens, updated = self._db.execute(
+                    "SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                tokens = self._refill(tokens, updated, now)
+                wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+                if not wait:
+                    tokens -= 1
+                self._db.execute(
+                    "UPDATE buckets SET tokens = ?, updated = ? WHERE name = ?", (tokens, now, self.name)
+                )
+            finally:
+                self._db.execute("COMMIT")
+            return wait
+
+    def refund(self):
+        """Put back a token that was taken but not used"""
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                self._tokens = min(self.capacity, self._refill(self._tokens, self._updated, now) + 1)
+                self._updated = now
+            else:
+                self._db.execute(
+                    "UPDATE buckets SET tokens = MIN(?, tokens + 1) WHERE name = ?", (self.capacity, self.name)
+                )
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider answered 429 anyway"""
+        now = time.time()
+        with self._lock:
+            if self._db is None:
+                self._tokens, self._updated = 0.0, now
+            else:
+                self._db.execute("UPDATE buckets SET tokens = 0, updated = ? WHERE name = ?", (now, self.name))
+
+
+class DailyQuota:
+    """Calls allowed per UTC day (limit 0 = unlimited), optionally shared through SQLite"""
+    def __init__(self, limit, path=None):
+        self.limit = limit
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = _connect(path)
+            self._db.execute("CREATE TABLE IF NOT EXISTS quota (day TEXT PRIMARY KEY, used INTEGER)")
+
+    @property
+    def shared(self):
+        return self._db is not None
+
+    @staticmethod
+    def today():
+        return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%d")
+
+    def try_use(self):
+        """Count one call if the day's budget allows it"""
+        day = self.today()
+        with self._lock:
+            if self._db is None:
+                used = self._counts.get(day, 0)
+                if self.limit and used >= self.limit:
+                    return False
+                self._counts = {day: used + 1}
+                return True
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT used FROM quota WHERE day = ?", (day,)).fetchone()
+                used = row[0] if row else 0
+                if self.limit and used >= self.limit:
+                    return False
+                self._db.execute("INSERT OR REPLACE INTO quota (day, used) VALUES (?, ?)", (day, used + 1))
+                return True
+            finally:
+                self._db.execute("COMMIT")
+
+    def used(self):
+        day = self.today()
+        with self._lock:
+            if self._db is None:
+                return self._counts.get(day, 0)
+            row = self._db.execute("SELECT used FROM quota WHERE day = ?", (day,)).fetchone()
+            return row[0] if row else 0
+
+
+class RateLimiter:
+    """Hands out bucket tokens fairly: by priority first, then round-robin across users
+
+    acquire() must run on the LLM event loop. One user sending many requests only
+    delays their own queue, conversion fallbacks go ahead of chat, and requests that
+    would wait longer than max_wait (or exceed the daily quota) raise BudgetExceeded
+    so callers can fall back to the local engine. SQLite-backed buckets and quotas
+    are called on the executor so they never block the loop.
+    """
+    def __init__(self, bucket, quota=None, max_wait=10.0):
+        self.bucket = bucket
+        self.quota = quota
+        self.max_wait = max_wait
+        self._queues = {}
+        self._dispatcher = None
+
+    @staticmethod
+    async def _call(owner, func):
+        """func() directly for in-memory state, on the executor when it hits SQLite"""
+        if not owner.shared:
+            return func()
+        return await asyncio.get_running_loop().run_in_executor(None, func)
+
+    async def drain(self):
+        """Empty the bucket after the provider answered 429 anyway"""
+        await self._call(self.bucket, self.bucket.drain)
+
+    async def acquire(self, user=None, priority=PRIORITY_CHAT):
+        """Wait for a token; raises BudgetExceeded instead of queueing past max_wait"""
+        if self.quota is not None and self.quota.limit and await self._call(self.quota, self.quota.used) >= self.quota.limit:
+            LLM_THROTTLED.inc(reason="quota")
+            raise BudgetExceeded("Daily LLM quota used up")
+        future = asyncio.get_running_loop().create_future()
+        users = self._queues.setdefault(priority, OrderedDict())
+        users.setdefault(user, deque()).append(future)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            LLM_THROTTLED.inc(reason="wait")
+            raise BudgetExceeded(f"No LLM capacity within {self.max_wait:g}s") from None
+        finally:
+            LLM_QUEUE_SECONDS.observe(time.perf_counter() - start)
+
+    def _has_waiters(self):
+        return any(not future.done() for users in self._queues.values()
+                   for waiters in users.values() for future in waiters)
+
+    def _next_waiter(self):
+        for priority in sorted(self._queues):
+            users = self._queues[priority]
+            while users:
+                user, waiters = next(iter(users.items()))
+                future = waiters.popleft()
+                if waiters:
+                    # Round-robin: this user goes to the back of the line
+                    users.move_to_end(user)
+                else:
+                    del users[user]
+                if not future.done():
+                    return future
+        return None
+
+    def _fail_all(self, error):
+        for users in self._queues.values():
+            for waiters in users.values():
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(error)
+                        # Retrieved here in case the waiter already timed out
+                        future.exception()
+        self._queues.clear()
+
+    async def _dispatch(self):
+        # Runs while anyone is queued; acquire() restarts it
+        while self._has_waiters():
+            wait = await self._call(self.bucket, self.bucket.take)
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+            # Chosen only once the token is in hand, so a higher-priority request that
+            # arrived while we slept goes first
+            future = self._next_waiter()
+            if future is None:
+                # Everyone timed out in the meantime
+                await self._call(self.bucket, self.bucket.refund)
+                return
+            if self.quota is not None and not await self._call(self.quota, self.quota.try_use):
+                # Nobody gets to use this token, so it goes back for other processes
+                await self._call(self.bucket, self.bucket.refund)
+                LLM_THROTTLED.inc(reason="quota")
+                error = BudgetExceeded("Daily LLM quota used up")
+                future.set_exception(error)
+                future.exception()
+                self._fail_all(error)
+                continue
+            future.set_result(None)
+
+    def usage(self):
+        """(calls today, daily limit or 0)"""
+        if self.quota is None:
+            return 0, 0
+        return self.quota.used(), self.quota.limit
+
+
+def get_limiter():
+    """Process-wide limiter configured from the environment
+
+    LLM_RATE_PER_MINUTE (default 20) and LLM_BURST (5) size the bucket,
+    LLM_DAILY_LIMIT caps calls per day (0 = no cap), LLM_MAX_WAIT is how long a
+    request may queue (seconds) and LLM_LIMITER_DB shares the budget across
+    processes through SQLite.
+    """
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                path = os.getenv("LLM_LIMITER_DB")
+                bucket = TokenBucket(
+                    rate=float(os.getenv("LLM_RATE_PER_MINUTE", "20")) / 60,
+                    capacity=float(os.getenv("LLM_BURST", "5")),
+                    path=path,
+                )
+                quota = DailyQuota(int(os.getenv("LLM_DAILY_LIMIT", "0")), path=path)
+                _limiter = RateLimiter(bucket, quota, max_wait=float(os.getenv("LLM_MAX_WAIT", "10")))
+    return _limiter
@@ -0,0 +1,254 @@
+"""Unit registry: built-in categories merged with user-defined TOML/JSON files
+
+A registry file adds categories or extends existing ones, e.g. (JSON):
+
+    {"categories": {
+        "Data Rate": {"icon": "📶", "base": "Bits per Second", "units": {
+            "Bits per Second": {"factor": 1, "aliases": ["bps", "bit/s"]},
+            "Megabits per Second": {"factor": 1e6, "aliases": ["mbps", "mbit/s"]}
+        }},
+        "Pressure": {"units": {"Megapascal": {"factor": 1e6, "aliases": ["mpa"]}}}
+    }}
+
+Factors convert to the category's base unit, with base = (value + offset) * factor.
+Factors and offsets may be numbers or exact ratio strings such as "5/9".
+A unit that already exists may leave out "factor" to only add aliases (or an offset).
+Files are listed in UNIT_CONVERTER_REGISTRY (separated by os.pathsep). The merged,
+validated result is written as a JSON snapshot keyed by a hash of its inputs, so warm
+processes skip parsing and validation. The snapshot lives in a user-writable cache
+dir, so it is plain data (never pickle) and is only used when the full hash inside
+matches. Each category is only decoded when first used.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+from collections.abc import Mapping
+from fractions import Fraction
+
+from .unit_config import UnitCategories
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+FORMAT_VERSION = 3
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "unit-converter")
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class RegistryError(ValueError):
+    """Raised for unreadable or invalid registry files"""
+
+
+def read_file(path):
+    """Parse one registry file (.toml or .json)"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        if path.lower().endswith(".toml"):
+            if tomllib is None:
+                raise RegistryError(f"{path}: reading TOML needs Python 3.11+ or the 'tomli' package")
+            return tomllib.loads(raw.decode("utf-8"))
+        return json.loads(raw.decode("utf-8"))
+    except RegistryError:
+        raise
+    except Exception as e:
+        raise RegistryError(f"{path}: {e}") from None
+
+
+def merge(categories, aliases, spec, source="<registry>"):
+    """Merge a parsed registry spec into categories/aliases in place"""
+    if not isinstance(spec.get("categories"), dict):
+        raise RegistryError(f"{source}: expected a 'categories' table")
+    for name, cat_spec in spec["categories"].items():
+        if not isinstance(cat_spec, dict):
+            raise RegistryError(f"{source}: category '{name}' must be a table")
+        if not isinstance(cat_spec.get("icon", ""), str) or not isinstance(cat_spec.get("base", ""), str):
+            raise RegistryError(f"{source}: '{name}.icon' and '{name}.base' must be strings")
+        units = cat_spec.get("units", {})
+        if not isinstance(units, dict):
+            raise RegistryError(f"{source}: '{name}.units' must be a table of unit definitions")
+        data = categories.get(name)
+        if data is None:
+            if "base" not in cat_spec:
+                raise RegistryError(f"{source}: new category '{name}' needs a 'base' unit")
+            data = categories[name] = {"units": [], "icon": cat_spec.get("icon", "📦"),
+                                       "base": cat_spec["base"], "factors": {}}
+        elif "icon" in cat_spec:
+            data["icon"] = cat_spec["icon"]
+        for unit, unit_spec in units.items():
+            if not isinstance(unit_spec, dict):
+                raise RegistryError(f"{source}: unit '{name}.{unit}' must be a table like {{factor = 1}}")
+            new_aliases = unit_spec.get("aliases", [])
+            if not isinstance(new_aliases, list) or not all(isinstance(a, str) for a in new_aliases):
+                raise RegistryError(f"{source}: '{name}.{unit}.aliases' must be a list of strings")
+            if unit not in data["units"]:
+                data["units"].append(unit)
+                data["factors"][unit] = unit_spec.get("factor")
+            elif "factor" in unit_spec:
+                data["factors"][unit] = unit_spec["factor"]
+            # else: only adds aliases / an offset to a unit that already has a factor
+            if "offset" in unit_spec:
+                data.setdefault("offsets", {})[unit] = unit_spec["offset"]
+            aliases.setdefault(unit, [])
+            aliases[unit] = aliases[unit] + [a for a in new_aliases if a not in aliases[unit]]
+
+
+def exact_factor(value):
+    """Exact rational for a factor/offset: "5/9" -> 5/9, 0.3048 -> 3048/10000 (not the binary float)"""
+    if isinstance(value, Fraction):
+        return value
+    if isinstance(value, bool):
+        raise TypeError("factor can't be a boolean")
+    if isinstance(value, float):
+        return Fraction(repr(value))
+    return Fraction(value)
+
+
+def _valid_number(value):
+    try:
+        return math.isfinite(float(exact_factor(value)))
+    except (TypeError, ValueError, ZeroDivisionError, OverflowError):
+        return False
+
+
+def validate(categories):
+    """Check every unit has a usable factor and every category a known base"""
+    owners = {}
+    for name, data in categories.items():
+        if data.get("base") not in data["units"]:
+            raise RegistryError(f"Category '{name}': base unit '{data.get('base')}' is not one of its units")
+        for unit in data["units"]:
+            if unit in owners and owners[unit] != name:
+                raise RegistryError(f"Unit '{unit}' is defined in both '{owners[unit]}' and '{name}'")
+            owners[unit] = name
+            factor = data["factors"].get(unit)
+            if not _valid_number(factor) or exact_factor(factor) <= 0:
+                raise RegistryError(f"Unit '{unit}' in '{name}': factor must be a positive number")
+            if not _valid_number(data.get("offsets", {}).get(unit, 0)):
+                raise RegistryError(f"Unit '{unit}' in '{name}': offset must be a number")
+
+
+class LazyCategories(Mapping):
+    """Read-only category mapping that decodes each category's JSON on first access"""
+    def __init__(self, blobs):
+        self._blobs = blobs
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        data = self._loaded.get(name)
+        if data is None:
+            blob = self._blobs[name]
+            with self._lock:
+                data = self._loaded.get(name)
+                if data is None:
+                    data = self._loaded[name] = json.loads(blob)
+        return data
+
+    def __iter__(self):
+        return iter(self._blobs)
+
+    def __len__(self):
+        return len(self._blobs)
+
+
+class Registry:
+    """Merged unit definitions: categories (lazy), unit names per category and aliases"""
+    def __init__(self, categories, units, aliases, digest):
+        self.categories = categories
+        self.units = units
+        self.aliases = aliases
+        self.digest = digest
+
+
+def _digest(paths):
+    h = hashlib.sha256(f"v{FORMAT_VERSION}".encode())
+    h.update(json.dumps([UnitCategories.get_categories(), UnitCategories.get_aliases()],
+                        sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(path.encode("utf-8") + b"\0" + f.read())
+    return h.hexdigest()
+
+
+def _build(paths):
+    categories = UnitCategories.get_categories()
+    aliases = UnitCategories.get_aliases()
+    for path in paths:
+        merge(categories, aliases, read_file(path), source=path)
+    validate(categories)
+    try:
+        blobs = {name: json.dumps(data, ensure_ascii=False) for name, data in categories.items()}
+    except (TypeError, ValueError) as e:
+        raise RegistryError(f"Registry values must be strings or numbers: {e}") from None
+    return {
+        "blobs": blobs,
+        "units": {name: tuple(data["units"]) for name, data in categories.items()},
+        "aliases": aliases,
+    }
+
+
+def _read_snapshot(path, digest):
+    """The snapshot at path if it is well-formed and built from exactly these inputs, else None"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("digest") != digest:
+        return None
+    blobs, units, aliases = snapshot.get("blobs"), snapshot.get("units"), snapshot.get("aliases")
+    if not (isinstance(blobs, dict) and isinstance(units, dict) and isinstance(aliases, dict)
+            and set(blobs) == set(units) and all(isinstance(b, str) for b in blobs.values())):
+        return None
+    return snapshot
+
+
+def load_registry(paths=None, cache_dir=None, use_snapshot=True):
+    """Load built-ins plus registry files, through the compiled snapshot when possible"""
+    if paths is None:
+        paths = [p for p in os.getenv("UNIT_CONVERTER_REGISTRY", "").split(os.pathsep) if p]
+    try:
+        digest = _digest(paths)
+    except OSError as e:
+        raise RegistryError(str(e)) from None
+    cache_dir = cache_dir or os.getenv("UNIT_CONVERTER_CACHE_DIR", DEFAULT_CACHE_DIR)
+    snapshot_path = os.path.join(cache_dir, f"registry-{digest[:16]}.json")
+
+    snapshot = _read_snapshot(snapshot_path, digest) if use_snapshot else None
+    if snapshot is None:
+        snapshot = _build(paths)
+        if use_snapshot:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(dict(snapshot, digest=digest), f, ensure_ascii=False)
+                os.replace(tmp, snapshot_path)
+            except OSError:
+                # A read-only disk only costs the warm-start speedup
+                pass
+
+    units = {name: tuple(names) for name, names in snapshot["units"].items()}
+    return Registry(LazyCategories(snapshot["blobs"]), units, snapshot["aliases"], digest)
+
+
+def get_registry():
+    """Process-wide registry, loaded on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = load_registry()
+    return _registry
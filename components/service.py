@@ -0,0 +1,380 @@
+"""Headless HTTP conversion service (asyncio, standard library only, no Streamlit)
+
+Endpoints:
+    GET  /convert?value=5&from=km&to=mi[&category=Length][&exact=1]
+    GET  /convert/all?value=5&from=km[&category=Length]   the value in every unit of its category
+    POST /convert/batch   JSON {"from": "km", "to": "mi", "values": [..]},
+                          a JSON list of {"value", "from", "to"[, "category"]} objects,
+                          or the same objects as NDJSON (one per line, answered as NDJSON)
+    GET  /units           every category, unit and alias in the registry
+    GET  /metrics         Prometheus metrics of this process
+
+Connections are kept alive (HTTP/1.1) and pipelined requests are answered in order.
+Run several processes on one port with --workers (SO_REUSEPORT, Linux/BSD).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from multiprocessing import Process
+from urllib.parse import parse_qsl
+
+import numpy as np
+
+from .conversion import convert_all_local, convert_local, resolve_units
+from .engine import ENGINE, UnknownUnitError, to_fraction
+from .expressions import CUSTOM_CATEGORY, DimensionError, conversion_factor
+from .metrics import METRICS
+from .registry import get_registry
+
+MAX_HEADER = 64 * 1024
+MAX_BODY = int(os.getenv("UNIT_CONVERTER_MAX_BODY", str(16 * 1024 * 1024)))
+# Exact values are Fractions; bounding digits and exponent bounds the cost of the arithmetic
+MAX_EXACT_DIGITS = 64
+MAX_EXACT_EXPONENT = 308
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+JSON_TYPE = b"application/json"
+NDJSON_TYPE = b"application/x-ndjson"
+
+HTTP_SECONDS = METRICS.histogram(
+    "unit_converter_http_request_seconds", "HTTP service request handling time", ("route", "status"))
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json(data):
+    return json.dumps(data, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def _number(value):
+    """JSON-safe float: NaN and infinities become null"""
+    return value if math.isfinite(value) else None
+
+
+def _echo(value):
+    """A request value as given, with non-finite floats (JSON NaN/Infinity) as null"""
+    return _number(value) if isinstance(value, float) else value
+
+
+def _param(query, name, required=True):
+    value = query.get(name)
+    if required and not value:
+        raise HTTPError(400, f"Missing '{name}' parameter")
+    if value is not None and not isinstance(value, str):
+        raise HTTPError(400, f"'{name}' must be a string")
+    return value
+
+
+def _check_exact(raw_value):
+    """400 for exact values ("1.5", "5/9") with too many digits or too large an exponent"""
+    for part in raw_value.split("/", 1):
+        try:
+            number = Decimal(part.strip().replace(",", ""))
+        except InvalidOperation:
+            raise HTTPError(400, f"'{raw_value}' is not a number") from None
+        if not number.is_finite():
+            raise HTTPError(400, f"'{raw_value}' is not a finite number")
+        if len(number.as_tuple().digits) > MAX_EXACT_DIGITS or abs(number.adjusted()) > MAX_EXACT_EXPONENT:
+            raise HTTPError(400, f"'{raw_value}' is too long or too large for exact mode")
+
+
+def _value(raw_value, exact=False):
+    """Parse the value parameter: a finite float, or a Fraction in exact mode"""
+    if exact:
+        _check_exact(raw_value)
+    try:
+        value = to_fraction(raw_value) if exact else float(raw_value)
+        finite = math.isfinite(float(value))
+    except (ValueError, ZeroDivisionError, OverflowError):
+        raise HTTPError(400, f"'{raw_value}' is not a number") from None
+    if not finite:
+        raise HTTPError(400, f"'{raw_value}' is not a finite number")
+    return value
+
+
+def _finite(result, conversion):
+    """The result as a float, 400 when it is out of the float range"""
+    try:
+        result = float(result)
+    except OverflowError:
+        result = math.inf
+    if not math.isfinite(result):
+        raise HTTPError(400, f"The result in {conversion.to_unit} is out of range")
+    return result
+
+
+def convert_one(query):
+    """GET /convert"""
+    exact = query.get("exact", "").lower() in ("1", "true", "yes")
+    value = _value(_param(query, "value"), exact)
+    try:
+        conversion = convert_local(value, _param(query, "from"), _param(query, "to"),
+                                   query.get("category") or None, exact=exact)
+    except (UnknownUnitError, DimensionError) as e:
+        raise HTTPError(400, str(e)) from None
+    result = conversion.result
+    body = {
+        "value": float(value),
+        "from": conversion.from_unit,
+        "to": conversion.to_unit,
+        "category": conversion.category,
+        "result": _finite(result, conversion),
+    }
+    if exact:
+        body["exact"] = str(result)
+    return 200, JSON_TYPE, _json(body)
+
+
+def convert_all(query):
+    """GET /convert/all"""
+    value = _value(_param(query, "value"))
+    try:
+        category, from_unit, units, results = convert_all_local(
+            value, _param(query, "from"), query.get("category") or None)
+    except UnknownUnitError as e:
+        raise HTTPError(400, str(e)) from None
+    return 200, JSON_TYPE, _json({
+        "value": value, "from": from_unit, "category": category,
+        "results": {unit: _number(result) for unit, result in zip(units, results.tolist())},
+    })
+
+
+def convert_array(values, from_unit, to_unit, category=None):
+    """Vectorized conversion of one unit pair; returns (results, category, from_unit, to_unit)
+
+    values must be a flat list of numbers (None for missing), else TypeError.
+    """
+    if not all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+        raise TypeError("values must be a flat list of numbers")
+    try:
+        values = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    except OverflowError:
+        raise ValueError("values must fit in a float") from None
+    if category != CUSTOM_CATEGORY:
+        if category and ENGINE.can_convert(from_unit, to_unit, category):
+            resolved = (category, from_unit, to_unit)
+        else:
+            resolved = resolve_units(from_unit, to_unit, category)
+        if resolved is not None:
+            category, from_unit, to_unit = resolved
+            return ENGINE.convert_many(values, from_unit, to_unit, category, out=values), category, from_unit, to_unit
+        if category:
+            raise UnknownUnitError(f"Can't convert '{from_unit}' to '{to_unit}' in '{category}'")
+    values *= conversion_factor(from_unit, to_unit)
+    return values, CUSTOM_CATEGORY, from_unit, to_unit
+
+
+def _convert_records(records):
+    """Convert a list of {"value", "from", "to", "category"} objects, grouped per unit pair"""
+    results = [None] * len(records)
+    groups = {}
+    for i, record in enumerate(records):
+        if not isinstance(record, dict) or "from" not in record or "to" not in record:
+            results[i] = {"error": "Each item needs 'value', 'from' and 'to'"}
+            continue
+        if not all(isinstance(record.get(name), str) for name in ("from", "to")) or \
+                not isinstance(record.get("category", ""), (str, type(None))):
+            results[i] = {"error": "'from', 'to' and 'category' must be strings"}
+            continue
+        key = (record["from"], record["to"], record.get("category"))
+        groups.setdefault(key, []).append(i)
+    for (from_unit, to_unit, category), indexes in groups.items():
+        try:
+            values, category, src, dst = convert_array(
+                [records[i].get("value") for i in indexes], from_unit, to_unit, category)
+        except (UnknownUnitError, DimensionError) as e:
+            for i in indexes:
+                results[i] = {"error": str(e)}
+            continue
+        except (TypeError, ValueError):
+            for i in indexes:
+                results[i] = {"error": "'value' must be a number"}
+            continue
+        for i, result in zip(indexes, values.tolist()):
+            results[i] = {"value": _echo(records[i].get("value")), "from": src, "to": dst,
+                          "category": category, "result": _number(result)}
+    return results
+
+
+def convert_batch(body, content_type):
+    """POST /convert/batch"""
+    if content_type.startswith(NDJSON_TYPE):
+        try:
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        except ValueError as e:
+            raise HTTPError(400, f"Invalid NDJSON: {e}") from None
+        lines = b"".join(_json(result) + b"\n" for result in _convert_records(records))
+        return 200, NDJSON_TYPE, lines
+    try:
+        data = json.loads(body or b"null")
+    except ValueError as e:
+        raise HTTPError(400, f"Invalid JSON: {e}") from None
+    if isinstance(data, list):
+        return 200, JSON_TYPE, _json({"results": _convert_records(data)})
+    if not isinstance(data, dict) or not isinstance(data.get("values"), list):
+        raise HTTPError(400, "Expected {'from', 'to', 'values': [...]} or a list of conversions")
+    try:
+        values, category, src, dst = convert_array(
+            data["values"], _param(data, "from"), _param(data, "to"), _param(data, "category", False))
+    except (UnknownUnitError, DimensionError) as e:
+        raise HTTPError(400, str(e)) from None
+    except (TypeError, ValueError):
+        raise HTTPError(400, "'values' must be numbers") from None
+    return 200, JSON_TYPE, _json({
+        "from": src, "to": dst, "category": category,
+        "results": [_number(v) for v in values.tolist()],
+    })
+
+
+def units_body(registry=None):
+    """The /units response, built once"""
+    registry = registry or get_registry()
+    categories = {
+        name: {"icon": data.get("icon"), "base": data.get("base"), "units": list(data["units"])}
+        for name, data in registry.categories.items()
+    }
+    return _json({"categories": categories, "aliases": registry.aliases})
+
+
+class ConversionProtocol(asyncio.Protocol):
+    """Minimal HTTP/1.1 server protocol: keep-alive, pipelining, Content-Length bodies"""
+    def __init__(self, units):
+        self.units = units
+        self.transport = None
+        self.buffer = bytearray()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while self.transport is not None and not self.transport.is_closing():
+            end = self.buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self.buffer) > MAX_HEADER:
+                    self.respond(413, JSON_TYPE, _json({"error": "Headers too large"}), False)
+                return
+            try:
+                lines = bytes(self.buffer[:end]).decode("latin-1").split("\r\n")
+                method, target, version = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0) or 0)
+            except ValueError:
+                self.respond(400, JSON_TYPE, _json({"error": "Malformed request"}), False)
+                return
+            if length > MAX_BODY:
+                self.respond(413, JSON_TYPE, _json({"error": "Body too large"}), False)
+                return
+            if "chunked" in headers.get("transfer-encoding", "").lower():
+                self.respond(411, JSON_TYPE, _json({"error": "Send a Content-Length body"}), False)
+                return
+            if len(self.buffer) < end + 4 + length:
+                return
+            body = bytes(self.buffer[end + 4:end + 4 + length])
+            del self.buffer[:end + 4 + length]
+            connection = headers.get("connection", "").lower()
+            keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+            status, content_type, payload = self.handle(method, target, headers, body)
+            self.respond(status, content_type, payload, keep_alive)
+
+    def handle(self, method, target, headers, body):
+        start = time.perf_counter()
+        path, _, query_string = target.partition("?")
+        try:
+            if path == "/convert":
+                if method != "GET":
+                    raise HTTPError(405, "Use GET")
+                result = convert_one(dict(parse_qsl(query_string)))
+            elif path == "/convert/all":
+                if method != "GET":
+                    raise HTTPError(405, "Use GET")
+                result = convert_all(dict(parse_qsl(query_string)))
+            elif path == "/convert/batch":
+                if method != "POST":
+                    raise HTTPError(405, "Use POST")
+                result = convert_batch(body, headers.get("content-type", "application/json").encode("latin-1"))
+            elif path == "/units":
+                result = 200, JSON_TYPE, self.units
+            elif path == "/metrics":
+                result = 200, b"text/plain; version=0.0.4", METRICS.render().encode("utf-8")
+            else:
+                raise HTTPError(404, f"No route for {path}")
+        except HTTPError as e:
+            result = e.status, JSON_TYPE, _json({"error": str(e)})
+        except Exception as e:
+            result = 500, JSON_TYPE, _json({"error": f"{type(e).__name__}: {e}"})
+        HTTP_SECONDS.observe(time.perf_counter() - start, route=path if result[0] != 404 else "other",
+                             status=result[0])
+        return result
+
+    def respond(self, status, content_type, payload, keep_alive):
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n").encode("latin-1")
+        self.transport.write(head + b"Content-Type: " + content_type + b"\r\n\r\n" + payload)
+        if not keep_alive:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+
+async def serve(host="127.0.0.1", port=8502, reuse_port=False, ready=None):
+    """Run the service until cancelled"""
+    loop = asyncio.get_running_loop()
+    units = units_body()
+    server = await loop.create_server(lambda: ConversionProtocol(units), host, port,
+                                      reuse_port=reuse_port or None, backlog=1024)
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
+
+
+def _run(host, port, reuse_port):
+    try:
+        asyncio.run(serve(host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Serve unit conversions over HTTP")
+    parser.add_argument("--host", default=os.getenv("UNIT_CONVERTER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("UNIT_CONVERTER_PORT", "8502")))
+    parser.add_argument("--workers", type=int, default=1, help="Processes sharing the port (default: 1)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    print(f"Serving conversions on http://{args.host}:{args.port} with {args.workers} worker(s)", file=sys.stderr)
+    if args.workers <= 1:
+        _run(args.host, args.port, False)
+        return 0
+    if not hasattr(socket, "SO_REUSEPORT"):
+        print("Error: --workers needs SO_REUSEPORT (Linux/BSD)", file=sys.stderr)
+        return 1
+    workers = [Process(target=_run, args=(args.host, args.port, True), daemon=True) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,408 @@
+"""Offline speech-to-text for voice commands
+
+Audio frames from the browser go into a bounded ring buffer. A worker thread
+runs voice-activity detection over it, cuts out utterances and hands each one to
+a local recognizer. Transcripts wait in a queue until the session polls them,
+so the Streamlit script thread never blocks on audio or on the network.
+
+Recognizers are pluggable, anything with transcribe(pcm, sample_rate) -> str:
+
+    SPEECH_ENGINE=vosk    (default) needs `pip install vosk` and a model, e.g.
+                          vosk-model-small-en-us-0.15 unpacked at VOSK_MODEL_PATH.
+                          With SPEECH_GRAMMAR=1 (default) decoding is limited to
+                          unit names, number words and command words.
+    SPEECH_ENGINE=sphinx  CMU PocketSphinx through SpeechRecognition.
+    SPEECH_ENGINE=google  The old online recognizer, still available on request.
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from .metrics import SPEECH_SECONDS
+from .unit_index import INDEX
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+DEFAULT_VOSK_MODEL = os.path.join("models", "vosk-model-small-en-us-0.15")
+
+_recognizer = None
+_recognizer_lock = threading.Lock()
+
+
+class RecognizerUnavailable(RuntimeError):
+    """Raised when no local speech recognizer is installed or configured"""
+
+
+# Spoken numbers -> digits, so "five point two kilometers to miles" parses like "5.2 km to miles"
+SMALL_NUMBERS = {
+    word: n for n, word in enumerate(
+        "zero one two three four five six seven eight nine ten eleven twelve thirteen "
+        "fourteen fifteen sixteen seventeen eighteen nineteen".split()
+    )
+}
+TENS = {word: 10 * n for n, word in enumerate("twenty thirty forty fifty sixty seventy eighty ninety".split(), 2)}
+SCALES = {"hundred": 100, "thousand": 1000, "million": 10 ** 6, "billion": 10 ** 9}
+NUMBER_WORDS = set(SMALL_NUMBERS) | set(TENS) | set(SCALES) | {"point", "minus", "negative", "and", "a"}
+COMMAND_WORDS = ("convert", "change", "what", "is", "how", "many", "much", "are", "there",
+                 "in", "to", "into", "as", "per", "please", "of", "square", "cubic")
+
+
+def _is_number_word(word):
+    return word in SMALL_NUMBERS or word in TENS or word in SCALES
+
+
+def spoken_numbers(text):
+    """Replace runs of number words with digits: 'two hundred and five point five' -> '205.5'"""
+    words = text.split()
+    out, i = [], 0
+    while i < len(words):
+        word = words[i].lower()
+        sign = ""
+        if word in ("minus", "negative") and i + 1 < len(words) and _is_number_word(words[i + 1].lower()):
+            sign, i = "-", i + 1
+            word = words[i].lower()
+        if not _is_number_word(word):
+            out.append(words[i])
+            i += 1
+            continue
+        total, current = 0, 0
+        while i < len(words):
+            word = words[i].lower()
+            if word in SMALL_NUMBERS:
+                current += SMALL_NUMBERS[word]
+            elif word in TENS:
+                current += TENS[word]
+            elif word == "hundred":
+                current = max(current, 1) * 100
+            elif word in SCALES:
+                total += max(current, 1) * SCALES[word]
+                current = 0
+            elif word == "and" and i + 1 < len(words) and _is_number_word(words[i + 1].lower()):
+                pass
+            else:
+                break
+            i += 1
+        number = str(total + current)
+        if i + 1 < len(words) and words[i].lower() == "point" and words[i + 1].lower() in SMALL_NUMBERS:
+            digits = []
+            i += 1
+            while i < len(words) and words[i].lower() in SMALL_NUMBERS and SMALL_NUMBERS[words[i].lower()] < 10:
+                digits.append(str(SMALL_NUMBERS[words[i].lower()]))
+                i += 1
+            number += "." + "".join(digits)
+        out.append(sign + number)
+    return " ".join(out)
+
+
+def unit_grammar(index=INDEX):
+    """Words a grammar-restricted recognizer should listen for: units, numbers, commands"""
+    words = set(NUMBER_WORDS) | set(COMMAND_WORDS)
+    for alias in index.aliases:
+        # Spoken forms only: "kilometers per hour" yes, "km/h" or "°c" no
+        if re.fullmatch(r"[a-z][a-z ]*", alias):
+            words.update(alias.split())
+    return sorted(words) + ["[unk]"]
+
+
+def to_mono_16k(samples, sample_rate, channels=1, planar=False):
+    """Downmix audio to mono int16 at 16 kHz
+
+    Packed audio is interleaved; planar audio has one row per channel. Float
+    samples (-1.0..1.0) are scaled to the int16 range.
+    """
+    samples = np.asarray(samples)
+    if samples.dtype.kind == "f":
+        samples = np.clip(samples * 32767.0, -32768, 32767)
+    if planar:
+        samples = samples.reshape(channels, -1).mean(axis=0)
+    else:
+        samples = samples.reshape(-1)
+        if channels > 1:
+            samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    if sample_rate != SAMPLE_RATE and len(samples):
+        count = int(len(samples) * SAMPLE_RATE / sample_rate)
+        positions = np.linspace(0, len(samples) - 1, count)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return samples.astype(np.int16)
+
+
+class RingBuffer:
+    """Fixed-size int16 sample buffer; when full the oldest audio is dropped, never the caller"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.dropped = 0
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._start = 0
+        self._size = 0
+        self._ready = threading.Condition()
+
+    def write(self, samples):
+        samples = samples[-self.capacity:]
+        n = len(samples)
+        with self._ready:
+            overflow = max(0, self._size + n - self.capacity)
+            if overflow:
+                self._start = (self._start + overflow) % self.capacity
+                self._size -= overflow
+                self.dropped += overflow
+            end = (self._start + self._size) % self.capacity
+            first = min(n, self.capacity - end)
+            self._data[end:end + first] = samples[:first]
+            self._data[:n - first] = samples[first:]
+            self._size += n
+            self._ready.notify()
+
+    def read(self, n, timeout=None):
+        """Return exactly n samples, or None if they didn't arrive within timeout"""
+        with self._ready:
+            if not self._ready.wait_for(lambda: self._size >= n, timeout):
+                return None
+            index = (self._start + np.arange(n)) % self.capacity
+            samples = self._data[index]
+            self._start = (self._start + n) % self.capacity
+            self._size -= n
+            return samples
+
+    def __len__(self):
+        return self._size
+
+
+class EnergyDetector:
+    """Speech/non-speech per frame from its level relative to an adaptive noise floor"""
+    def __init__(self, margin_db=12.0, min_db=-50.0):
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.noise_db = -60.0
+
+    def is_speech(self, frame):
+        rms = np.sqrt(np.mean(frame.astype(np.float64) ** 2)) / 32768
+        level = 20 * np.log10(rms + 1e-10)
+        speech = level > max(self.noise_db + self.margin_db, self.min_db)
+        if not speech:
+            self.noise_db = 0.95 * self.noise_db + 0.05 * level
+        return speech
+
+
+class WebRtcDetector:
+    """Google's WebRTC VAD, used when the webrtcvad package is installed"""
+    def __init__(self, aggressiveness=2):
+        import webrtcvad
+
+        self.vad = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame):
+        return self.vad.is_speech(frame.tobytes(), SAMPLE_RATE)
+
+
+def default_detector():
+    """WebRTC VAD if installed (imported only now, not with this module), else the energy detector"""
+    try:
+        return WebRtcDetector()
+    except ImportError:
+        return EnergyDetector()
+
+
+class Segmenter:
+    """Turns a stream of 30 ms frames into utterances
+
+    An utterance starts on the first voiced frame (keeping some pre-roll so the
+    first syllable isn't clipped), ends after hangover_ms of silence and is cut
+    at max_seconds. Utterances with less than min_speech_ms of voiced frames
+    are dropped as blips.
+    """
+    def __init__(self, detector=None, preroll_ms=300, hangover_ms=600, min_speech_ms=250, max_seconds=10):
+        self.detector = detector or default_detector()
+        self.preroll = deque(maxlen=preroll_ms // FRAME_MS)
+        self.hangover = hangover_ms // FRAME_MS
+        self.min_frames = min_speech_ms // FRAME_MS
+        self.max_frames = max_seconds * 1000 // FRAME_MS
+        self._frames = []
+        self._voiced = 0
+        self._silent = 0
+
+    def feed(self, frame):
+        """Add one frame; returns a finished utterance (int16 array) or None"""
+        speech = self.detector.is_speech(frame)
+        if not self._frames:
+            self.preroll.append(frame)
+            if speech:
+                self._frames = list(self.preroll)
+                self.preroll.clear()
+                self._voiced, self._silent = 1, 0
+            return None
+        self._frames.append(frame)
+        if speech:
+            self._voiced += 1
+            self._silent = 0
+        else:
+            self._silent += 1
+        if self._silent >= self.hangover or len(self._frames) >= self.max_frames:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """End the current utterance now (e.g. when recording stops)"""
+        frames, voiced = self._frames, self._voiced
+        self._frames, self._voiced, self._silent = [], 0, 0
+        if voiced < self.min_frames:
+            return None
+        return np.concatenate(frames)
+
+
+class VoskRecognizer:
+    """Offline Kaldi recognizer; grammar limits the vocabulary for speed and accuracy"""
+    def __init__(self, model_path, grammar=None):
+        try:
+            import vosk
+        except ImportError:
+            raise RecognizerUnavailable("Install 'vosk' for offline speech recognition") from None
+        if not os.path.isdir(model_path):
+            raise RecognizerUnavailable(f"Vosk model not found at '{model_path}' (set VOSK_MODEL_PATH)")
+        vosk.SetLogLevel(-1)
+        self.vosk = vosk
+        self.model = vosk.Model(model_path)
+        self.grammar = json.dumps(grammar) if grammar else None
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE):
+        if self.grammar:
+            recognizer = self.vosk.KaldiRecognizer(self.model, sample_rate, self.grammar)
+        else:
+            recognizer = self.vosk.KaldiRecognizer(self.model, sample_rate)
+        recognizer.AcceptWaveform(pcm.tobytes())
+        text = json.loads(recognizer.FinalResult()).get("text", "")
+        return " ".join(word for word in text.split() if word != "[unk]")
+
+
+class SpeechRecognitionRecognizer:
+    """Adapter for the SpeechRecognition package ('sphinx' is offline, 'google' is not)"""
+    def __init__(self, engine="sphinx"):
+        try:
+            import speech_recognition as sr
+        except ImportError:
+            raise RecognizerUnavailable("Install 'SpeechRecognition' for the sphinx/google engines") from None
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+        self.method = getattr(self.recognizer, f"recognize_{engine}")
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE):
+        audio = self.sr.AudioData(pcm.tobytes(), sample_rate, 2)
+        try:
+            return self.method(audio)
+        except self.sr.UnknownValueError:
+            return ""
+
+
+def get_recognizer():
+    """Process-wide recognizer chosen by SPEECH_ENGINE; models are loaded once"""
+    global _recognizer
+    if _recognizer is None:
+        with _recognizer_lock:
+            if _recognizer is None:
+                engine = os.getenv("SPEECH_ENGINE", "vosk").lower()
+                if engine == "vosk":
+                    grammar = unit_grammar() if os.getenv("SPEECH_GRAMMAR", "1") != "0" else None
+                    _recognizer = VoskRecognizer(os.getenv("VOSK_MODEL_PATH", DEFAULT_VOSK_MODEL), grammar)
+                else:
+                    _recognizer = SpeechRecognitionRecognizer(engine)
+    return _recognizer
+
+
+class SpeechPipeline:
+    """Ring buffer -> VAD -> recognizer on a worker thread -> transcript queue
+
+    push() is safe to call from the WebRTC audio thread and never blocks. The
+    worker starts on the first push and exits after idle_timeout seconds without
+    audio, so abandoned sessions don't keep a thread alive.
+    """
+    def __init__(self, recognizer, buffer_seconds=30, idle_timeout=120.0, segmenter=None):
+        self.recognizer = recognizer
+        self.buffer = RingBuffer(buffer_seconds * SAMPLE_RATE)
+        self.segmenter = segmenter or Segmenter()
+        self.idle_timeout = idle_timeout
+        self.results = queue.Queue(maxsize=32)
+        self._stop = threading.Event()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def push(self, samples, sample_rate=SAMPLE_RATE, channels=1):
+        self.buffer.write(to_mono_16k(samples, sample_rate, channels))
+        self._ensure_worker()
+
+    def push_frame(self, frame):
+        """audio_frame_callback for streamlit-webrtc; passes the av.AudioFrame through"""
+        self.buffer.write(to_mono_16k(frame.to_ndarray(), frame.sample_rate, len(frame.layout.channels),
+                                      planar=frame.format.is_planar))
+        self._ensure_worker()
+        return frame
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._stop.clear()
+                    self._worker = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+                    self._worker.start()
+
+    def _run(self):
+        idle_since = time.monotonic()
+        while not self._stop.is_set():
+            frame = self.buffer.read(FRAME_SAMPLES, timeout=0.2)
+            if frame is None:
+                if time.monotonic() - idle_since > self.idle_timeout:
+                    return
+                continue
+            idle_since = time.monotonic()
+            utterance = self.segmenter.feed(frame)
+            if utterance is not None:
+                self._recognize(utterance)
+        # Stopping: decode what's left in the buffer, then the open utterance
+        while len(self.buffer) >= FRAME_SAMPLES:
+            utterance = self.segmenter.feed(self.buffer.read(FRAME_SAMPLES))
+            if utterance is not None:
+                self._recognize(utterance)
+        utterance = self.segmenter.flush()
+        if utterance is not None:
+            self._recognize(utterance)
+
+    def _recognize(self, pcm):
+        start = time.perf_counter()
+        try:
+            text = self.recognizer.transcribe(pcm, SAMPLE_RATE)
+        except Exception:
+            SPEECH_SECONDS.observe(time.perf_counter() - start, outcome="error")
+            return
+        SPEECH_SECONDS.observe(time.perf_counter() - start, outcome="ok")
+        text = spoken_numbers(text.strip().lower())
+        if text:
+            try:
+                self.results.put_nowait(text)
+            except queue.Full:
+                pass
+
+    @property
+    def running(self):
+        """True while the worker thread is alive (it may still be decoding after stop())"""
+        return self._worker is not None and self._worker.is_alive()
+
+    def stop(self, timeout=None):
+        """Ask the worker to finish the current utterance; only waits when given a timeout"""
+        self._stop.set()
+        if timeout is not None and self._worker is not None:
+            self._worker.join(timeout)
+
+    def poll(self):
+        """Transcripts recognized since the last poll, oldest first"""
+        texts = []
+        while True:
+            try:
+                texts.append(self.results.get_nowait())
+            except queue.Empty:
+                return texts
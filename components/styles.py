@@ -0,0 +1,182 @@
+# Static CSS for the app, kept out of the render functions
+
+# Responsive layout tweaks for the whole page
+APP_CSS = """
+    @media (max-width: 768px) {
+        .stMarkdown h1 {font-size: 1.5rem !important;}
+        .stMarkdown h2 {font-size: 1.3rem !important;}
+        .stMarkdown h3 {font-size: 1.1rem !important;}
+        .element-container, .stButton, .stSelectbox {width: 100% !important;}
+        .block-container {padding: 1rem !important;}
+        [data-testid="column"] {width: 100% !important; margin-bottom: 1rem;}
+    }
+    .stNumberInput input, .stSelectbox select {
+        min-height: 40px;
+        border-radius: 8px !important;
+    }
+    .stButton button {
+        width: 100%;
+        height: 40px;
+        border-radius: 8px !important;
+        transition: all 0.3s ease;
+    }
+    .stChatMessage {max-width: 90% !important; margin: 0.5rem 0;}
+    .css-1d391kg {width: 100% !important; max-width: 300px;}
+"""
+
+# Dark theme, containers and typography of the converter
+CONVERTER_CSS = """
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header {visibility: hidden;}
+    .stApp {background-color: #1E1E1E !important;}
+    .main-header {
+        color: #FF6B00;
+        font-size: min(2.8rem, 8vw);
+        text-align: center;
+        margin-bottom: 2rem;
+        padding: 1.5rem;
+        background: #1E1E1E;
+        border-radius: 12px;
+        border: 2px solid #FF6B00;
+    }
+    .converter-container, .chat-container {
+        background: #1E1E1E;
+        padding: clamp(1rem, 3vw, 2rem);
+        border-radius: 12px;
+        border: 2px solid #FF6B00;
+        margin-bottom: 1rem;
+        width: 100%;
+    }
+    .voice-button {
+        background-color: transparent !important;
+        border: 2px solid #FF6B00 !important;
+        border-radius: 50% !important;
+        color: #FF6B00 !important;
+        width: 40px !important;
+        height: 40px !important;
+        line-height: 40px !important;
+        text-align: center !important;
+        cursor: pointer !important;
+        transition: all 0.3s ease !important;
+    }
+    .voice-button:hover {
+        background-color: rgba(255, 107, 0, 0.1) !important;
+        transform: scale(1.05);
+    }
+    .stButton > button {
+        background-color: #FF6B00;
+        color: #FFFFFF !important;
+        font-size: clamp(1rem, 2.5vw, 1.3rem) !important;
+        font-weight: 700 !important;
+        padding: clamp(0.5rem, 2vw, 0.8rem) clamp(1rem, 4vw, 2rem);
+        border-radius: 8px;
+        border: none;
+        width: 100%;
+    }
+    h3 {
+        font-size: clamp(1.1rem, 3vw, 1.3rem) !important;
+        margin-bottom: clamp(0.5rem, 2vw, 1rem);
+    }
+    .stSelectbox > div > div > div {
+        font-size: clamp(0.9rem, 2.5vw, 1.1rem);
+    }
+    .stNumberInput input {
+        font-size: clamp(0.9rem, 2.5vw, 1.1rem);
+    }
+    .stMarkdown ul {
+        list-style: none;
+        padding-left: 0;
+    }
+    .stMarkdown li {
+        color: #FF6B00 !important;
+        padding: clamp(0.3rem, 1.5vw, 0.5rem) 0;
+        font-size: clamp(0.9rem, 2.5vw, 1rem);
+        cursor: pointer;
+    }
+    @media (max-width: 768px) {
+        .main .block-container {padding: 1rem;}
+        [data-testid="column"] {width: 100% !important; flex: 1 1 auto !important; min-width: 100% !important;}
+        .stButton > button {margin-top: 1rem;}
+        .result-container {margin-top: 1rem;}
+        .chat-container {margin-top: 1rem;}
+    }
+    @media (max-width: 480px) {
+        .main-header {padding: 1rem; margin-bottom: 1rem;}
+        .converter-container, .chat-container {padding: 0.8rem;}
+        h3 {margin-bottom: 0.5rem;}
+    }
+"""
+
+# Convert button and the animated result card
+RESULT_CSS = """
+    .convert-button {
+        background-color: #FF6B00 !important;
+        color: white !important;
+        border-radius: 8px !important;
+        padding: 0.5rem 2rem !important;
+        font-size: 1.2rem !important;
+        font-weight: 600 !important;
+        border: none !important;
+        width: 100% !important;
+        cursor: pointer !important;
+        transition: all 0.3s ease !important;
+        margin-top: 1rem !important;
+        text-align: center !important;
+    }
+    .convert-button:hover {
+        background-color: #FF8533 !important;
+        transform: translateY(-2px);
+        box-shadow: 0 4px 12px rgba(255, 107, 0, 0.2);
+    }
+    .convert-button:active {transform: translateY(0);}
+    .result-container {text-align: center; padding: 1rem 0; animation: fadeIn 0.5s ease;}
+    .from-value {font-size: 1.4rem; color: #FFFFFF; font-weight: 500; letter-spacing: 0.5px;}
+    .arrow {font-size: 1.6rem; color: #FF6B00; margin: 0.8rem 0; font-weight: bold;}
+    .to-value {font-size: 2.2rem; color: #FF6B00; font-weight: 700; letter-spacing: 1px;}
+    @keyframes fadeIn {from {opacity: 0; transform: translateY(10px);} to {opacity: 1; transform: translateY(0);}}
+"""
+
+# Round record button next to the chat input
+VOICE_BUTTON_CSS = """
+    .stButton > button {
+        width: 38px !important;
+        height: 38px !important;
+        border-radius: 50% !important;
+        border: 2px solid #FF6B00 !important;
+        background: transparent !important;
+        padding: 0 !important;
+        transition: all 0.3s ease !important;
+        display: flex !important;
+        align-items: center !important;
+        justify-content: center !important;
+        font-size: 18px !important;
+        color: #FF6B00 !important;
+        line-height: 38px !important;
+    }
+    .stButton > button:hover {
+        background: rgba(255, 107, 0, 0.1) !important;
+    }
+"""
+
+# Standalone chat page
+CHAT_CSS = """
+    .chat-container {max-width: 800px; margin: 0 auto;}
+    .chat-message {padding: 0.8rem; margin: 0.5rem 0; border-radius: 12px; word-wrap: break-word;}
+    .user-message {background: #e3f2fd; margin-left: 1rem; margin-right: 0;}
+    .assistant-message {background: #f5f5f5; margin-right: 1rem; margin-left: 0;}
+    @media (max-width: 768px) {
+        .chat-message {margin: 0.5rem; font-size: 0.9rem;}
+        .chat-input {padding: 0.5rem;}
+    }
+"""
+
+
+def style_tag(*blocks):
+    """Wrap CSS blocks in a single <style> element"""
+    return "<style>\n" + "\n".join(blocks) + "</style>"
+
+
+# Built once per process; order matters, later rules win (the voice button overrides .stButton)
+PAGE_STYLE = style_tag(APP_CSS, CONVERTER_CSS, RESULT_CSS, VOICE_BUTTON_CSS)
+CHAT_STYLE = style_tag(CHAT_CSS)
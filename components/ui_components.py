@@ -7,6 +7,8 @@ class UIComponents:
     def __init__(self, categories):
         # Initialize with unit categories
         self.categories = categories
+        # Selector labels are built once, not on every rerun
+        self.category_labels = [f"{data['icon']} {cat}" for cat, data in categories.items()]
 
     def render_header(self):
         """Render the application header"""
@@ -15,12 +17,8 @@ class UIComponents:
 
     def render_category_selector(self):
         """Render the category selection dropdown"""
-        categories_with_icons = [
-            f"{self.categories[cat]['icon']} {cat}" 
-            for cat in self.categories.keys()
-        ]
-        selected = st.selectbox("Select Category", categories_with_icons)
-        return selected.split(' ')[1]
+        selected = st.selectbox("Select Category", self.category_labels)
+        return selected.split(' ', 1)[1]
 
     def render_unit_selectors(self, category):
         """Render the unit selection dropdowns"""
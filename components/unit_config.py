@@ -4,53 +4,221 @@ class UnitCategories:
     """Defines all available unit categories and their corresponding units"""
     @staticmethod
     def get_categories():
-        """Return dictionary of all unit categories with their units and icons"""
+        """Return dictionary of all unit categories with their units and icons
+
+        Every unit has a factor to the category's base unit, so that
+        base = (value + offset) * factor. Offsets are only needed for Temperature.
+        Factors that aren't finite decimals are written as exact ratios ("5/9").
+        """
         return {
             "Length": {
-                "units": ["Nanometers", "Micrometers", "Millimeters", "Centimeters", "Meters"],
-                "icon": "📏"
+                "units": ["Nanometers", "Micrometers", "Millimeters", "Centimeters", "Meters",
+                         "Kilometers", "Inches", "Feet", "Yards", "Miles"],
+                "icon": "📏",
+                "base": "Meters",
+                "factors": {
+                    "Nanometers": 1e-9, "Micrometers": 1e-6, "Millimeters": 1e-3,
+                    "Centimeters": 1e-2, "Meters": 1, "Kilometers": 1000,
+                    "Inches": 0.0254, "Feet": 0.3048, "Yards": 0.9144, "Miles": 1609.344
+                }
             },
             "Weight/Mass": {
-                "units": ["Micrograms", "Milligrams", "Grams", "Kilograms"],
-                "icon": "⚖️"
+                "units": ["Micrograms", "Milligrams", "Grams", "Kilograms", "Tonnes",
+                         "Ounces", "Pounds"],
+                "icon": "⚖️",
+                "base": "Kilograms",
+                "factors": {
+                    "Micrograms": 1e-9, "Milligrams": 1e-6, "Grams": 1e-3, "Kilograms": 1,
+                    "Tonnes": 1000, "Ounces": 0.028349523125, "Pounds": 0.45359237
+                }
             },
             "Temperature": {
                 "units": ["Celsius", "Fahrenheit", "Kelvin"],
-                "icon": "🌡️"
+                "icon": "🌡️",
+                "base": "Kelvin",
+                "factors": {"Celsius": 1, "Fahrenheit": "5/9", "Kelvin": 1},
+                "offsets": {"Celsius": 273.15, "Fahrenheit": 459.67, "Kelvin": 0}
             },
             "Volume": {
                 "units": ["Milliliters", "Liters", "Cubic Centimeters", "Cubic Meters",
                          "Fluid Ounces", "Cups", "Pints", "Quarts", "Gallons"],
-                "icon": "🧊"
+                "icon": "🧊",
+                "base": "Cubic Meters",
+                # US customary liquid measures
+                "factors": {
+                    "Milliliters": 1e-6, "Liters": 1e-3, "Cubic Centimeters": 1e-6,
+                    "Cubic Meters": 1, "Fluid Ounces": 2.95735295625e-5,
+                    "Cups": 2.365882365e-4, "Pints": 4.73176473e-4,
+                    "Quarts": 9.46352946e-4, "Gallons": 3.785411784e-3
+                }
             },
             "Time": {
-                "units": ["Nanoseconds", "Microseconds", "Milliseconds", "Seconds", "Minutes", 
+                "units": ["Nanoseconds", "Microseconds", "Milliseconds", "Seconds", "Minutes",
                          "Hours", "Days", "Weeks", "Months", "Years", "Decades", "Centuries"],
-                "icon": "⏱️"
+                "icon": "⏱️",
+                "base": "Seconds",
+                # Months and years use the average Gregorian year (365.2425 days)
+                "factors": {
+                    "Nanoseconds": 1e-9, "Microseconds": 1e-6, "Milliseconds": 1e-3,
+                    "Seconds": 1, "Minutes": 60, "Hours": 3600, "Days": 86400,
+                    "Weeks": 604800, "Months": 2629746, "Years": 31556952,
+                    "Decades": 315569520, "Centuries": 3155695200
+                }
             },
             "Area": {
-                "units": ["Square Millimeters", "Square Centimeters", "Square Meters", "Hectares", 
+                "units": ["Square Millimeters", "Square Centimeters", "Square Meters", "Hectares",
                          "Square Kilometers", "Square Inches", "Square Feet", "Square Yards", "Acres", "Square Miles"],
-                "icon": "📐"
+                "icon": "📐",
+                "base": "Square Meters",
+                "factors": {
+                    "Square Millimeters": 1e-6, "Square Centimeters": 1e-4,
+                    "Square Meters": 1, "Hectares": 1e4, "Square Kilometers": 1e6,
+                    "Square Inches": 6.4516e-4, "Square Feet": 0.09290304,
+                    "Square Yards": 0.83612736, "Acres": 4046.8564224,
+                    "Square Miles": 2589988.110336
+                }
             },
             "Digital Storage": {
-                "units": ["Bits", "Bytes", "Kilobytes", "Megabytes", "Gigabytes", 
+                "units": ["Bits", "Bytes", "Kilobytes", "Megabytes", "Gigabytes",
                          "Terabytes", "Petabytes"],
-                "icon": "💾"
+                "icon": "💾",
+                "base": "Bytes",
+                # Binary multiples (1 Kilobyte = 1024 Bytes)
+                "factors": {
+                    "Bits": 0.125, "Bytes": 1, "Kilobytes": 1024, "Megabytes": 1024 ** 2,
+                    "Gigabytes": 1024 ** 3, "Terabytes": 1024 ** 4, "Petabytes": 1024 ** 5
+                }
             },
             "Speed": {
-                "units": ["Meters per Second", "Kilometers per Hour", "Miles per Hour", 
+                "units": ["Meters per Second", "Kilometers per Hour", "Miles per Hour",
                          "Knots", "Feet per Second"],
-                "icon": "🏃"
+                "icon": "🏃",
+                "base": "Meters per Second",
+                "factors": {
+                    "Meters per Second": 1, "Kilometers per Hour": "5/18",
+                    "Miles per Hour": 0.44704, "Knots": "463/900",
+                    "Feet per Second": 0.3048
+                }
             },
             "Pressure": {
-                "units": ["Pascal", "Kilopascal", "Bar", "PSI", "Atmosphere", 
+                "units": ["Pascal", "Kilopascal", "Bar", "PSI", "Atmosphere",
                          "Millimeters of Mercury", "Inches of Mercury"],
-                "icon": "🌪️"
+                "icon": "🌪️",
+                "base": "Pascal",
+                "factors": {
+                    "Pascal": 1, "Kilopascal": 1000, "Bar": 1e5,
+                    "PSI": 6894.757293168361, "Atmosphere": 101325,
+                    "Millimeters of Mercury": 133.322387415,
+                    "Inches of Mercury": 3386.388640341
+                }
             },
             "Energy": {
-                "units": ["Joules", "Kilojoules", "Calories", "Kilocalories", 
+                "units": ["Joules", "Kilojoules", "Calories", "Kilocalories",
                          "Watt-hours", "Kilowatt-hours", "Electron Volts"],
-                "icon": "⚡"
+                "icon": "⚡",
+                "base": "Joules",
+                # Thermochemical calorie
+                "factors": {
+                    "Joules": 1, "Kilojoules": 1000, "Calories": 4.184,
+                    "Kilocalories": 4184, "Watt-hours": 3600, "Kilowatt-hours": 3.6e6,
+                    "Electron Volts": 1.602176634e-19
+                }
             }
-        } 
\ No newline at end of file
+        }
+
+    @staticmethod
+    def get_aliases():
+        """Return abbreviations, symbols and alternate spellings for each unit
+
+        Plurals/singulars and lowercase names are derived automatically, so only
+        forms that can't be derived from the unit name are listed here.
+        """
+        return {
+            # Length
+            "Nanometers": ["nm", "nanometre"],
+            "Micrometers": ["µm", "um", "micron", "microns", "micrometre"],
+            "Millimeters": ["mm", "millimetre"],
+            "Centimeters": ["cm", "centimetre"],
+            "Meters": ["m", "metre"],
+            "Kilometers": ["km", "kms", "kilometre", "klick"],
+            "Inches": ["in", "inch"],
+            "Feet": ["ft", "foot"],
+            "Yards": ["yd", "yds"],
+            "Miles": ["mi"],
+            # Weight/Mass
+            "Micrograms": ["µg", "ug", "mcg"],
+            "Milligrams": ["mg"],
+            "Grams": ["g", "gm", "gramme"],
+            "Kilograms": ["kg", "kgs", "kilo", "kilos"],
+            "Tonnes": ["t", "metric ton", "metric tons"],
+            "Ounces": ["oz"],
+            "Pounds": ["lb", "lbs"],
+            # Temperature
+            "Celsius": ["°c", "℃", "degc", "deg c", "degrees celsius", "centigrade"],
+            "Fahrenheit": ["°f", "℉", "degf", "deg f", "degrees fahrenheit"],
+            "Kelvin": ["k", "kelvins"],
+            # Volume
+            "Milliliters": ["ml", "millilitre"],
+            "Liters": ["l", "litre", "ltr"],
+            "Cubic Centimeters": ["cc", "cm3", "cm³", "cubic centimetre"],
+            "Cubic Meters": ["m3", "m³", "cubic metre"],
+            "Fluid Ounces": ["fl oz", "floz", "fl. oz"],
+            "Cups": [],
+            "Pints": ["pt"],
+            "Quarts": ["qt"],
+            "Gallons": ["gal"],
+            # Time
+            "Nanoseconds": ["ns"],
+            "Microseconds": ["µs", "us"],
+            "Milliseconds": ["ms"],
+            "Seconds": ["s", "sec", "secs"],
+            "Minutes": ["min", "mins"],
+            "Hours": ["h", "hr", "hrs"],
+            "Days": ["d"],
+            "Weeks": ["wk", "wks"],
+            "Months": ["mo"],
+            "Years": ["yr", "yrs"],
+            "Decades": [],
+            "Centuries": ["century"],
+            # Area
+            "Square Millimeters": ["mm2", "mm²", "sq mm"],
+            "Square Centimeters": ["cm2", "cm²", "sq cm"],
+            "Square Meters": ["m2", "m²", "sq m", "square metre"],
+            "Hectares": ["ha"],
+            "Square Kilometers": ["km2", "km²", "sq km"],
+            "Square Inches": ["in2", "in²", "sq in", "square inch"],
+            "Square Feet": ["ft2", "ft²", "sq ft", "sqft", "square foot"],
+            "Square Yards": ["yd2", "yd²", "sq yd"],
+            "Acres": ["ac"],
+            "Square Miles": ["mi2", "mi²", "sq mi"],
+            # Digital Storage
+            "Bits": [],
+            "Bytes": [],
+            "Kilobytes": ["kb", "kib"],
+            "Megabytes": ["mb", "mib"],
+            "Gigabytes": ["gb", "gib", "gigs"],
+            "Terabytes": ["tb", "tib"],
+            "Petabytes": ["pb", "pib"],
+            # Speed
+            "Meters per Second": ["m/s", "mps", "metres per second"],
+            "Kilometers per Hour": ["km/h", "kmh", "kph", "kmph", "kilometres per hour"],
+            "Miles per Hour": ["mph", "mi/h"],
+            "Knots": ["kn", "kt", "kts"],
+            "Feet per Second": ["ft/s", "fps"],
+            # Pressure
+            "Pascal": ["pa"],
+            "Kilopascal": ["kpa"],
+            "Bar": ["bars"],
+            "PSI": ["lbf/in2", "pounds per square inch"],
+            "Atmosphere": ["atm"],
+            "Millimeters of Mercury": ["mmhg", "mm hg", "torr"],
+            "Inches of Mercury": ["inhg", "in hg"],
+            # Energy
+            "Joules": ["j"],
+            "Kilojoules": ["kj"],
+            "Calories": ["cal"],
+            "Kilocalories": ["kcal"],
+            "Watt-hours": ["wh"],
+            "Kilowatt-hours": ["kwh"],
+            "Electron Volts": ["ev"],
+        }
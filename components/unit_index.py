@@ -0,0 +1,146 @@
+# Precomputed alias index: every unit name, abbreviation, symbol and plural -> unit
+
+from collections import namedtuple
+from types import MappingProxyType
+
+from .registry import get_registry
+
+UnitRef = namedtuple("UnitRef", "category unit unit_id")
+
+# Plurals that can't be made by adding/removing a trailing "s"
+IRREGULAR = {"feet": "foot", "inches": "inch", "centuries": "century"}
+
+# Fuzzy matching is bounded: short strings are too ambiguous, long ones aren't units
+FUZZY_MIN_LENGTH = 4
+FUZZY_MAX_LENGTH = 40
+FUZZY_THRESHOLD = 0.6
+
+
+def _singular(word):
+    if word in IRREGULAR:
+        return IRREGULAR[word]
+    if word.endswith("s") and not word.endswith(("us", "ss")):
+        return word[:-1]
+    return word
+
+
+def _plural(word):
+    for plural, singular in IRREGULAR.items():
+        if word == singular:
+            return plural
+    return word if word.endswith("s") else word + "s"
+
+
+def unit_forms(name):
+    """Lowercase name plus its singular/plural and unhyphenated variants"""
+    name = name.lower()
+    words = name.split(" ")
+    # Inflect the head noun: "meters per second", "millimeters of mercury", "square feet"
+    head = next((i - 1 for i, w in enumerate(words) if w in ("per", "of") and i > 0), len(words) - 1)
+    forms = {name}
+    for inflect in (_singular, _plural):
+        forms.add(" ".join(words[:head] + [inflect(words[head])] + words[head + 1:]))
+    forms |= {form.replace("-", " ") for form in forms}
+    return forms
+
+
+def normalize(text):
+    """Lowercase and collapse whitespace, the form every alias is stored in"""
+    return " ".join(text.lower().replace(".", " ").split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class UnitIndex:
+    """Immutable alias -> (category, unit, unit_id) index built once at import
+
+    Exact lookups are a single dict access. Misses can fall back to a trigram
+    index, so speech-transcript typos like "kilomters" still resolve.
+    """
+    def __init__(self, units=None, aliases=None):
+        if units is None or aliases is None:
+            registry = get_registry()
+            units = registry.units if units is None else units
+            aliases = registry.aliases if aliases is None else aliases
+        table = {}
+        for category, names in units.items():
+            # Registry units all have factors, so ids match the engine's
+            for unit_id, unit in enumerate(names):
+                ref = UnitRef(category, unit, unit_id)
+                for alias in unit_forms(unit) | {normalize(a) for a in aliases.get(unit, [])}:
+                    refs = table.setdefault(alias, [])
+                    if ref not in refs:
+                        refs.append(ref)
+        self.aliases = MappingProxyType({alias: tuple(refs) for alias, refs in table.items()})
+        self.units = MappingProxyType({category: tuple(names) for category, names in units.items()})
+
+        grams, sizes = {}, {}
+        for alias in self.aliases:
+            if len(alias) >= FUZZY_MIN_LENGTH:
+                alias_grams = trigrams(alias)
+                sizes[alias] = len(alias_grams)
+                for gram in alias_grams:
+                    grams.setdefault(gram, []).append(alias)
+        self._sizes = MappingProxyType(sizes)
+        self._grams = MappingProxyType({gram: tuple(names) for gram, names in grams.items()})
+
+    def lookup(self, text):
+        """Exact lookup, returns a tuple of UnitRef (empty when unknown)"""
+        return self.aliases.get(normalize(text), ())
+
+    def fuzzy(self, text, limit=3):
+        """Closest aliases by trigram similarity, as [(score, alias)] best first"""
+        text = normalize(text)
+        if not FUZZY_MIN_LENGTH <= len(text) <= FUZZY_MAX_LENGTH:
+            return []
+        query = trigrams(text)
+        shared = {}
+        for gram in query:
+            for alias in self._grams.get(gram, ()):
+                shared[alias] = shared.get(alias, 0) + 1
+        scored = [
+            (2 * count / (len(query) + self._sizes[alias]), alias)
+            for alias, count in shared.items()
+        ]
+        scored.sort(reverse=True)
+        return [(score, alias) for score, alias in scored[:limit] if score >= FUZZY_THRESHOLD]
+
+    def resolve(self, text, category=None, fuzzy=True):
+        """Return the best UnitRef for text (optionally within a category), or None"""
+        refs = self.lookup(text)
+        if not refs and fuzzy:
+            for _, alias in self.fuzzy(text):
+                refs = self.aliases[alias]
+                if category is None or any(ref.category == category for ref in refs):
+                    break
+        for ref in refs:
+            if category is None or ref.category == category:
+                return ref
+        return None
+
+    def resolve_pair(self, src, dst, fuzzy=True):
+        """Resolve two units that share a category, returns (from_ref, to_ref) or None"""
+        src_refs = self.lookup(src) or self._fuzzy_refs(src, fuzzy)
+        dst_refs = self.lookup(dst) or self._fuzzy_refs(dst, fuzzy)
+        for from_ref in src_refs:
+            for to_ref in dst_refs:
+                if from_ref.category == to_ref.category:
+                    return from_ref, to_ref
+        return None
+
+    def _fuzzy_refs(self, text, fuzzy):
+        if not fuzzy:
+            return ()
+        return tuple(ref for _, alias in self.fuzzy(text) for ref in self.aliases[alias])
+
+    def category_of(self, unit):
+        """Category of a unit name or alias, or None"""
+        ref = self.resolve(unit)
+        return ref.category if ref else None
+
+
+# Shared by the UI, the voice/chat parser and the bulk CLI
+INDEX = UnitIndex()
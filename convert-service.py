@@ -0,0 +1,13 @@
+"""Headless HTTP conversion service, no Streamlit needed.
+
+Examples:
+    python convert-service.py --port 8502
+    curl 'http://127.0.0.1:8502/convert?value=5&from=km&to=mi'
+    curl -d '{"from": "Celsius", "to": "Fahrenheit", "values": [0, 37, 100]}' http://127.0.0.1:8502/convert/batch
+    python benchmarks/load_http.py --port 8502 --connections 32 --seconds 10
+"""
+import sys
+from components.service import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from components import bulk
+
+
+def test_csv_replaces_the_column_and_keeps_bad_values_empty():
+    out = io.StringIO()
+    rows = bulk.convert_csv(io.StringIO("name,value\na,1\nb,oops\nc,2.5\n"), out, "Length", "Meters",
+                            "Centimeters", chunk_size=2)
+    assert rows == 3
+    assert out.getvalue() == "name,value\na,100.0\nb,\nc,250.0\n"
+
+
+def test_csv_output_column_without_header():
+    out = io.StringIO()
+    bulk.convert_csv(io.StringIO("x,1\ny,2\n"), out, "Length", "Kilometers", "Meters", column="1",
+                     header=False, output_column="m")
+    assert out.getvalue() == "x,1,1000.0\ny,2,2000.0\n"
+
+
+def test_csv_missing_column():
+    with pytest.raises(ValueError):
+        bulk.convert_csv(io.StringIO("a,b\n1,2\n"), io.StringIO(), "Length", "Meters", "Feet")
+
+
+def test_csv_without_header_needs_an_index():
+    with pytest.raises(ValueError, match="0-based index"):
+        bulk.convert_csv(io.StringIO("1\n"), io.StringIO(), "Length", "Meters", "Feet", header=False)
+
+
+def test_jsonl_non_objects_are_bad_values():
+    out = io.StringIO()
+    text = '{"value": 1, "id": 7}\n[1, 2]\n"x"\n\n{"value": "nope"}\n'
+    assert bulk.convert_jsonl(io.StringIO(text), out, "Length", "Meters", "Millimeters") == 4
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+        {"value": 1000.0, "id": 7}, {"value": None}, {"value": None}, {"value": None}]
+
+
+def test_binary_column_roundtrip(tmp_path):
+    src, dst = str(tmp_path / "in.npy"), str(tmp_path / "out.npy")
+    np.save(src, np.arange(10, dtype=np.float32))
+    assert bulk.convert_binary(src, dst, "Length", "Meters", "Centimeters", block_size=3) == 10
+    result = np.load(dst)
+    assert result.dtype == np.float32
+    np.testing.assert_allclose(result, np.arange(10) * 100)
+
+
+def test_cli_no_header_needs_numeric_column(tmp_path, capsys):
+    path = tmp_path / "in.csv"
+    path.write_text("1\n2\n")
+    assert bulk.main([str(path), "--from", "m", "--to", "cm", "--no-header"]) == 2
+    assert "--no-header needs a numeric --column" in capsys.readouterr().err
+    assert bulk.main([str(path), "--from", "m", "--to", "cm", "--no-header", "--column", "0"]) == 0
+    assert capsys.readouterr().out == "100.0\n200.0\n"
+
+
+def test_cli_unknown_pair(capsys):
+    assert bulk.main(["-", "--from", "m", "--to", "kg"]) == 2
+    assert "cannot convert" in capsys.readouterr().err
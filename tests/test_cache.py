@@ -0,0 +1,63 @@
+from components.cache import ResponseCache, cache_scope, is_follow_up, prompt_key
+from components.prompt_cache import SimilarPromptCache
+
+CONTEXT = "User: What is 5 km in miles?\nAssistant: About 3.1 miles.\n"
+
+
+def test_follow_ups_detected():
+    for prompt in ("and in feet?", "Convert it to grams", "what about the same in inches", "why?"):
+        assert is_follow_up(prompt), prompt
+    for prompt in ("What is a Kelvin?", "How many feet are in a mile?"):
+        assert not is_follow_up(prompt), prompt
+
+
+def test_self_contained_prompts_ignore_the_context():
+    assert prompt_key("What is a  Kelvin?", CONTEXT) == prompt_key("what is a kelvin?")
+    assert cache_scope("What is a Kelvin?", CONTEXT) == ""
+
+
+def test_follow_ups_are_keyed_on_the_context():
+    assert prompt_key("and in feet?", CONTEXT) != prompt_key("and in feet?", "User: 2 kg in lb?\n")
+    assert prompt_key("and in feet?", CONTEXT) != prompt_key("and in feet?")
+    assert cache_scope("and in feet?") == ""
+
+
+def test_exact_hits_after_the_first_turn():
+    cache = ResponseCache(maxsize=16)
+    cache.set(prompt_key("What is a Kelvin?", ""), "A unit of temperature.")
+    assert cache.get(prompt_key("what is a kelvin?", CONTEXT)) == "A unit of temperature."
+    assert cache.get(prompt_key("and in feet?", CONTEXT)) is None
+
+
+def test_lru_and_ttl():
+    cache = ResponseCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
+
+
+def test_sqlite_entries_survive_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResponseCache(path=path).set("key", {"text": "hi"})
+    assert ResponseCache(path=path).get("key") == {"text": "hi"}
+
+
+def test_similar_cache_scopes():
+    similar = SimilarPromptCache(maxsize=16)
+    similar.set("What is a Kelvin?", "answer")
+    assert similar.get("whats a kelvin") == "answer"
+    assert similar.get("what is a kelvin", scope="abc") is None
+    assert similar.get("What is 2 km in miles?") is None
+
+
+def test_reversed_prompts_are_not_near_duplicates():
+    similar = SimilarPromptCache(maxsize=16)
+    similar.set("explain celsius to fahrenheit formula", "F = C*9/5+32")
+    similar.set("is a mile longer than a kilometer", "yes")
+    assert similar.get("explain fahrenheit to celsius formula") is None
+    assert similar.get("is a kilometer longer than a mile") is None
+    assert similar.get("Explain the Celsius to Fahrenheit formula") == "F = C*9/5+32"
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+
+from components.columns import convert_table  # noqa: E402
+from components.engine import UnknownUnitError  # noqa: E402
+
+
+def test_dataframe_accessor_records_the_unit():
+    frame = pd.DataFrame({"height": [1.0, None, 2.0]})
+    frame.units.convert("height", "ft", "in")
+    assert frame.units.unit_of("height") == "Inches"
+    np.testing.assert_allclose(frame["height"], [12, np.nan, 24])
+    frame.units.convert("height", to_unit="ft", into="feet")
+    np.testing.assert_allclose(frame["feet"], [1, np.nan, 2])
+
+
+def test_nullable_series_stays_nullable():
+    series = pd.Series([1, None], dtype="Int64")
+    result = series.units.convert("km", "m")
+    assert str(result.dtype) == "Float64" and result[0] == 1000 and result.isna()[1]
+
+
+def test_arrow_table_metadata_and_nulls():
+    table = pa.table({"t": pa.array([0, None, 100], pa.int64())})
+    result = convert_table(table, "t", "Celsius", "Fahrenheit")
+    assert result.column("t").to_pylist() == [32.0, None, 212.0]
+    assert result.schema.field("t").metadata[b"unit"] == b"Fahrenheit"
+    with pytest.raises(UnknownUnitError):
+        convert_table(table, "t", "Celsius", "Meters")
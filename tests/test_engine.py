@@ -0,0 +1,97 @@
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from components import intent
+from components.conversion import convert_all_local, convert_local, resolve_units
+from components.engine import ENGINE, ConversionEngine, UnknownUnitError
+
+
+def test_convert_and_round_trip():
+    assert ENGINE.convert(1, "Kilometers", "Meters", "Length") == 1000
+    assert ENGINE.convert(100, "Celsius", "Fahrenheit", "Temperature") == pytest.approx(212)
+    assert ENGINE.convert(0, "Celsius", "Kelvin", "Temperature") == pytest.approx(273.15)
+    miles = ENGINE.convert(5, "Kilometers", "Miles", "Length")
+    assert ENGINE.convert(miles, "Miles", "Kilometers", "Length") == pytest.approx(5)
+
+
+def test_exact_and_decimal():
+    assert ENGINE.convert_exact("0.1", "Meters", "Centimeters", "Length") == 10
+    assert ENGINE.convert_exact(1, "Feet", "Meters", "Length") == Fraction(3048, 10000)
+    assert ENGINE.convert_exact(212, "Fahrenheit", "Celsius", "Temperature") == 100
+    with localcontext() as ctx:
+        ctx.prec = 6
+        assert ENGINE.convert_decimal(1, "Miles", "Kilometers", "Length") == Decimal("1.60934")
+
+
+def test_convert_many_and_in_place():
+    values = np.array([0.0, 100.0, -40.0])
+    np.testing.assert_allclose(ENGINE.convert_many(values, "Celsius", "Fahrenheit", "Temperature"),
+                               [32, 212, -40])
+    ENGINE.convert_many(values, "Celsius", "Kelvin", "Temperature", out=values)
+    np.testing.assert_allclose(values, [273.15, 373.15, 233.15])
+    with pytest.raises(ValueError):
+        ENGINE.convert_many([1, 2], "Meters", "Feet", "Length", out=np.empty(3))
+
+
+def test_convert_all_matches_pairwise():
+    units, results = ENGINE.convert_all(2.5, "Meters", "Length")
+    for unit, result in zip(units, results):
+        assert result == pytest.approx(ENGINE.convert(2.5, "Meters", unit, "Length"))
+
+
+def test_unknown_units_and_categories():
+    with pytest.raises(UnknownUnitError):
+        ENGINE.convert(1, "Meters", "Parsecs", "Length")
+    with pytest.raises(UnknownUnitError):
+        ENGINE.get_category("Luminosity")
+    assert not ENGINE.can_convert("Meters", "Kilograms", "Length")
+    assert not ENGINE.can_convert("Meters", "Feet", "Nope")
+
+
+def test_custom_categories():
+    engine = ConversionEngine({"Ratio": {"units": ["One", "Dozen"], "base": "One",
+                                         "factors": {"One": 1, "Dozen": "12"}}})
+    assert engine.convert(2, "Dozen", "One", "Ratio") == 24
+
+
+def test_resolve_and_convert_local():
+    assert resolve_units("km", "mi") == ("Length", "Kilometers", "Miles")
+    assert resolve_units("m", "kg") is None
+    conversion = convert_local(5, "km", "mi")
+    assert (conversion.category, conversion.to_unit, conversion.path) == ("Length", "Miles", "table")
+    assert conversion.result == pytest.approx(3.10686, rel=1e-5)
+    assert convert_local("0.1", "m", "cm", exact=True).result == 10
+    assert convert_local(1, "kWh/100km", "Wh/km").path == "expression"
+    with pytest.raises(UnknownUnitError):
+        convert_local(1, "m", "kg")
+    category, unit, units, results = convert_all_local(1, "ft")
+    assert (category, unit) == ("Length", "Feet") and len(units) == len(results)
+
+
+def test_intent_answers_conversions_only():
+    assert intent.answer("5 km in miles") == "5 Kilometers = 3.10686 Miles"
+    assert intent.answer("how many feet in a mile") is not None
+    assert intent.answer("hello there") is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("what is 100 F in C", "100 Fahrenheit = 37.7778 Celsius"),
+    ("convert 32 f to c", "32 Fahrenheit = 0 Celsius"),
+    ("0 c to k", "0 Celsius = 273.15 Kelvin"),
+    ("-40 °F in °C", "-40 Fahrenheit = -40 Celsius"),
+])
+def test_bare_temperature_letters(text, expected):
+    assert intent.answer(text) == expected
+
+
+def test_bare_letters_outside_temperatures():
+    assert intent.answer("1 C to mC") == "1 C = 1,000 mC"
+    assert intent.answer("5 f to m") is None
+
+
+def test_number_is_never_empty():
+    assert intent.parse_query("convert km to mi") is None
+    assert intent.parse_query(".5 km to m").value == 0.5
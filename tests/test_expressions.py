@@ -0,0 +1,78 @@
+import pytest
+
+from components import intent
+from components.conversion import convert_local
+from components.expressions import (CUSTOM_CATEGORY, DimensionError, compile_expression,
+                                    conversion_factor, convert_expression)
+
+
+def test_compound_expression():
+    assert convert_expression(5, "kWh/100km", "J/m") == pytest.approx(180)
+    assert conversion_factor("kg·m/s²", "N") == pytest.approx(1)
+
+
+def test_mismatched_dimensions():
+    with pytest.raises(DimensionError, match="Incompatible"):
+        conversion_factor("kg", "m")
+
+
+@pytest.mark.parametrize("expr", ["m/0", "0 m", "km^400", "1e200 1e200 m"])
+def test_zero_and_overflowing_factors_are_dimension_errors(expr):
+    with pytest.raises(DimensionError):
+        compile_expression(expr)
+
+
+def test_overflowing_result_is_a_dimension_error():
+    with pytest.raises(DimensionError):
+        convert_expression(1e305, "km", "mm")
+
+
+@pytest.mark.parametrize("to_unit", ["m/0", "m^400"])
+def test_custom_category_raises_dimension_error(to_unit):
+    with pytest.raises(DimensionError):
+        convert_local(1, "km", to_unit, CUSTOM_CATEGORY)
+
+
+@pytest.mark.parametrize("text", [
+    "convert 5 m to m/0",
+    "convert 1 km^400 to m^400",
+    "convert 1e200 m*1e200 to m",
+])
+def test_chat_fast_path_does_not_crash(text):
+    assert intent.answer(text) is None
+
+
+def test_data_units_follow_the_registry_aliases():
+    # "mb" and "kb" are Megabytes / Kilobytes in the registry, not milli-bits / binary kilobits
+    assert intent.answer("convert 10 mb/s to kb/s") == "10 mb/s = 10,240 kb/s"
+    assert conversion_factor("MB/s", "kB/s") == pytest.approx(1024)
+
+
+def test_bit_multiples_are_decimal_unless_binary_prefixed():
+    assert conversion_factor("Gbps", "Mbps") == pytest.approx(1000)
+    assert conversion_factor("kbit", "bit") == pytest.approx(1000)
+    assert conversion_factor("Kibit", "bit") == pytest.approx(1024)
+
+
+@pytest.mark.parametrize("expr", ["mbit", "µB", "nbps"])
+def test_no_sub_unit_prefixes_on_bits_and_bytes(expr):
+    with pytest.raises(DimensionError):
+        compile_expression(expr)
+
+
+def test_digits_glued_to_a_unit_are_exponents():
+    assert intent.answer("convert 1 kg/m2 to g/cm2") == "1 kg/m2 = 0.1 g/cm2"
+    assert conversion_factor("cm3", "m^3") == pytest.approx(1e-6)
+    assert conversion_factor("kg/m2", "g/cm2") == pytest.approx(0.1)
+    with pytest.raises(DimensionError):
+        compile_expression("m2.5")
+
+
+def test_symbol_case_is_kept():
+    # Mb = 10^6 bits, MB = 2^20 bytes (binary, like the Digital Storage category)
+    assert conversion_factor("Mb", "MB") == pytest.approx(1e6 / 8 / 2 ** 20)
+    assert intent.answer("5 Mb to MB") == "5 Mb = 0.596046 MB"
+    assert intent.answer("convert 1 Mm to km") == "1 Mm = 1,000 km"
+    assert intent.answer("convert 1 mm to km") == "1 Millimeters = 1e-6 Kilometers"
+    assert convert_local(1, "Mm", "mm").result == pytest.approx(1e9)
+    assert convert_local(5, "KM", "mi").category == "Length"
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from components.llm import LLMClient, is_rate_limited
+
+
+class FakeModel:
+    """chat() sleeps for the number of seconds in the message and tracks concurrency"""
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def chat(self, message, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            failure = self.failures.pop(0) if self.failures else None
+        try:
+            time.sleep(float(message))
+            if failure is not None:
+                raise failure
+            return message
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+
+
+def test_timed_out_call_keeps_its_concurrency_slot():
+    model = FakeModel()
+    client = LLMClient(model, max_concurrency=1, timeout=0.05, retries=0)
+    with pytest.raises(asyncio.TimeoutError):
+        client.chat("0.3")
+    # The first call is still running upstream, so this one has to wait for it
+    assert client.chat("0.01", temperature=0.1) == "0.01"
+    assert model.peak == 1
+
+
+def test_rate_limited_calls_are_retried_by_status_code():
+    model = FakeModel(failures=[StatusError(429)])
+    client = LLMClient(model, retries=2, backoff=0.001)
+    assert client.chat("0") == "0"
+    assert model.calls == 2
+
+
+def test_other_errors_are_not_retried():
+    model = FakeModel(failures=[RuntimeError("upstream said 429 somewhere in the text")])
+    client = LLMClient(model, retries=2, backoff=0.001)
+    with pytest.raises(RuntimeError):
+        client.chat("0")
+    assert model.calls == 1
+
+
+def test_is_rate_limited_reads_the_status():
+    assert is_rate_limited(StatusError(429))
+    assert not is_rate_limited(StatusError(500))
+    assert not is_rate_limited(ValueError("429"))
+
+
+class StreamModel:
+    """chat(stream=True) waits the number of seconds in the message before the first event"""
+    def chat(self, message, stream=False, **kwargs):
+        time.sleep(float(message))
+        for text in ("a", "b"):
+            yield type("Event", (), {"event_type": "text-generation", "text": text})()
+
+
+def test_stream_reports_its_own_time_to_first_token():
+    client = LLMClient(StreamModel())
+    seen = {}
+
+    def run(delay):
+        samples = []
+        assert "".join(client.stream(delay, on_ttft=samples.append)) == "ab"
+        seen[delay] = samples
+
+    threads = [threading.Thread(target=run, args=(delay,)) for delay in ("0.3", "0.01")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(seen["0.3"]) == len(seen["0.01"]) == 1
+    assert seen["0.01"][0] < 0.2 <= seen["0.3"][0]
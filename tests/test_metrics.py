@@ -0,0 +1,21 @@
+import socket
+
+from components import metrics
+
+
+def test_exporter_port_in_use_does_not_crash(monkeypatch, capsys):
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        monkeypatch.setattr(metrics, "_exporter_started", False)
+        metrics.start_exporter(port=taken.getsockname()[1])
+    assert "Metrics exporter not started" in capsys.readouterr().err
+
+
+def test_render_counters_and_histograms():
+    registry = metrics.MetricsRegistry()
+    registry.counter("calls_total", "Calls", ("kind",)).inc(kind="chat")
+    registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1)).observe(0.5)
+    text = registry.render()
+    assert 'calls_total{kind="chat"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 1' in text and "latency_seconds_count 1" in text
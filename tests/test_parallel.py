@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from components import parallel
+from components.parallel import ParallelConverter, split
+
+
+def attached_names():
+    return sorted(parallel._attached)
+
+
+def test_split_covers_the_range_in_order():
+    ranges = split(1000, 4, min_chunk=100)
+    assert ranges[0][0] == 0 and ranges[-1][1] == 1000
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert split(10, 8, min_chunk=100) == [(0, 10)]
+
+
+def test_thread_mode_matches_serial():
+    values = np.arange(300000, dtype=np.float64)
+    with ParallelConverter(workers=4) as converter:
+        result = converter.convert(values, "Kilometers", "Meters", "Length")
+    np.testing.assert_allclose(result, values * 1000)
+
+
+def test_process_workers_keep_only_the_current_blocks():
+    with ParallelConverter(workers=1, mode="process") as converter:
+        for size in (10, 1000, 100000):
+            values = np.arange(size, dtype=np.float64)
+            np.testing.assert_allclose(converter.convert(values, "Meters", "Centimeters", "Length"), values * 100)
+            names = converter.executor.submit(attached_names).result()
+            assert names == sorted([converter._shm_in.name, converter._shm_out.name])
+
+
+@pytest.mark.parametrize("out", [
+    np.empty((8, 2))[:, 0],            # strided view: reshape would copy
+    np.empty((2, 4), order="F"),
+    np.empty(8, dtype=np.int64),
+    np.empty(7),
+])
+def test_unusable_out_is_rejected(out):
+    with ParallelConverter(workers=2) as converter:
+        with pytest.raises(ValueError):
+            converter.convert(np.arange(8.0), "Meters", "Feet", "Length", out=out)
+
+
+def test_multidimensional_out_is_filled():
+    out = np.empty((2, 3))
+    with ParallelConverter(workers=2) as converter:
+        converter.convert(np.arange(6.0), "Kilometers", "Meters", "Length", out=out)
+    np.testing.assert_allclose(out, np.arange(6.0).reshape(2, 3) * 1000)
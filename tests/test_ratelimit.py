@@ -0,0 +1,110 @@
+import asyncio
+import threading
+
+import pytest
+
+from components.ratelimit import (PRIORITY_CHAT, PRIORITY_CONVERSION, BudgetExceeded, DailyQuota, RateLimiter,
+                                  TokenBucket)
+
+
+def test_priority_request_arriving_during_the_sleep_goes_first():
+    async def run():
+        bucket = TokenBucket(rate=10, capacity=1)
+        bucket.take()  # empty: the next token is 0.1s away
+        limiter = RateLimiter(bucket, max_wait=5)
+        order = []
+
+        async def ask(name, priority):
+            await limiter.acquire(name, priority)
+            order.append(name)
+
+        chat = asyncio.ensure_future(ask("chat", PRIORITY_CHAT))
+        await asyncio.sleep(0.02)  # dispatcher is now sleeping for the token
+        conversion = asyncio.ensure_future(ask("conversion", PRIORITY_CONVERSION))
+        await asyncio.gather(chat, conversion)
+        return order
+
+    assert asyncio.run(run()) == ["conversion", "chat"]
+
+
+def test_round_robin_across_users():
+    async def run():
+        limiter = RateLimiter(TokenBucket(rate=1000, capacity=1), max_wait=5)
+        order = []
+
+        async def ask(user):
+            await limiter.acquire(user)
+            order.append(user)
+
+        await asyncio.gather(*(ask(user) for user in ("a", "a", "a", "b")))
+        return order
+
+    assert asyncio.run(run()).index("b") < 3
+
+
+def test_waiting_past_max_wait_raises():
+    async def run():
+        bucket = TokenBucket(rate=0.01, capacity=1)
+        bucket.take()
+        await RateLimiter(bucket, max_wait=0.05).acquire()
+
+    with pytest.raises(BudgetExceeded):
+        asyncio.run(run())
+
+
+def test_daily_quota(tmp_path):
+    async def run(path):
+        limiter = RateLimiter(TokenBucket(rate=1000, capacity=5, path=path), DailyQuota(2, path=path), max_wait=1)
+        await limiter.acquire()
+        await limiter.acquire()
+        with pytest.raises(BudgetExceeded):
+            await limiter.acquire()
+        return limiter.usage()
+
+    assert asyncio.run(run(str(tmp_path / "limits.db"))) == (2, 2)
+
+
+def test_sqlite_calls_run_off_the_loop(tmp_path):
+    path = str(tmp_path / "limits.db")
+    bucket, quota = TokenBucket(rate=1000, capacity=5, path=path), DailyQuota(0, path=path)
+    threads = []
+    for owner in (bucket, quota):
+        for name in ("take", "try_use", "drain"):
+            method = getattr(owner, name, None)
+            if method is not None:
+                def traced(method=method):
+                    threads.append(threading.current_thread())
+                    return method()
+                setattr(owner, name, traced)
+
+    async def run():
+        limiter = RateLimiter(bucket, quota, max_wait=1)
+        await limiter.acquire()
+        await limiter.drain()
+        return threading.current_thread()
+
+    loop_thread = asyncio.run(run())
+    assert threads and loop_thread not in threads
+
+
+def test_refund_is_capped():
+    bucket = TokenBucket(rate=0.001, capacity=1)
+    bucket.refund()
+    assert bucket.take() == 0.0
+    assert bucket.take() > 0
+
+
+def test_quota_rejection_gives_the_token_back(tmp_path):
+    path = str(tmp_path / "limits.db")
+    bucket = TokenBucket(rate=0.001, capacity=2, path=path)
+    quota = DailyQuota(1, path=path)
+    quota.try_use()
+    # Another process used up today's budget between acquire()'s check and the dispatch
+    quota.used = lambda: 0
+
+    async def run():
+        with pytest.raises(BudgetExceeded):
+            await RateLimiter(bucket, quota, max_wait=1).acquire()
+
+    asyncio.run(run())
+    assert bucket.take() == 0.0 and bucket.take() == 0.0
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+from components.registry import RegistryError, load_registry
+
+
+def write(tmp_path, spec, name="units.json"):
+    path = tmp_path / name
+    path.write_text(json.dumps(spec), encoding="utf-8")
+    return str(path)
+
+
+def test_new_category_and_snapshot(tmp_path):
+    path = write(tmp_path, {"categories": {"Data Rate": {"base": "Bits per Second", "units": {
+        "Bits per Second": {"factor": 1, "aliases": ["bit/s"]},
+        "Kilobits per Second": {"factor": "1000"}}}}})
+    cache = str(tmp_path / "cache")
+    first = load_registry([path], cache_dir=cache)
+    snapshots = os.listdir(cache)
+    assert [name.endswith(".json") for name in snapshots] == [True]
+    second = load_registry([path], cache_dir=cache)
+    assert second.units["Data Rate"] == ("Bits per Second", "Kilobits per Second")
+    assert second.categories["Data Rate"] == first.categories["Data Rate"]
+    assert "bit/s" in second.aliases["Bits per Second"]
+
+
+def test_alias_only_entry_keeps_the_factor(tmp_path):
+    path = write(tmp_path, {"categories": {"Length": {"units": {"Meters": {"aliases": ["metre-ish"]}}}}})
+    registry = load_registry([path], use_snapshot=False)
+    builtin = load_registry([], use_snapshot=False)
+    assert registry.categories["Length"]["factors"]["Meters"] == builtin.categories["Length"]["factors"]["Meters"]
+    assert "metre-ish" in registry.aliases["Meters"]
+
+
+def test_new_unit_needs_a_factor(tmp_path):
+    path = write(tmp_path, {"categories": {"Length": {"units": {"Furlongs": {"aliases": ["fur"]}}}}})
+    with pytest.raises(RegistryError, match="Furlongs"):
+        load_registry([path], use_snapshot=False)
+
+
+@pytest.mark.parametrize("unit_spec", [201.168, "201.168", ["x"], {"factor": 1, "aliases": "fur"}])
+def test_bad_unit_specs_are_registry_errors(tmp_path, unit_spec):
+    path = write(tmp_path, {"categories": {"Length": {"units": {"Furlongs": unit_spec}}}})
+    with pytest.raises(RegistryError):
+        load_registry([path], use_snapshot=False)
+
+
+def test_tampered_snapshot_is_rebuilt(tmp_path):
+    cache = str(tmp_path / "cache")
+    load_registry([], cache_dir=cache)
+    snapshot_path = os.path.join(cache, os.listdir(cache)[0])
+    with open(snapshot_path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    snapshot["digest"] = "0" * 64
+    snapshot["blobs"]["Length"] = json.dumps({"units": ["Meters"], "factors": {"Meters": 2}})
+    with open(snapshot_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    registry = load_registry([], cache_dir=cache)
+    assert "Feet" in registry.categories["Length"]["units"]
+
+    with open(snapshot_path, "w", encoding="utf-8") as f:
+        f.write("not json")
+    assert "Feet" in load_registry([], cache_dir=cache).categories["Length"]["units"]
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from components.service import HTTPError, JSON_TYPE, NDJSON_TYPE, convert_all, convert_batch, convert_one
+
+
+def _body(response):
+    status, _, body = response
+    assert status == 200
+    return json.loads(body)
+
+
+def test_convert_one():
+    body = _body(convert_one({"value": "5", "from": "km", "to": "mi"}))
+    assert body["category"] == "Length"
+    assert body["result"] == pytest.approx(3.10686, rel=1e-5)
+
+
+def test_convert_one_exact():
+    body = _body(convert_one({"value": "0.1", "from": "Meters", "to": "Centimeters", "exact": "1"}))
+    assert body["exact"] == "10"
+
+
+@pytest.mark.parametrize("value", ["inf", "nan", "-Infinity"])
+def test_non_finite_value_is_a_bad_request(value):
+    with pytest.raises(HTTPError) as e:
+        convert_one({"value": value, "from": "km", "to": "mi"})
+    assert e.value.status == 400
+    with pytest.raises(HTTPError):
+        convert_all({"value": value, "from": "km"})
+
+
+@pytest.mark.parametrize("to_unit", ["m/0", "m^400"])
+def test_bad_target_expression_reports_the_unit(to_unit):
+    with pytest.raises(HTTPError) as e:
+        convert_one({"value": "1", "from": "km", "to": to_unit})
+    assert e.value.status == 400
+    assert "not a number" not in str(e.value)
+
+
+def test_convert_all():
+    body = _body(convert_all({"value": "1", "from": "km"}))
+    assert body["results"]["Meters"] == pytest.approx(1000)
+
+
+def test_batch_errors_stay_per_item():
+    records = [
+        {"value": 1, "from": "km", "to": "m"},
+        {"value": 1, "from": [1], "to": "m"},
+        {"value": 1, "from": "m", "to": "m/0", "category": "Custom expression"},
+        {"value": 1, "from": "km^400", "to": "m^400"},
+        {"value": "x", "from": "kg", "to": "lb"},
+        [1, 2],
+    ]
+    results = _body(convert_batch(json.dumps(records).encode(), JSON_TYPE))["results"]
+    assert results[0]["result"] == pytest.approx(1000)
+    assert all("error" in result for result in results[1:])
+
+
+def test_batch_non_finite_values_come_back_as_null():
+    body = b'[{"value": Infinity, "from": "km", "to": "m"}]'
+    result = _body(convert_batch(body, JSON_TYPE))["results"][0]
+    assert result["value"] is None and result["result"] is None
+
+
+def test_batch_values_list_and_ndjson():
+    body = _body(convert_batch(json.dumps({"from": "Celsius", "to": "Fahrenheit", "values": [0, 100, None]}).encode(), JSON_TYPE))
+    assert body["results"] == [pytest.approx(32), pytest.approx(212), None]
+    lines = b'{"value": 1, "from": "kg", "to": "g"}\n{"value": 2, "from": "kg", "to": "g"}\n'
+    status, content_type, out = convert_batch(lines, NDJSON_TYPE)
+    assert [json.loads(line)["result"] for line in out.splitlines()] == [1000, 2000]
+
+
+def test_batch_rejects_non_string_units():
+    with pytest.raises(HTTPError) as e:
+        convert_batch(json.dumps({"from": ["C"], "to": "F", "values": [1]}).encode(), JSON_TYPE)
+    assert e.value.status == 400
+
+
+@pytest.mark.parametrize("value", ["1e400", "1e5000000", "1e-5000000", "1" * 100, "1/1e999", "NaN", "x"])
+def test_exact_values_are_bounded(value):
+    with pytest.raises(HTTPError) as e:
+        convert_one({"value": value, "from": "km", "to": "mm", "exact": "1"})
+    assert e.value.status == 400
+
+
+def test_out_of_range_result_is_a_bad_request():
+    for exact in ("", "1"):
+        with pytest.raises(HTTPError) as e:
+            convert_one({"value": "1e305", "from": "km", "to": "nm", "category": "Length", "exact": exact})
+        assert e.value.status == 400 and "out of range" in str(e.value)
+
+
+@pytest.mark.parametrize("values", [[[1, 2]], ["1"], [True], [10 ** 400], [{"a": 1}]])
+def test_batch_values_must_be_flat_numbers(values):
+    with pytest.raises(HTTPError) as e:
+        convert_batch(json.dumps({"from": "km", "to": "m", "values": values}).encode(), JSON_TYPE)
+    assert e.value.status == 400
+
+
+def test_service_docstring_example():
+    body = _body(convert_batch(b'{"from": "Celsius", "to": "Fahrenheit", "values": [0, 37, 100]}', JSON_TYPE))
+    assert body["results"] == [pytest.approx(32), pytest.approx(98.6), pytest.approx(212)]
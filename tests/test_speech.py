@@ -0,0 +1,87 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from components.speech import (FRAME_SAMPLES, SAMPLE_RATE, Segmenter, SpeechPipeline, spoken_numbers,
+                               to_mono_16k)
+
+
+class LoudDetector:
+    def is_speech(self, frame):
+        return bool(np.abs(frame).max() > 1000)
+
+
+def _frames(*pattern):
+    """'v' = voiced frame, 's' = silent frame"""
+    return [np.full(FRAME_SAMPLES, 5000 if p == "v" else 0, dtype=np.int16) for p in "".join(pattern)]
+
+
+def test_segmenter_cuts_utterance_after_hangover_with_preroll():
+    segmenter = Segmenter(LoudDetector(), preroll_ms=90, hangover_ms=90, min_speech_ms=90)
+    outputs = [segmenter.feed(frame) for frame in _frames("sssss", "vvvv", "sss")]
+    utterances = [u for u in outputs if u is not None]
+    assert len(utterances) == 1
+    # 3 pre-roll frames (the third is the first voiced one), 3 more voiced, 3 silent
+    assert len(utterances[0]) == 9 * FRAME_SAMPLES
+    assert outputs[-1] is utterances[0]
+
+
+def test_segmenter_drops_blips():
+    segmenter = Segmenter(LoudDetector(), hangover_ms=90, min_speech_ms=150)
+    assert all(segmenter.feed(frame) is None for frame in _frames("ss", "vv", "ssss"))
+
+
+def _av_frame(array, fmt, planar, channels, rate=48000):
+    return SimpleNamespace(
+        to_ndarray=lambda: array, sample_rate=rate,
+        format=SimpleNamespace(name=fmt, is_planar=planar),
+        layout=SimpleNamespace(channels=[object()] * channels),
+    )
+
+
+def test_planar_float_frame_is_downmixed_and_scaled():
+    left, right = np.full(960, 0.5, dtype=np.float32), np.zeros(960, dtype=np.float32)
+    frame = np.stack([left, right])  # fltp stereo: (channels, samples)
+    mono = to_mono_16k(frame, 48000, channels=2, planar=True)
+    assert mono.dtype == np.int16
+    assert len(mono) == 320
+    assert mono[0] == pytest.approx(0.25 * 32767, abs=2)
+
+
+def test_packed_int16_frame_is_deinterleaved():
+    interleaved = np.tile(np.array([1000, 3000], dtype=np.int16), 960).reshape(1, -1)  # s16 stereo
+    mono = to_mono_16k(interleaved, 48000, channels=2)
+    assert len(mono) == 320
+    assert np.all(mono == 2000)
+
+
+class FakeRecognizer:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, pcm, sample_rate):
+        self.calls.append(len(pcm))
+        return "Five point two km to miles"
+
+
+def test_pipeline_transcribes_pushed_frames_and_polls():
+    recognizer = FakeRecognizer()
+    pipeline = SpeechPipeline(recognizer, segmenter=Segmenter(LoudDetector(), hangover_ms=90, min_speech_ms=90))
+    tone = (0.3 * np.sin(np.arange(48000 // 2) / 5)).astype(np.float32)
+    pipeline.push_frame(_av_frame(tone.reshape(1, -1), "fltp", True, 1))
+    pipeline.push(np.zeros(SAMPLE_RATE // 5, dtype=np.int16))
+    pipeline.stop()  # returns at once; the worker finishes the utterance in the background
+    deadline = time.monotonic() + 5
+    while pipeline.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not pipeline.running
+    assert pipeline.poll() == ["5.2 km to miles"]
+    assert pipeline.poll() == []
+    assert recognizer.calls
+
+
+def test_spoken_numbers():
+    assert spoken_numbers("two hundred and five point five meters") == "205.5 meters"
+    assert spoken_numbers("minus forty celsius") == "-40 celsius"
@@ -1,12 +1,23 @@
 import streamlit as st
-from components.unit_config import UnitCategories
 from components.converter import UnitConverter
 from components.api_config import setup_model
-import time
+from components.metrics import RERUN_SECONDS, start_exporter
+from components.styles import PAGE_STYLE
 
-if 'api_call_count' not in st.session_state:
-    st.session_state.api_call_count = 0
-    st.session_state.last_call_time = time.time()
+# Per-session LLM call count for the sidebar usage bar; process-wide totals are in components.metrics
+if 'api_calls' not in st.session_state:
+    st.session_state.api_calls = 0
+
+# Serves /metrics when UNIT_CONVERTER_METRICS_PORT or _FILE is set, once per process
+start_exporter()
+
+@st.cache_resource
+def get_converter(_model, model_key):
+    """One UnitConverter (with its chat and voice interfaces) per model, shared by all sessions
+
+    The model client itself isn't hashable, so model_key stands in for it.
+    """
+    return UnitConverter(_model)
 
 def main():
     st.set_page_config(
@@ -16,35 +27,13 @@ def main():
         initial_sidebar_state="collapsed"
     )
     
-    st.markdown("""
-        <style>
-        @media (max-width: 768px) {
-            .stMarkdown h1 {font-size: 1.5rem !important;}
-            .stMarkdown h2 {font-size: 1.3rem !important;}
-            .stMarkdown h3 {font-size: 1.1rem !important;}
-            .element-container, .stButton, .stSelectbox {width: 100% !important;}
-            .block-container {padding: 1rem !important;}
-            [data-testid="column"] {width: 100% !important; margin-bottom: 1rem;}
-        }
-        .stNumberInput input, .stSelectbox select {
-            min-height: 40px;
-            border-radius: 8px !important;
-        }
-        .stButton button {
-            width: 100%;
-            height: 40px;
-            border-radius: 8px !important;
-            transition: all 0.3s ease;
-        }
-        .stChatMessage {max-width: 90% !important; margin: 0.5rem 0;}
-        .css-1d391kg {width: 100% !important; max-width: 300px;}
-        </style>
-    """, unsafe_allow_html=True)
+    # One prebuilt <style> block for the whole page instead of one per component
+    st.markdown(PAGE_STYLE, unsafe_allow_html=True)
     
+    # Conversions run locally, the model is only needed for chat and fallbacks
     model = setup_model()
-    if model:
-        converter = UnitConverter(model)
-        converter.render()
+    converter = get_converter(model, id(model) if model else None)
+    converter.render()
 
     is_cloud = st.session_state.get('is_streamlit_cloud', False)
     if is_cloud and not st.get_option("browser.serverAddress").startswith("https"):
@@ -59,4 +48,5 @@ def main():
         """)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with RERUN_SECONDS.time():
+        main()
\ No newline at end of file